@@ -1,7 +1,53 @@
 # app.py
-from gui.terminal_ui import TerminalUI
+import sys
+import time
 
-if __name__ == "__main__":
-    # You Can Try These Themes: "Dark", "Light", "Dracula"
-    app = TerminalUI(theme_name="Dracula") 
+_STARTED = time.perf_counter()
+
+# Modules imported by gui.terminal_ui, in dependency order, for the --startup-profile breakdown
+PROFILED_IMPORTS = (
+    "tkinter",
+    "tkinter.scrolledtext",
+    "tkinter.ttk",
+    "terminal_core.output_buffer",
+    "terminal_core.ansi",
+    "terminal_core.metrics",
+    "terminal_core.jobs",
+    "utils.helpers",
+    "utils.config",
+    "utils.completion",
+    "gui.tag_pool",
+    "gui.stats_overlay",
+    "gui.terminal_ui",
+)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if "-h" in argv or "--help" in argv:
+        print("usage: python app.py [--startup-profile]\n\n"
+              "  --startup-profile  print an import/init time breakdown to stderr once startup completes")
+        return
+
+    profile = None
+    if "--startup-profile" in argv:
+        import importlib
+        from terminal_core.metrics import StartupProfile
+        profile = StartupProfile(origin=_STARTED)
+        for name in PROFILED_IMPORTS:
+            with profile.measure(f"import {name}"):
+                importlib.import_module(name)
+
+    from gui.terminal_ui import TerminalUI
+    from utils.config import current as current_settings
+
+    # Theme, font, geometry and tuning knobs come from the config file (see utils.config)
+    if profile is not None:
+        with profile.measure("load config"):
+            current_settings()
+    app = TerminalUI(startup_profile=profile)
     app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
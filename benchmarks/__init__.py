@@ -0,0 +1 @@
+# This file makes the folder a Python package
@@ -0,0 +1,185 @@
+# benchmarks/headless.py
+"""
+Drive TerminalPane's output pipeline without a window.
+
+make_ui() builds a TerminalPane instance without running Tk's __init__:
+theme colors, settings and the widget, then TerminalPane._init_output() for
+the state the output path needs (OutputBuffer, frame timer, tag pool, SGR
+parsers, scrollback trimming). The methods under test are the real ones from
+gui.terminal_ui.
+
+The text widget is either a real tk.Text (when a display is available, e.g.
+under Xvfb) or StubText, which keeps only line/column counts and runs
+after() callbacks from its own queue. Either way `pump()` runs one event
+loop iteration and `queue_depth()` reports pending timer callbacks.
+"""
+import heapq
+import re
+import time
+
+_LINE_INDEX = re.compile(r"(\d+)\.0$")
+
+
+class StubText:
+    """Stand-in for tk.Text that tracks line counts and an after() queue."""
+
+    def __init__(self):
+        self.lines = 1
+        self.column = 0
+        self.insert_calls = 0
+        self.chars = 0
+        self.tagged_ranges = 0
+        self._queue = []  # (due, seq, callback)
+        self._seq = 0
+
+    # --- text ---
+    def insert(self, index, *args):
+        # The output path only appends at the end
+        self.insert_calls += 1
+        for text in args[::2]:
+            self.chars += len(text)
+            newlines = text.count("\n")
+            if newlines:
+                self.lines += newlines
+                self.column = len(text) - text.rfind("\n") - 1
+            else:
+                self.column += len(text)
+
+    def delete(self, start, end=None):
+        match = _LINE_INDEX.match(str(end or ""))
+        if start == "1.0" and match:
+            self.lines -= int(match.group(1)) - 1
+
+    def index(self, spec):
+        if spec == "end-1c":
+            return f"{self.lines}.{self.column}"
+        if spec == "end":
+            return f"{self.lines + 1}.0"
+        return spec
+
+    def yview(self, *args):
+        return (0.0, 1.0)
+
+    def get(self, *args):
+        return ""
+
+    def see(self, *args):
+        pass
+
+    def mark_set(self, *args):
+        pass
+
+    def tag_config(self, *args, **kwargs):
+        pass
+
+    def tag_delete(self, *args):
+        pass
+
+    def tag_nextrange(self, *args):
+        return ()
+
+    def tag_add(self, tag, *indices):
+        self.tagged_ranges += len(indices) // 2
+
+    # --- event loop ---
+    def after(self, ms, callback):
+        self._seq += 1
+        heapq.heappush(self._queue, (time.monotonic() + ms / 1000.0, self._seq, callback))
+
+    def after_idle(self, callback):
+        self.after(0, callback)
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def pump(self, timeout: float = 0.05):
+        """Run the next due callback, sleeping up to timeout for it."""
+        if not self._queue:
+            time.sleep(min(timeout, 0.001))
+            return
+        due = self._queue[0][0]
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(min(delay, timeout))
+            if due > time.monotonic():
+                return
+        _, _, callback = heapq.heappop(self._queue)
+        callback()
+
+
+class TkText:
+    """Real tk.Text in a withdrawn root window, with the same pump()/queue_depth()."""
+
+    def __init__(self):
+        import tkinter as tk
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.widget = tk.Text(self.root, wrap=tk.WORD)
+        self.widget.pack()
+
+    def __getattr__(self, name):
+        return getattr(self.widget, name)
+
+    def queue_depth(self) -> int:
+        return len(self.root.tk.splitlist(self.root.tk.call("after", "info")))
+
+    def pump(self, timeout: float = 0.05):
+        self.root.update()
+        time.sleep(0.0005)
+
+    @property
+    def lines(self) -> int:
+        return int(self.widget.index("end-1c").split(".")[0])
+
+    def destroy(self):
+        self.root.destroy()
+
+
+def make_widget(display: str = "auto"):
+    """display: "tk", "stub" or "auto" (real Tk if a display can be opened)."""
+    if display in ("tk", "auto"):
+        try:
+            return TkText()
+        except Exception:
+            if display == "tk":
+                raise
+    return StubText()
+
+
+class _HiddenOverlay:
+    visible = False
+
+
+def make_ui(widget, scrollback_lines: int = None, detect_links: bool = False, cwd: str = None,
+            screen_renderer: str = "text"):
+    """A TerminalPane wired to `widget` with just the output-path state."""
+    import os
+    from gui import terminal_ui
+    from utils.config import Settings
+
+    ui = terminal_ui.TerminalPane.__new__(terminal_ui.TerminalPane)
+    ui.text_color = "#00ff00"
+    ui.error_color = "#ff4500"
+    ui.background_color = "#1e1e1e"
+    ui.cursor_color = "#ffffff"
+    ui.font_family, ui.font_size = "Monospace", 11
+    ui.settings = Settings()
+    ui.settings.screen_renderer = screen_renderer
+    ui.settings.detect_links = detect_links
+    ui.stats_overlay = _HiddenOverlay()
+    ui.terminal_area = widget
+    ui.cwd = cwd or os.getcwd()
+    ui._init_output(scrollback_lines)
+    return ui
+
+
+def run_until_drained(ui, widget, timeout: float = 600.0, on_tick=None) -> bool:
+    """Pump the event loop until the output buffer is empty and idle."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        widget.pump()
+        if on_tick is not None:
+            on_tick()
+        if not ui.output_buffer.pending() and not widget.queue_depth():
+            return True
+    return False
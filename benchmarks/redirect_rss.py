@@ -0,0 +1,95 @@
+# benchmarks/redirect_rss.py
+"""
+Redirect a large stream to a file and report throughput and peak RSS.
+
+Each mode runs in a fresh interpreter so peaks do not leak between runs:
+- engine:   terminal_core.executor.stream_command("head -c N /dev/zero > file")
+            (the pipeline engine hands the file fd straight to the child)
+- buffered: the pre-pipeline behaviour, subprocess.run(capture_output=True)
+            followed by writing the captured output from Python
+
+Usage:
+    python -m benchmarks.redirect_rss --size 2G
+    python -m benchmarks.redirect_rss --size 256M --modes engine
+Prints one JSON object.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    if text and text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_mode(mode: str, size: int, path: str) -> dict:
+    command = f"head -c {size} /dev/zero"
+    start = time.perf_counter()
+    if mode == "engine":
+        from terminal_core.executor import stream_command
+        for kind, payload in stream_command(f"{command} > {path}"):
+            if kind == "error":
+                raise RuntimeError(payload)
+    else:
+        result = subprocess.run(command, shell=True, capture_output=True)
+        with open(path, "wb") as f:
+            f.write(result.stdout)
+    elapsed = time.perf_counter() - start
+    written = os.path.getsize(path)
+    return {
+        "mode": mode,
+        "bytes": written,
+        "seconds": round(elapsed, 4),
+        "mb_per_s": round(written / elapsed / 1e6, 1) if elapsed else None,
+        "peak_rss_mb": round(peak_rss_bytes() / 1e6, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="2G", help="bytes to redirect (suffix K/M/G)")
+    parser.add_argument("--modes", default="engine,buffered")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    size = parse_size(args.size)
+
+    if args.child:
+        fd, path = tempfile.mkstemp(prefix="0term-bench-")
+        os.close(fd)
+        try:
+            print(json.dumps(run_mode(args.child, size, path)))
+        finally:
+            os.unlink(path)
+        return
+
+    results = []
+    for mode in args.modes.split(","):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.redirect_rss", "--size", str(size), "--child", mode],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            results.append({"mode": mode, "error": out.stderr.strip().splitlines()[-1:]})
+        else:
+            results.append(json.loads(out.stdout))
+    print(json.dumps({"benchmark": "redirect_rss", "size": size, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
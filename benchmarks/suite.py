@@ -0,0 +1,754 @@
+# benchmarks/suite.py
+"""
+0Term benchmark suite.
+
+Benchmarks (each runs in a fresh interpreter, so peak RSS is per benchmark):
+- executor_throughput: chars/s through stream_command and execute_command_logic
+- pty_throughput:      bytes/s through run_in_pty
+- shell_throughput:    chars/s through the persistent shell (PersistentShell.stream)
+- keystroke_echo:      key written to a PtySession running `cat` -> echo read back (ms)
+- gui_flood:           output flood through TerminalPane's buffer/frame pipeline;
+                       reports frames, coalescing and Tk event-queue depth
+- render_lines:        time to render N lines (10% ANSI-colored) through TerminalPane
+- spawn_overhead:      per-command cost of running /bin/true through the native
+                       pipeline, the sh -c fallback, the persistent shell and run_in_pty (ms)
+- redirect_rss:        `head -c N /dev/zero > file` through the pipeline engine
+- sessions:            N persistent shells read by the shared reactor thread: start-up
+                       time, threads, and latency/CPU of one command in all of them at once
+- scrollback_search:   --lines lines indexed into a LineStore, then a rare literal, a
+                       case-insensitive literal and a regex searched on the search thread,
+                       plus the cost of next/previous match (us)
+- replay:              asciicast replay at maximum speed through TerminalPane (a synthetic
+                       --lines recording, or --cast FILE), plus the per-chunk cost of recording
+- flood_control:       `cat` of a --size file through a Session into TerminalPane, held back
+                       by the output watermarks and in fast-forward mode: peak pending text,
+                       peak RSS, longest main-loop stall and Ctrl-C latency during a flood
+- link_scan:           --lines lines of compiler-style output (file:line references, URLs)
+                       through TerminalPane with link detection off and on: main-thread
+                       time, links underlined, and find_links() throughput on the worker
+- screen_redraw:       --iterations full-screen frames (colored 160x50, some wide characters)
+                       of a top-like app rendered by the text widget and by the cell grid
+                       renderer (gui.cell_grid), including Tk's display pass; needs a display
+- output_cache:        `ls -la` of a 5000-file directory run in the persistent shell vs
+                       served from terminal_core.output_cache (key + lookup), in ms
+
+The GUI benchmarks use benchmarks.headless: a real Tk widget when a display is
+available (run under Xvfb / xvfb-run for numbers that include Tk), otherwise a
+stub widget that measures everything up to the Tk calls.
+
+Usage:
+    python -m benchmarks                          # all benchmarks, JSON to stdout
+    python -m benchmarks --only gui_flood,render_lines --display stub
+    python -m benchmarks --output after.json --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import threading
+import subprocess
+import statistics
+import tempfile
+
+from benchmarks.redirect_rss import parse_size, peak_rss_bytes
+
+CHUNK = 64 * 1024
+
+
+def _rate(amount: int, seconds: float, scale: float = 1e6):
+    return round(amount / seconds / scale, 2) if seconds else None
+
+
+def _percentiles(samples_ms: list) -> dict:
+    samples = sorted(samples_ms)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))], 3)
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def _text_file(size: int) -> str:
+    """Temporary file of printable 80-column lines, `size` bytes long."""
+    line = (b"0123456789abcdefghijklmnopqrstuvwxyz" * 3)[:79] + b"\n"
+    fd, path = tempfile.mkstemp(prefix="0term-bench-", suffix=".txt")
+    with os.fdopen(fd, "wb") as f:
+        block = line * (CHUNK // len(line))
+        written = 0
+        while written < size:
+            data = block[:size - written]
+            f.write(data)
+            written += len(data)
+    return path
+
+
+# ---------------------------
+# Benchmarks (run in the child interpreter)
+# ---------------------------
+def bench_executor_throughput(args) -> dict:
+    from terminal_core.executor import stream_command, execute_command_logic
+    path = _text_file(args.size)
+    try:
+        start = time.perf_counter()
+        chars = 0
+        for kind, payload in stream_command(f"cat {path}"):
+            if kind == "stdout":
+                chars += len(payload)
+        streamed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = execute_command_logic(f"cat {path}")
+        collected = time.perf_counter() - start
+    finally:
+        os.unlink(path)
+    return {
+        "bytes": args.size,
+        "stream_command": {"seconds": round(streamed, 4), "mb_per_s": _rate(chars, streamed)},
+        "execute_command_logic": {
+            "seconds": round(collected, 4),
+            "mb_per_s": _rate(len(result.get("output") or ""), collected),
+        },
+    }
+
+
+def bench_pty_throughput(args) -> dict:
+    from terminal_core.executor import run_in_pty
+    path = _text_file(args.size)
+    try:
+        start = time.perf_counter()
+        text, _ = run_in_pty(f"cat {path}")
+        elapsed = time.perf_counter() - start
+    finally:
+        os.unlink(path)
+    # the tty turns \n into \r\n, so more characters come back than were written
+    return {"bytes": args.size, "chars_read": len(text), "seconds": round(elapsed, 4),
+            "mb_per_s": _rate(args.size, elapsed)}
+
+
+def bench_shell_throughput(args) -> dict:
+    from terminal_core.shell import PersistentShell
+    path = _text_file(args.size)
+    shell = PersistentShell()
+    try:
+        shell.start()
+        start = time.perf_counter()
+        chars = 0
+        for kind, payload in shell.stream(f"cat {path}"):
+            if kind == "stdout":
+                chars += len(payload)
+        elapsed = time.perf_counter() - start
+    finally:
+        shell.close()
+        os.unlink(path)
+    return {"bytes": args.size, "chars_read": chars, "seconds": round(elapsed, 4),
+            "mb_per_s": _rate(args.size, elapsed)}
+
+
+def bench_keystroke_echo(args) -> dict:
+    from terminal_core.pty_session import PtySession
+    session = PtySession(["cat"])
+    session.start()
+    echoed = threading.Event()
+    received = []
+
+    def on_data(data):
+        received.append(data)
+        echoed.set()
+
+    reader = threading.Thread(target=session.read_loop, args=(on_data,), daemon=True)
+    reader.start()
+    samples = []
+    try:
+        for i in range(args.iterations * 4):
+            echoed.clear()
+            char = chr(ord("a") + i % 26)
+            start = time.perf_counter()
+            session.send_key(char, char)
+            if not echoed.wait(2.0):
+                break
+            samples.append((time.perf_counter() - start) * 1000)
+            if i % 64 == 63:
+                session.send_key("Return", "\r")  # keep cat's line buffer short
+                time.sleep(0.005)
+    finally:
+        session.close()
+        reader.join(2.0)
+        session.wait()
+    return _percentiles(samples) if samples else {"error": "no echo received"}
+
+
+def bench_gui_flood(args) -> dict:
+    from benchmarks.headless import make_widget, make_ui, run_until_drained
+    widget = make_widget(args.display)
+    ui = make_ui(widget)
+    line = "flood " + "x" * 73 + "\n"
+    chunk = line * (CHUNK // len(line))
+    total = args.size
+    done = threading.Event()
+
+    def producer():
+        sent = 0
+        while sent < total:
+            ui._on_job_output("stdout", chunk)
+            sent += len(chunk)
+        done.set()
+
+    depths = []
+    start = time.perf_counter()
+    threading.Thread(target=producer, daemon=True).start()
+    while not done.is_set():
+        widget.pump()
+        depths.append(widget.queue_depth())
+    drained = run_until_drained(ui, widget, on_tick=lambda: depths.append(widget.queue_depth()))
+    elapsed = time.perf_counter() - start
+    stats = ui.output_buffer.stats()
+    return {
+        "widget": type(widget).__name__,
+        "chars": total,
+        "seconds": round(elapsed, 4),
+        "mchars_per_s": _rate(total, elapsed),
+        "drained": drained,
+        "frames": stats.get("frames"),
+        "coalesced_frames": stats.get("coalesced_frames"),
+        "dropped_frames": stats.get("dropped_frames"),
+        "dropped_chars": stats.get("dropped_chars"),
+        "event_queue_depth_max": max(depths) if depths else 0,
+        "event_queue_depth_mean": round(statistics.fmean(depths), 3) if depths else 0,
+    }
+
+
+def bench_render_lines(args) -> dict:
+    from benchmarks.headless import make_widget, make_ui, run_until_drained
+    widget = make_widget(args.display)
+    ui = make_ui(widget)
+    plain = "render line {:>8} " + "." * 50 + "\n"
+    colored = "\x1b[32mrender line {:>8}\x1b[0m \x1b[38;5;208m" + "." * 50 + "\x1b[0m\n"
+    start = time.perf_counter()
+    batch = []
+    for i in range(args.lines):
+        batch.append((colored if i % 10 == 0 else plain).format(i))
+        if len(batch) == 1000:
+            ui._on_job_output("stdout", "".join(batch))
+            batch = []
+            widget.pump(0)
+    if batch:
+        ui._on_job_output("stdout", "".join(batch))
+    queued = time.perf_counter() - start
+    drained = run_until_drained(ui, widget)
+    elapsed = time.perf_counter() - start
+    stats = ui.output_buffer.stats()
+    return {
+        "widget": type(widget).__name__,
+        "lines": args.lines,
+        "seconds": round(elapsed, 4),
+        "queue_seconds": round(queued, 4),
+        "lines_per_s": round(args.lines / elapsed) if elapsed else None,
+        "drained": drained,
+        "frames": stats.get("frames"),
+        "dropped_chars": stats.get("dropped_chars"),
+        "widget_lines": widget.lines,
+        "style_tags": len(ui.tag_pool._tags),
+    }
+
+
+def bench_spawn_overhead(args) -> dict:
+    from terminal_core.executor import stream_command, run_in_pty
+    from terminal_core.shell import PersistentShell
+
+    def measure(run):
+        samples = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - start) * 1000)
+        return _percentiles(samples)
+
+    def consume(events):
+        for _ in events:
+            pass
+
+    shell = PersistentShell()
+    try:
+        shell.start()
+        # An external binary everywhere, so the shell cannot answer with a builtin
+        true = "/bin/true"
+        results = {
+            "pipeline": measure(lambda: consume(stream_command(true))),
+            "sh_fallback": measure(lambda: consume(stream_command(f"{true};"))),
+            "persistent_shell": measure(lambda: consume(shell.stream(true))),
+            "run_in_pty": measure(lambda: run_in_pty(true)),
+        }
+    finally:
+        shell.close()
+    return results
+
+
+def bench_sessions(args) -> dict:
+    from terminal_core.reactor import get_reactor
+    from terminal_core.shell import PersistentShell
+    reactor = get_reactor()
+    shells = [PersistentShell(reactor=reactor) for _ in range(args.sessions)]
+    samples = []
+
+    def run(shell):
+        start = time.perf_counter()
+        for _ in shell.stream("echo ready"):
+            pass
+        samples.append((time.perf_counter() - start) * 1000)
+
+    try:
+        start = time.perf_counter()
+        for shell in shells:
+            shell.start()
+        started = time.perf_counter() - start
+        # Counted before the driver threads below, which stand in for the GUI's job workers
+        threads = threading.active_count()
+        watched = len(reactor)
+        drivers = [threading.Thread(target=run, args=(shell,)) for shell in shells]
+        start, cpu = time.perf_counter(), time.process_time()
+        for driver in drivers:
+            driver.start()
+        for driver in drivers:
+            driver.join()
+        burst, burst_cpu = time.perf_counter() - start, time.process_time() - cpu
+    finally:
+        for shell in shells:
+            shell.close()
+    return {
+        "sessions": args.sessions,
+        "start_seconds": round(started, 4),
+        "threads": threads,
+        "reactor_fds": watched,
+        "burst_seconds": round(burst, 4),
+        "burst_cpu_seconds": round(burst_cpu, 4),
+        "command": _percentiles(samples) if samples else None,
+    }
+
+
+def bench_scrollback_search(args) -> dict:
+    import random
+    from terminal_core.scrollback import LineStore
+    from terminal_core.search import ScrollbackSearch
+    store = LineStore()
+    start = time.perf_counter()
+    batch = []
+    for i in range(args.lines):
+        batch.append(f"ERROR {i}: request failed\n" if i % 10000 == 0 else f"line {i:>8} ok " + "." * 40 + "\n")
+        if len(batch) == 1000:
+            store.append("".join(batch))
+            batch = []
+    store.append("".join(batch))
+    result = {"lines": len(store), "index_seconds": round(time.perf_counter() - start, 4)}
+    for label, query, regex in (("literal", "ERROR", False), ("ignore_case", "error", False),
+                                ("regex", r"ERROR \d+: \w+ failed", True)):
+        start = time.perf_counter()
+        search = ScrollbackSearch(store, query, regex=regex)
+        search.start()
+        snapshot = time.perf_counter() - start
+        search.wait()
+        search.poll()
+        result[label] = {"matches": len(search.matches), "seconds": round(time.perf_counter() - start, 4),
+                         "snapshot_ms": round(snapshot * 1000, 3)}
+    rng = random.Random(1)
+    positions = [rng.randrange(len(store)) for _ in range(10000)]
+    start = time.perf_counter()
+    for line in positions:
+        search.matches.step(line, 0, line % 2 == 0)
+    result["step_us"] = round((time.perf_counter() - start) / len(positions) * 1e6, 3)
+    return result
+
+
+def bench_replay(args) -> dict:
+    from benchmarks.headless import make_widget, make_ui, run_until_drained
+    from terminal_core.recording import AsciicastRecorder, read_asciicast, paced
+    result = {}
+    path = args.cast
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix="0term-bench-", suffix=".cast")
+        os.close(fd)
+        recorder = AsciicastRecorder(path)
+        plain = "replay line {:>8} " + "." * 50 + "\n"
+        colored = "\x1b[32mreplay line {:>8}\x1b[0m \x1b[38;5;208m" + "." * 50 + "\x1b[0m\n"
+        chunks = ["".join((colored if i % 10 == 0 else plain).format(i) for i in range(n, min(n + 100, args.lines)))
+                  for n in range(0, args.lines, 100)]
+        start = time.perf_counter()
+        for chunk in chunks:
+            recorder.output(chunk, translate_newlines=True)
+        recorded = time.perf_counter() - start
+        recorder.close()
+        result["record_us_per_chunk"] = round(recorded / len(chunks) * 1e6, 3) if chunks else None
+        result["cast_bytes"] = os.path.getsize(path)
+    try:
+        widget = make_widget(args.display)
+        ui = make_ui(widget)
+        header, events = read_asciicast(path)
+        count = chars = 0
+        start = time.perf_counter()
+        for code, data in paced(events, speed=None):
+            if code == "o":
+                text = data.replace("\r\n", "\n")
+                ui._on_job_output("stdout", text)
+                count += 1
+                chars += len(text)
+                if count % 10 == 0:
+                    widget.pump(0)
+        drained = run_until_drained(ui, widget)
+        elapsed = time.perf_counter() - start
+    finally:
+        if args.cast is None:
+            os.unlink(path)
+    return dict(result, **{
+        "widget": type(widget).__name__,
+        "events": count,
+        "chars": chars,
+        "seconds": round(elapsed, 4),
+        "mchars_per_s": _rate(chars, elapsed),
+        "drained": drained,
+        "dropped_chars": ui.output_buffer.stats().get("dropped_chars"),
+    })
+
+
+def bench_flood_control(args) -> dict:
+    from benchmarks.headless import make_widget, make_ui, run_until_drained
+    from terminal_core.reactor import get_reactor
+    from terminal_core.session import Session
+    path = _text_file(args.size)
+    widget = make_widget(args.display)
+    result = {"widget": type(widget).__name__, "bytes": args.size}
+    try:
+        for mode, screens in (("throttled", 0), ("fast_forward", 3)):
+            ui = make_ui(widget)
+            ui.fast_forward_screens = screens
+            ui._update_fast_forward()
+            session = Session(reactor=get_reactor())
+            session.start()
+            done = threading.Event()
+
+            def produce(command):
+                for kind, payload in session.stream(command):
+                    if kind != "exit":
+                        ui._on_job_output(kind, payload)
+                done.set()
+
+            def pump_until_done():
+                # Longest main-loop iteration = how long the UI could not react
+                pending = stall = 0.0
+                last = time.perf_counter()
+                while not done.is_set():
+                    widget.pump()
+                    now = time.perf_counter()
+                    stall, last = max(stall, now - last), now
+                    pending = max(pending, ui.output_buffer.pending())
+                return pending, stall
+
+            start = time.perf_counter()
+            threading.Thread(target=produce, args=(f"cat {path}",), daemon=True).start()
+            pending, stall = pump_until_done()
+            drained = run_until_drained(ui, widget)
+            elapsed = time.perf_counter() - start
+
+            # Ctrl-C during an endless flood: time until the command has ended
+            done.clear()
+            threading.Thread(target=produce, args=("yes " + "y" * 78,), daemon=True).start()
+            until = time.perf_counter() + 0.5
+            while time.perf_counter() < until:
+                widget.pump()
+            interrupted = time.perf_counter()
+            session.interrupt()
+            pump_until_done()
+            interrupt_ms = (time.perf_counter() - interrupted) * 1e3
+            run_until_drained(ui, widget)
+            session.close()
+
+            stats = ui.output_buffer.stats()
+            result[mode] = {
+                "seconds": round(elapsed, 4),
+                "mb_per_s": _rate(args.size, elapsed),
+                "drained": drained,
+                "pending_chars_max": int(pending),
+                "main_loop_stall_ms_max": round(stall * 1e3, 2),
+                "interrupt_ms": round(interrupt_ms, 2),
+                "throttled": stats["throttled"],
+                "skipped_chars": stats["skipped_chars"],
+                "dropped_chars": stats["dropped_chars"],
+                "peak_rss_mb": round(peak_rss_bytes() / 1e6, 1),
+            }
+    finally:
+        os.unlink(path)
+    return result
+
+
+def bench_link_scan(args) -> dict:
+    from benchmarks.headless import make_widget, make_ui, run_until_drained
+    from terminal_core.links import find_links, StatCache
+    workdir = tempfile.mkdtemp(prefix="0term-bench-")
+    os.makedirs(os.path.join(workdir, "src"))
+    for name in ("app.py", "util.py"):
+        open(os.path.join(workdir, "src", name), "w").close()
+    templates = (
+        "src/app.py:{0}:5: error: name 'x{0}' is not defined\n",
+        "  File \"src/util.py\", line {0}, in helper\n",
+        "see https://docs.example.com/errors/E{0} for details\n",
+        "compiling module {0} of 1000000 with -O2 -Wall\n",
+        "build/obj/missing_{0}.o: warning: 12:00 no such file\n",
+    )
+    text = "".join(templates[i % len(templates)].format(i) for i in range(args.lines))
+    result = {"lines": args.lines, "chars": len(text)}
+    try:
+        cache = StatCache()
+        start = time.perf_counter()
+        found = find_links(text, workdir, cache)
+        elapsed = time.perf_counter() - start
+        result["find_links"] = {
+            "links": len(found),
+            "seconds": round(elapsed, 4),
+            "mchars_per_s": _rate(len(text), elapsed),
+            "stat_calls": cache.misses,
+        }
+        for mode, detect in (("off", False), ("on", True)):
+            widget = make_widget(args.display)
+            ui = make_ui(widget, detect_links=detect, cwd=workdir)
+            start = time.perf_counter()
+            for offset in range(0, len(text), CHUNK):
+                ui._on_job_output("stdout", text[offset:offset + CHUNK])
+                widget.pump(0)
+            drained = run_until_drained(ui, widget)
+            rendered = time.perf_counter() - start
+            while ui.links is not None and ui.links._pending:
+                widget.pump()
+            drained = run_until_drained(ui, widget) and drained
+            result[mode] = {
+                "widget": type(widget).__name__,
+                "seconds": round(rendered, 4),
+                "mchars_per_s": _rate(len(text), rendered),
+                "links_done_seconds": round(time.perf_counter() - start, 4),
+                "drained": drained,
+                "links_tagged": getattr(widget, "tagged_ranges", None),
+                "links_skipped_chars": ui.links.skipped_chars if ui.links is not None else 0,
+            }
+    finally:
+        import shutil
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def _screen_frames(count: int, lines: int, columns: int) -> list:
+    """Full-screen frames of a top-like app: every row changes, fields in several colors."""
+    frames = []
+    for n in range(count):
+        rows = [f"\x1b[1;37;44m top - frame {n:6d}  load average: {n % 7}.{n % 100:02d} \x1b[K\x1b[0m"]
+        for row in range(1, lines):
+            pid = 1000 + (row * 7919 + n) % 9000
+            cpu = (row * 31 + n * 17) % 1000 / 10
+            name = "コンパイラ" if row % 9 == 0 else f"worker-{row}"
+            color = 31 + (row + n) % 6
+            rows.append(f"\x1b[{color}m{pid:6d}\x1b[0m user  \x1b[1m{cpu:5.1f}\x1b[0m  "
+                        f"{'#' * int(cpu // 10):<10} \x1b[7m{name}\x1b[0m " + "." * (columns - 50))
+        frames.append(("\x1b[H" + "\r\n".join(rows)).encode("utf-8"))
+    return frames
+
+
+def bench_screen_redraw(args) -> dict:
+    from benchmarks.headless import make_widget, make_ui
+    from terminal_core.screen import ScreenModel
+    lines, columns = 50, 160
+    frames = _screen_frames(args.iterations, lines, columns)
+    widget = make_widget("tk")  # both renderers are Tk; there is nothing to compare on a stub
+    widget.root.deiconify()
+    widget.root.geometry("1400x1000")
+    result = {"frames": len(frames), "lines": lines, "columns": columns}
+    try:
+        for mode in ("text", "grid"):
+            widget.delete("1.0", "end")
+            ui = make_ui(widget, screen_renderer=mode)
+            screen = ScreenModel(columns=columns, lines=lines)
+            ui._attach_screen(screen)
+            widget.root.update()
+            samples = []
+            for frame in frames:
+                screen.feed(frame)
+                start = time.perf_counter()
+                ui._render_screen()
+                widget.root.update_idletasks()  # layout and display of the changed rows
+                samples.append((time.perf_counter() - start) * 1000)
+            ui._detach_screen()
+            result[mode] = _percentiles(samples)
+            result[mode]["fps"] = round(1000 / statistics.mean(samples), 1)
+            if ui._cell_grid is not None:
+                result[mode]["items_created"] = ui._cell_grid.items_created
+                result[mode]["items_updated"] = ui._cell_grid.items_updated
+        result["speedup"] = round(result["text"]["mean_ms"] / max(result["grid"]["mean_ms"], 1e-6), 2)
+    finally:
+        widget.destroy()
+    return result
+
+
+def bench_output_cache(args) -> dict:
+    from terminal_core.session import Session
+    from terminal_core.output_cache import OutputCache, CacheRule
+    workdir = tempfile.mkdtemp(prefix="0term-bench-")
+    for i in range(5000):
+        open(os.path.join(workdir, f"file_{i:05d}.txt"), "w").close()
+    cache = OutputCache([CacheRule("ls*")])
+    rule = cache.rule_for("ls -la")
+    run_samples, hit_samples = [], []
+    try:
+        with Session(cwd=workdir) as session:
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                result = session.run("ls -la")
+                run_samples.append((time.perf_counter() - start) * 1000)
+            cache.put(cache.key("ls -la", workdir, rule), [("stdout", result.stdout)], result.returncode)
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                entry = cache.get(cache.key("ls -la", workdir, rule), rule.ttl)
+                hit_samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        import shutil
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "output_chars": len(result.stdout),
+        "shell": _percentiles(run_samples),
+        "cached": _percentiles(hit_samples),
+        "hit": entry is not None,
+        "cache": cache.stats(),
+    }
+
+
+def bench_redirect_rss(args) -> dict:
+    from benchmarks.redirect_rss import run_mode
+    fd, path = tempfile.mkstemp(prefix="0term-bench-")
+    os.close(fd)
+    try:
+        return run_mode("engine", args.size, path)
+    finally:
+        os.unlink(path)
+
+
+BENCHMARKS = {
+    "executor_throughput": bench_executor_throughput,
+    "pty_throughput": bench_pty_throughput,
+    "shell_throughput": bench_shell_throughput,
+    "keystroke_echo": bench_keystroke_echo,
+    "gui_flood": bench_gui_flood,
+    "render_lines": bench_render_lines,
+    "spawn_overhead": bench_spawn_overhead,
+    "redirect_rss": bench_redirect_rss,
+    "sessions": bench_sessions,
+    "scrollback_search": bench_scrollback_search,
+    "replay": bench_replay,
+    "flood_control": bench_flood_control,
+    "link_scan": bench_link_scan,
+    "screen_redraw": bench_screen_redraw,
+    "output_cache": bench_output_cache,
+}
+
+
+# ---------------------------
+# Comparison
+# ---------------------------
+def _numeric_leaves(data, prefix=""):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _numeric_leaves(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix, data
+
+
+def compare(before: dict, after: dict) -> dict:
+    """{metric path: {before, after, change_pct}} for numbers present in both runs."""
+    old = dict(_numeric_leaves(before.get("results", {})))
+    changes = {}
+    for key, value in _numeric_leaves(after.get("results", {})):
+        if key in old:
+            base = old[key]
+            pct = round((value - base) / base * 100, 1) if base else None
+            changes[key] = {"before": base, "after": value, "change_pct": pct}
+    return changes
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_child(args) -> dict:
+    start = time.perf_counter()
+    result = BENCHMARKS[args.child](args)
+    result["wall_seconds"] = round(time.perf_counter() - start, 4)
+    result["peak_rss_mb"] = round(peak_rss_bytes() / 1e6, 1)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="comma-separated benchmark names (default: all)")
+    parser.add_argument("--size", default="64M", help="bytes for throughput/flood benchmarks (suffix K/M/G)")
+    parser.add_argument("--lines", type=int, default=1000000,
+                        help="lines for render_lines, scrollback_search, replay and link_scan")
+    parser.add_argument("--iterations", type=int, default=50, help="samples for latency/spawn benchmarks")
+    parser.add_argument("--sessions", type=int, default=50, help="shells for the sessions benchmark")
+    parser.add_argument("--cast", help="asciicast file for the replay benchmark (default: synthesized)")
+    parser.add_argument("--display", choices=("auto", "tk", "stub"), default="auto",
+                        help="widget for GUI benchmarks")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to diff against")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    args.size = parse_size(args.size)
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks", "--child", name, "--size", str(args.size),
+             "--lines", str(args.lines), "--iterations", str(args.iterations), "--sessions", str(args.sessions),
+             "--display", args.display] + (["--cast", os.path.abspath(args.cast)] if args.cast else []),
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            lines = out.stderr.strip().splitlines()
+            results[name] = {"error": lines[-1] if lines else f"exit status {out.returncode}"}
+        else:
+            results[name] = json.loads(out.stdout)
+
+    report = {
+        "suite": "0term",
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"size": args.size, "lines": args.lines, "iterations": args.iterations,
+                   "sessions": args.sessions, "display": args.display, "cast": args.cast},
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare(json.load(f), report)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
@@ -0,0 +1,267 @@
+# gui/cell_grid.py
+"""
+Fixed-cell grid renderer for full-screen PTY applications.
+
+The Text widget lays out every changed line itself (word wrap, per-glyph
+measurement), which is most of the cost of redrawing a full-screen app, and
+it knows nothing about terminal cells, so wide characters (CJK, emoji) push
+the rest of their row out of line. CellGrid draws the pyte screen model on a
+tk.Canvas placed over the text widget instead:
+
+- CellMetrics measures the font once: the cell size, and per character
+  whether its glyph is exactly as wide as its cells (the screen model already
+  gives wide characters two cells, by wcwidth).
+- Each run of same-style cells on a row is one canvas text item; a character
+  that does not fill its cells exactly (wide, or drawn from a fallback font)
+  gets an item of its own at its cell, so nothing after it shifts.
+- Row items are kept and only reconfigured when their text, color or position
+  changed; items a row no longer needs are hidden, never deleted.
+"""
+import tkinter as tk
+from itertools import groupby
+from operator import itemgetter
+from tkinter import font as tkfont
+
+from terminal_core.ansi import ANSI_PALETTE
+
+# pyte color names -> ANSI palette index (other colors come as "rrggbb")
+_NAMED_COLORS = {
+    name: index
+    for index, name in enumerate(("black", "red", "green", "brown", "blue", "magenta", "cyan", "white"))
+}
+_NAMED_COLORS.update({"bright" + name: index + 8 for name, index in list(_NAMED_COLORS.items())})
+
+_PRINTABLE_ASCII = [chr(c) for c in range(0x20, 0x7f)]
+_REGULAR = (False, False, False, False)  # (bold, italic, underline, overstrike)
+# Every pyte Char field but the data: fg, bg, bold, italics, underscore, strikethrough, reverse, blink
+_STYLE = itemgetter(1, 2, 3, 4, 5, 6, 7, 8)
+
+
+class CellMetrics:
+    """Cell size of a font and, per character, whether its glyph fills whole cells."""
+
+    def __init__(self, family: str, size: int):
+        self.family = family
+        self.size = size
+        self._fonts = {}  # (bold, italic, underline, overstrike) -> tkfont.Font
+        self._fits = {}  # (char, bold, italic) -> bool
+        self.ascii_fits = True  # every printable ASCII glyph is one cell wide (monospace)
+        self._measure()
+
+    def font(self, key: tuple = _REGULAR):
+        f = self._fonts.get(key)
+        if f is None:
+            bold, italic, underline, overstrike = key
+            f = tkfont.Font(family=self.family, size=self.size, weight="bold" if bold else "normal",
+                            slant="italic" if italic else "roman", underline=underline, overstrike=overstrike)
+            self._fonts[key] = f
+        return f
+
+    def _measure(self):
+        regular = self.font()
+        self.cell_width = max(1, regular.measure("0"))
+        self.cell_height = max(1, regular.metrics("linespace"))
+        self._fits.clear()
+        self.ascii_fits = all(self.fits(c, 1, bold, False) for bold in (False, True) for c in _PRINTABLE_ASCII)
+
+    def fits(self, char: str, width: int, bold: bool, italic: bool) -> bool:
+        key = (char, bold, italic)
+        fits = self._fits.get(key)
+        if fits is None:
+            measured = self.font((bold, italic, False, False)).measure(char)
+            fits = self._fits[key] = measured == width * self.cell_width
+        return fits
+
+    def set_font(self, family: str, size: int):
+        """New font: the cached fonts are changed in place and everything is measured again."""
+        self.family, self.size = family, size
+        for f in self._fonts.values():
+            f.configure(family=family, size=size)
+        self._measure()
+
+
+class CellGrid:
+    """
+    Canvas showing a ScreenModel. draw() takes the screen's take_dirty_cells()
+    and cursor(); show() / hide() place the canvas over / off the text widget.
+    Main thread only.
+    """
+
+    def __init__(self, parent, metrics: CellMetrics, foreground: str, background: str, cursor: str,
+                 pad_x: int = 0, pad_y: int = 0):
+        self.parent = parent
+        self.metrics = metrics
+        self.foreground = foreground
+        self.background = background
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+        self.canvas = tk.Canvas(parent, bg=background, highlightthickness=0, borderwidth=0)
+        # Keystrokes keep going to the text widget, which forwards them to the app
+        self.canvas.bind("<Button-1>", lambda event: parent.focus_set())
+        self._cursor = self.canvas.create_rectangle(0, 0, 0, 0, outline=cursor, state="hidden")
+        self._rows = {}  # row -> ([text items], [background items])
+        self._state = {}  # item -> its current spec tuple, None while hidden
+        self._colors = {}  # pyte color -> "#rrggbb"
+        self.items_created = 0
+        self.items_updated = 0
+
+    def show(self):
+        self.canvas.place(x=0, y=0, relwidth=1.0, relheight=1.0)
+
+    def hide(self):
+        self.canvas.place_forget()
+
+    def set_colors(self, foreground: str, background: str, cursor: str):
+        """New theme; the caller redraws every row (ScreenModel.invalidate())."""
+        self.foreground = foreground
+        self.background = background
+        self.canvas.configure(bg=background)
+        self.canvas.itemconfigure(self._cursor, outline=cursor)
+
+    def resize(self, lines: int):
+        """Hide the rows beyond `lines`; the others are redrawn by the next draw()."""
+        for row, (texts, rects) in self._rows.items():
+            if row >= lines:
+                self._hide(texts)
+                self._hide(rects)
+
+    # ---------------------------
+    # Drawing
+    # ---------------------------
+    def draw(self, rows: dict, cursor):
+        """Redraw the given rows ({row: [Char]}) and move the cursor to (row, column)."""
+        for y, cells in rows.items():
+            texts, rects = self._row_runs(cells)
+            self._draw_row(y, texts, rects)
+        row, column = cursor
+        cw, ch = self.metrics.cell_width, self.metrics.cell_height
+        x, y = self.pad_x + column * cw, self.pad_y + row * ch
+        self.canvas.coords(self._cursor, x, y, x + cw - 1, y + ch - 1)
+        if self._state.get(self._cursor) is None:
+            self.canvas.itemconfigure(self._cursor, state="normal")
+            self._state[self._cursor] = True
+        self.canvas.tag_raise(self._cursor)
+
+    def _color(self, color: str, default):
+        if color == "default":
+            return default
+        resolved = self._colors.get(color)
+        if resolved is None:
+            index = _NAMED_COLORS.get(color)
+            if index is not None:
+                resolved = ANSI_PALETTE[index]
+            elif len(color) == 6:
+                resolved = "#" + color
+            else:
+                return default
+            self._colors[color] = resolved
+        return resolved
+
+    def _row_runs(self, cells) -> tuple:
+        """
+        ([(column, text, fill, font key)], [(start, end, fill)]) for one row:
+        text items for runs of same-style cells, background rectangles for
+        cells that do not use the default background.
+        """
+        texts, rects = [], []
+        metrics = self.metrics
+        columns = len(cells)
+        x = 0
+        for style, group in groupby(cells, _STYLE):
+            group = list(group)
+            count = len(group)
+            text = "".join([cell.data for cell in group])
+            if len(text) == count and metrics.ascii_fits and text.isascii():
+                # the common case: one character per cell, all of them one cell wide
+                self._add_run(texts, rects, x, x + count, text, style)
+                x += count
+                continue
+            run, start = [], x
+            for cell in group:
+                data = cell.data
+                if data:  # "" is the right half of a wide character
+                    width = 2 if x + 1 < columns and not cells[x + 1].data else 1
+                    if width == 2 or not ((data <= "~" and metrics.ascii_fits)
+                                          or metrics.fits(data, width, cell.bold, cell.italics)):
+                        # drawn on its own at its cell, so nothing after it shifts
+                        if run:
+                            self._add_run(texts, rects, start, x, "".join(run), style)
+                        self._add_run(texts, rects, x, x + width, data, style)
+                        run, start = [], x + width
+                    else:
+                        run.append(data)
+                x += 1
+            if run:
+                self._add_run(texts, rects, start, x, "".join(run), style)
+        return texts, rects
+
+    def _add_run(self, texts, rects, start, end, text, style):
+        fg, bg, bold, italics, underscore, strikethrough, reverse, _blink = style
+        fg = self._color(fg, self.foreground)
+        bg = self._color(bg, None)
+        if reverse:
+            fg, bg = bg or self.background, fg
+        if bg is not None:
+            if rects and rects[-1][1] == start and rects[-1][2] == bg:
+                rects[-1] = (rects[-1][0], end, bg)
+            else:
+                rects.append((start, end, bg))
+        if not (underscore or strikethrough):
+            text = text.rstrip()  # trailing blanks draw nothing
+            if not text:
+                return
+        texts.append((start, text, fg, (bold, italics, underscore, strikethrough)))
+
+    def _draw_row(self, y: int, texts: list, rects: list):
+        row = self._rows.get(y)
+        if row is None:
+            row = self._rows[y] = ([], [])
+        text_items, rect_items = row
+        canvas, state = self.canvas, self._state
+        cw, ch = self.metrics.cell_width, self.metrics.cell_height
+        top = self.pad_y + y * ch
+
+        for i, (start, end, fill) in enumerate(rects):
+            spec = (self.pad_x + start * cw, top, self.pad_x + end * cw, top + ch, fill)
+            if i == len(rect_items):
+                item = canvas.create_rectangle(*spec[:4], fill=fill, outline="")
+                canvas.tag_lower(item)
+                rect_items.append(item)
+                self.items_created += 1
+            else:
+                item = rect_items[i]
+                old = state.get(item)
+                if old == spec:
+                    continue
+                if old is None or old[:4] != spec[:4]:
+                    canvas.coords(item, *spec[:4])
+                canvas.itemconfigure(item, fill=fill, state="normal")
+                self.items_updated += 1
+            state[item] = spec
+        self._hide(rect_items[len(rects):])
+
+        for i, (start, text, fill, font_key) in enumerate(texts):
+            spec = (self.pad_x + start * cw, top, text, fill, font_key)
+            if i == len(text_items):
+                item = canvas.create_text(spec[0], top, text=text, fill=fill, anchor="nw",
+                                          font=self.metrics.font(font_key))
+                text_items.append(item)
+                self.items_created += 1
+            else:
+                item = text_items[i]
+                old = state.get(item)
+                if old == spec:
+                    continue
+                if old is None or old[:2] != spec[:2]:
+                    canvas.coords(item, spec[0], top)
+                canvas.itemconfigure(item, text=text, fill=fill, font=self.metrics.font(font_key), state="normal")
+                self.items_updated += 1
+            state[item] = spec
+        self._hide(text_items[len(texts):])
+
+    def _hide(self, items):
+        state = self._state
+        for item in items:
+            if state.get(item) is not None:
+                self.canvas.itemconfigure(item, state="hidden")
+                state[item] = None
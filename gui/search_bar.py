@@ -0,0 +1,110 @@
+# gui/search_bar.py
+"""
+Scrollback find bar (Ctrl-Shift-F).
+
+A strip under the terminal widget with the query entry, match-case ("Aa";
+off means smart case) and regex (".*") toggles and the match count. The pane does the searching: on_change() is
+called once typing pauses for `debounce_ms`, on_step(forward) for
+Return / Shift-Return / Down / Up, on_close() for Escape.
+"""
+import tkinter as tk
+
+
+class SearchBar(tk.Frame):
+    def __init__(self, parent, on_change, on_step, on_close, debounce_ms: int = 150,
+                 bg: str = "#000000", fg: str = "#ffffff", font=None):
+        super().__init__(parent, bg=bg, padx=6, pady=3)
+        self.on_change = on_change
+        self.on_step = on_step
+        self.on_close = on_close
+        self.debounce_ms = debounce_ms
+        self._after_id = None
+        self._last = None  # (query, regex, case) of the last on_change
+
+        self.regex_var = tk.BooleanVar(self, False)
+        self.case_var = tk.BooleanVar(self, False)
+        options = dict(bg=bg, fg=fg, font=font, selectcolor=bg, activebackground=bg, activeforeground=fg,
+                       highlightthickness=0, command=self._changed)
+        tk.Label(self, text="Find:", bg=bg, fg=fg, font=font).pack(side=tk.LEFT)
+        self.entry = tk.Entry(self, bg=bg, fg=fg, insertbackground=fg, font=font, relief=tk.FLAT)
+        self.entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=6)
+        tk.Checkbutton(self, text="Aa", variable=self.case_var, **options).pack(side=tk.LEFT)
+        tk.Checkbutton(self, text=".*", variable=self.regex_var, **options).pack(side=tk.LEFT)
+        self.status = tk.Label(self, bg=bg, fg=fg, font=font, width=16, anchor="e")
+        self.status.pack(side=tk.LEFT)
+
+        self.entry.bind("<KeyRelease>", lambda event: self._changed())
+        self.entry.bind("<Return>", lambda event: self._step(True))
+        self.entry.bind("<Down>", lambda event: self._step(True))
+        self.entry.bind("<Shift-Return>", lambda event: self._step(False))
+        self.entry.bind("<Up>", lambda event: self._step(False))
+        self.entry.bind("<Escape>", lambda event: self.on_close() or "break")
+
+    @property
+    def query(self) -> str:
+        return self.entry.get()
+
+    @property
+    def regex(self) -> bool:
+        return self.regex_var.get()
+
+    @property
+    def case_sensitive(self) -> bool:
+        return self.case_var.get()
+
+    @property
+    def shown(self) -> bool:
+        return self.winfo_manager() != ""
+
+    def show(self, before):
+        """Pack under the terminal widget (`before`: the widget that fills the pane) and focus."""
+        if not self.shown:
+            self.pack(side=tk.BOTTOM, fill=tk.X, before=before)
+        self.entry.focus_set()
+        self.entry.select_range(0, tk.END)
+        if self.query:
+            self._changed()  # search the previous query again
+
+    def hide(self):
+        self._cancel_pending()
+        self._last = None
+        self.pack_forget()
+
+    def set_colors(self, bg: str, fg: str):
+        self.configure(bg=bg)
+        for child in self.winfo_children():
+            options = {"bg": bg, "fg": fg}
+            if isinstance(child, tk.Checkbutton):
+                options.update(selectcolor=bg, activebackground=bg, activeforeground=fg)
+            elif isinstance(child, tk.Entry):
+                options["insertbackground"] = fg
+            child.configure(**options)
+
+    def set_status(self, text: str):
+        try:
+            self.status.configure(text=text)
+        except tk.TclError:
+            pass
+
+    def _changed(self):
+        self._cancel_pending()
+        self._after_id = self.after(self.debounce_ms, self._fire)
+
+    def _fire(self):
+        self._after_id = None
+        current = (self.query, self.regex, self.case_sensitive)
+        if current != self._last:
+            self._last = current
+            self.on_change()
+
+    def _step(self, forward: bool):
+        if self._after_id is not None:
+            self._cancel_pending()
+            self._fire()  # search what was typed before stepping
+        self.on_step(forward)
+        return "break"
+
+    def _cancel_pending(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
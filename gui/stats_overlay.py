@@ -0,0 +1,55 @@
+# gui/stats_overlay.py
+"""
+Live instrumentation overlay (F12 / `:stats`).
+
+A label placed over the top-right corner of the terminal widget shows the
+terminal_core.metrics counters and histograms plus runtime lines supplied by
+the UI (output buffer, Tk queue depth...), refreshed every `interval_ms`.
+Collection is enabled only while the overlay is shown.
+"""
+import tkinter as tk
+
+
+class StatsOverlay:
+    def __init__(self, parent, stats, extra_lines=None, interval_ms: int = 500,
+                 bg: str = "#000000", fg: str = "#ffffff", font=None):
+        self.parent = parent
+        self.stats = stats
+        self.extra_lines = extra_lines  # callable returning a list of str
+        self.interval_ms = interval_ms
+        self.label = tk.Label(parent, justify=tk.LEFT, anchor="nw", bg=bg, fg=fg,
+                              font=font, padx=8, pady=6, relief=tk.SOLID, borderwidth=1)
+        self._after_id = None
+
+    @property
+    def visible(self) -> bool:
+        return self._after_id is not None
+
+    def toggle(self):
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def show(self):
+        if self.visible:
+            return
+        self.stats.enable(True)
+        self.label.place(relx=1.0, x=-24, y=8, anchor="ne")
+        self._refresh()
+
+    def hide(self):
+        if self._after_id is not None:
+            self.parent.after_cancel(self._after_id)
+            self._after_id = None
+        self.label.place_forget()
+        self.stats.enable(False)
+
+    def _refresh(self):
+        lines = list(self.extra_lines()) if self.extra_lines is not None else []
+        lines.extend(self.stats.format())
+        try:
+            self.label.configure(text="\n".join(lines))
+            self._after_id = self.parent.after(self.interval_ms, self._refresh)
+        except tk.TclError:
+            self._after_id = None
@@ -0,0 +1,121 @@
+# gui/tag_pool.py
+"""
+Bounded pool of Tk text tags for ANSI styles.
+
+Every distinct terminal_core.ansi.Style gets one Tk tag, configured once and
+reused for all later text in that style, so colorized output costs a dict
+lookup per run instead of tag_names()/tag_config() calls per insert. The pool
+holds at most `max_tags` tags; when it is full, the least recently used tag
+that no longer covers any text (it was trimmed out of the scrollback) is
+recycled. If every tag is still on screen, the style falls back to its base
+tag and the overflow is counted.
+"""
+from tkinter import font as tkfont
+
+from terminal_core.ansi import DEFAULT_STYLE, color_hex
+
+MAX_STYLE_TAGS = 256
+
+
+def _blend(color: str, background: str) -> str:
+    """Halfway between color and background (SGR 2, dim)."""
+    a = [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+    b = [int(background[i:i + 2], 16) for i in (1, 3, 5)]
+    return "#{:02x}{:02x}{:02x}".format(*((x + y) // 2 for x, y in zip(a, b)))
+
+
+class TagPool:
+    def __init__(self, widget, family: str, size: int, foreground: str, background: str,
+                 max_tags: int = MAX_STYLE_TAGS):
+        self.widget = widget
+        self.family = family
+        self.size = size
+        self.foreground = foreground
+        self.background = background
+        self.max_tags = max_tags
+        self._tags = {}  # Style -> tag name (insertion order = LRU order)
+        self._fonts = {}  # (bold, italic) -> tkfont.Font
+        self._next_id = 0
+        self.overflows = 0
+
+    def tag_for(self, style):
+        """Tag name for style, or None if the pool is exhausted (use the base tag)."""
+        if style is DEFAULT_STYLE:
+            return None
+        if style.link is not None:
+            # links are marked by the pane's "link" tag; the rest of the style is shared
+            style = style._replace(link=None)
+            if style == DEFAULT_STYLE:
+                return None
+        tags = self._tags
+        name = tags.get(style)
+        if name is not None:
+            if len(tags) >= self.max_tags:
+                # keep LRU order only once eviction can happen
+                tags[style] = tags.pop(style)
+            return name
+        if len(tags) >= self.max_tags:
+            name = self._recycle()
+            if name is None:
+                self.overflows += 1
+                return None
+        else:
+            name = f"sgr{self._next_id}"
+            self._next_id += 1
+        self._configure(name, style)
+        tags[style] = name
+        return name
+
+    def _recycle(self):
+        for style, name in self._tags.items():
+            if not self.widget.tag_nextrange(name, "1.0"):
+                del self._tags[style]
+                # deleting and recreating puts the tag above older ones again
+                self.widget.tag_delete(name)
+                return name
+        return None
+
+    def _font(self, bold: bool, italic: bool):
+        key = (bold, italic)
+        f = self._fonts.get(key)
+        if f is None:
+            f = tkfont.Font(family=self.family, size=self.size,
+                            weight="bold" if bold else "normal",
+                            slant="italic" if italic else "roman")
+            self._fonts[key] = f
+        return f
+
+    def set_colors(self, foreground: str, background: str):
+        """New default colors: re-configure the tags derived from them (inverse, dim)."""
+        self.foreground = foreground
+        self.background = background
+        for style, name in self._tags.items():
+            if style.inverse or style.dim:
+                self._configure(name, style)
+
+    def set_font(self, family: str, size: int):
+        """New font: the bold/italic fonts are changed in place, so every tag using them follows."""
+        self.family = family
+        self.size = size
+        for f in self._fonts.values():
+            f.configure(family=family, size=size)
+
+    def _configure(self, name: str, style):
+        fg = color_hex(style.fg) if style.fg is not None else None
+        bg = color_hex(style.bg) if style.bg is not None else None
+        if style.inverse:
+            fg, bg = (bg or self.background), (fg or self.foreground)
+        if style.dim:
+            fg = _blend(fg or self.foreground, bg or self.background)
+        options = {}
+        if fg is not None:
+            options["foreground"] = fg
+        if bg is not None:
+            options["background"] = bg
+        if style.bold or style.italic:
+            options["font"] = self._font(style.bold, style.italic)
+        if style.underline:
+            options["underline"] = True
+        if style.strike:
+            options["overstrike"] = True
+        self.widget.tag_config(name, **options)
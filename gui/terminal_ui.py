@@ -3,50 +3,236 @@
 0Term - GUI Terminal Panel with PTY support (English).
 
 Features:
-- PTY-backed TUI applications (nano, vim, top, htop, etc.) on Unix-like systems.
-- Non-TUI commands executed via terminal_core.executor.execute_command_logic.
-- Thread-safe updates to the Tkinter Text widget using .after.
-- Command history (Up/Down), Tab completion, prompt protection (prevent editing before prompt).
+- PTY-backed TUI applications (nano, vim, top, htop, etc.) on Unix-like systems,
+  rendered through a pyte screen model (only dirty rows are redrawn, once per frame),
+  into the text widget or, with `[terminal] renderer = "grid"`, onto a fixed-cell canvas
+  with cached font metrics and reused row items (gui.cell_grid).
+- Non-TUI commands run through a terminal_core.session.Session (the same headless API
+  as `python -m terminal_core`): one persistent bash, so cd, variables, aliases and
+  functions persist, falling back to terminal_core.executor.stream_command.
+- ANSI colors in regular command output: a streaming SGR parser (terminal_core.ansi)
+  splits output into styled runs that map onto a bounded pool of Tk tags (gui.tag_pool).
+- Links: URLs, existing file paths and `file:line` references are detected in newly
+  inserted lines on a worker thread (terminal_core.links, stat() results cached per cwd)
+  and underlined with the next frame, as are OSC 8 hyperlinks; Ctrl-click opens them.
+- Scrollback search (Ctrl-Shift-F) on a worker thread over the LineStore, with
+  next/previous match and highlighting limited to the visible lines (terminal_core.search).
+- Session recording (`:record [FILE]`) to asciicast v2 (.cast, or .cast.gz compressed)
+  and `:replay FILE [SPEED|max]` through the same rendering pipeline (terminal_core.recording).
+- Instrumentation overlay (F12 or `:stats`) with read/decode/insert/frame metrics from
+  terminal_core.metrics; `:profile` and `:tracemalloc` toggle captures dumped to files.
+- Thread-safe, frame-coalesced updates to the Tkinter Text widget: producer threads
+  write into an OutputBuffer which the main thread drains at most FRAME_RATE times/s.
+- Flow control: a command that outputs faster than the widget renders is held back
+  (its pipe/PTY is not read while too much text is pending), so memory stays bounded
+  and Ctrl-C acts at once; `:fastforward` instead renders only the newest screenfuls.
+- Job control: commands run as jobs on bounded workers; trailing `&`, `jobs`, `fg`,
+  `kill %n` and Ctrl-C (SIGINT to the foreground job).
+- Persistent command history (utils.history) with Up/Down and Ctrl-R incremental
+  reverse search, cached asynchronous Tab completion (files and $PATH commands),
+  prompt protection (prevent editing before prompt).
+- Prompt segments (utils.prompt): user, directory, git branch/dirty state, last exit
+  status and duration. Git state is computed on a worker thread and patched into the
+  prompt line in place, so printing a prompt never waits on git.
+- Tabs and split panes (TerminalUI hosts TerminalPane sessions): every pane has its
+  own shell, jobs and scrollback; all shells and PTY apps are read by one shared
+  reactor thread (terminal_core.reactor), and only the panes of the selected tab
+  render — hidden panes accumulate output in their LineStore without touching Tk.
+- Output cache (terminal_core.output_cache): commands matching a [cache] rule (`git status*`,
+  `ls*`) are replayed at once from a previous run with the same cwd, environment and input
+  mtimes, marked as cached and rerun in the background; `:cache` shows hits and misses.
+- Config file (utils.config: config.toml / config.json in the user config dir) for themes,
+  font, geometry, scrollback, TUI apps and performance knobs, polled for changes and
+  applied live: a theme change only reconfigures the existing tags.
+- Fast startup: the window and first prompt come up before the heavy subsystems
+  (pyte screen model, executor, persistent shell, history index, $PATH index), which
+  are imported and initialized on a background thread after the first paint.
 - All user-visible messages are in English.
 
 Save as gui/terminal_ui.py and run via your app entry (e.g. python app.py).
 """
 import os
+import re
 import sys
+import time
+import signal
+import shlex
 import threading
-import pty
-import select
+import contextlib
 import tkinter as tk
+from collections import deque, OrderedDict
+from tkinter import ttk
 from tkinter import scrolledtext
+from itertools import groupby, repeat
 
-from terminal_core.executor import execute_command_logic
-from utils.helpers import get_dynamic_prompt, get_completions, THEMES
+# Only what the first paint needs is imported here (utils.config included: the
+# theme and font come from the config file). The executor, PTY/screen modules,
+# persistent shell and history store are imported in _background_init() (or on
+# first use), keeping subprocess/pty/pyte off the launch path.
+from terminal_core.output_buffer import OutputBuffer
+from terminal_core.jobs import JobManager
+from terminal_core.ansi import SgrParser, DEFAULT_STYLE
+from terminal_core.metrics import STATS, ProfileCapture
+from terminal_core.output_cache import OutputCache, rules_from_config, describe_age
+from utils.config import current as current_settings, set_current as set_current_settings
+from utils.prompt import PromptEngine, PromptContext
+from utils.completion import CompletionService
+from gui.tag_pool import TagPool
+from gui.stats_overlay import StatsOverlay
 
-# TUI-capable programs (will be launched inside a PTY)
-TUI_APPS = ["nano", "vi", "vim", "micro", "top", "htop", "less", "man"]
+# Output pipeline: max widget updates per second and text inserted per update
+FRAME_RATE = 60
+MAX_CHARS_PER_FRAME = 256 * 1024
+# Hidden panes (tab not selected): output is moved off the buffer this many times/s,
+# and the newest HIDDEN_KEEP_CHARS stay styled for when the pane is shown again
+HIDDEN_FRAME_RATE = 4
+HIDDEN_KEEP_CHARS = MAX_CHARS_PER_FRAME
+# Screenfuls of a flood kept by `:fastforward on` (the rest is skipped, not rendered)
+FAST_FORWARD_SCREENS = 3
+# Bytes a PTY app may write between two frames; above this its PTY is not read
+# (the reactor stops feeding the screen model) until the next frame has rendered
+SCREEN_HIGH_WATER = 256 * 1024
+# How often the UI collects matches while a scrollback search runs
+FIND_POLL_MS = 50
+# Detected links remembered for Ctrl-click (older ones stay underlined but do nothing)
+MAX_LINK_TARGETS = 10000
+# How often the window checks the config file for changes (one stat() each time)
+CONFIG_POLL_MS = 1000
 
-class TerminalUI(tk.Tk):
-    def __init__(self, theme_name: str = "Dark"):
-        super().__init__()
-        self.title("0Term")
-        self.geometry("900x600")
+# Tab completion: candidates listed at most (the rest is summarized)
+MAX_COMPLETIONS_SHOWN = 200
+
+# Built-ins offered by command-name completion besides $PATH executables
+BUILTIN_COMMANDS = ["cd", "clear", "cls", "exit", "fg", "jobs", "kill"]
+
+# Job control: background jobs running at the same time (more are queued)
+MAX_BACKGROUND_JOBS = 4
+
+# Scrollback: lines kept in the Text widget; trimmed from the top in batches
+SCROLLBACK_LINES = 10000
+SCROLLBACK_TRIM_BATCH = 500
+# Virtualized scrollback: full history lives in a LineStore, the widget only
+# materializes the last VIRTUAL_WINDOW_LINES (more when scrolled to the top)
+VIRTUAL_SCROLLBACK = False
+VIRTUAL_HISTORY_LINES = 1000000
+VIRTUAL_WINDOW_LINES = 2000
+
+# Output characters that move the cursor back on the last line instead of appending
+_OVERWRITE_SPLIT = re.compile("([\r\b\n])")
+
+
+def _cell_runs(cells) -> list:
+    """Text.insert arguments for (char, tag) cells: one text/tag pair per run of equal tags."""
+    args = []
+    for tag, run in groupby(cells, key=lambda cell: cell[1]):
+        args.append("".join(char for char, _ in run))
+        args.append(tag)
+    return args
+
+
+def _cache_rules(settings) -> list:
+    """CacheRules from the [cache] section of settings."""
+    return rules_from_config(settings.cache_commands, settings.cache_ttl, settings.cache_env,
+                             settings.cache_inputs)
+
+def _parse_signal(name: str) -> int:
+    """'9' / 'KILL' / 'SIGKILL' -> signal number. Raises ValueError."""
+    if name.isdigit():
+        return int(name)
+    name = name.upper()
+    if not name.startswith("SIG"):
+        name = "SIG" + name
+    try:
+        return int(signal.Signals[name])
+    except KeyError:
+        raise ValueError(name)
+
+def _open_externally(target: str):
+    """Open a file or directory with the desktop's default application. Returns an error message or None."""
+    import subprocess
+    try:
+        if sys.platform.startswith("win"):
+            os.startfile(target)
+        else:
+            opener = "open" if sys.platform == "darwin" else "xdg-open"
+            subprocess.Popen([opener, target], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, start_new_session=True)
+    except OSError as e:
+        return str(e)
+    return None
+
+class TerminalPane(tk.Frame):
+    """
+    One terminal session (a tab or split pane of TerminalUI): text widget,
+    persistent shell, jobs and output pipeline.
+
+    completer, prompt_engine and history_source (a callable returning the
+    HistoryStore) may be shared between panes; whatever is not passed in is
+    created by, and closed with, the pane; so may output_cache (an
+    OutputCache). on_exit(pane) handles `exit`.
+    settings (utils.config.Settings, default: the loaded config) supply the
+    theme, font and performance knobs; theme_name / scrollback_lines override
+    them. apply_settings() switches to reloaded settings live.
+    """
+
+    visible = True  # False while output is not rendered: tab not selected or history view shown
+    _tab_visible = True
+    _history_view = False  # True while the widget shows an earlier window of the LineStore (search)
+
+    def __init__(self, master, theme_name: str = None, scrollback_lines: int = None,
+                 virtual_scrollback: bool = VIRTUAL_SCROLLBACK, startup_profile=None,
+                 completer=None, prompt_engine=None, history_source=None, on_exit=None, settings=None,
+                 output_cache=None):
+        # startup_profile: terminal_core.metrics.StartupProfile to record phases in (app.py --startup-profile)
+        self.startup_profile = startup_profile
+        super().__init__(master)
+        self.settings = settings or current_settings()
 
         # --- Theme ---
-        self.current_theme = THEMES.get(theme_name, THEMES["Dark"])
+        self.theme_name = theme_name  # None: follow the config
+        self.current_theme = self.settings.theme_colors(theme_name)
         self.background_color = self.current_theme["bg"]
         self.text_color = self.current_theme["text"]
         self.error_color = self.current_theme["error"]
         self.cursor_color = self.current_theme["cursor"]
 
-        self.font_family = "Consolas" if sys.platform.startswith("win") else "Monospace"
-        self.font_size = 11
+        self.font_family = self.settings.font_family
+        self.font_size = self.settings.font_size
 
         self.configure(bg=self.background_color)
 
         # --- State ---
-        self.command_history = []
-        self.history_index = None  # None means not currently browsing history
-        self.current_line_start_index = "1.0"
+        self.history = None  # HistoryStore, created by _background_init
+        self._early_history = []  # commands entered before the store was ready
+        # Entries back from the newest while browsing with Up/Down (1 = newest);
+        # None means not currently browsing history
+        self.history_offset = None
+        self._search = None  # Ctrl-R state while a reverse-i-search is active
+        self.cwd = os.getcwd()  # the session's working directory (its shell's, once started)
+        self._history_source = history_source
+        self._on_exit = on_exit
+        self._closed = False
+
+        # --- Prompt ---
+        self._owns_prompt_engine = prompt_engine is None
+        self.prompt_engine = prompt_engine or PromptEngine()
+        self._prompt_serial = 0  # bumped for every printed prompt
+        self._prompt_shown = None  # serial of the prompt currently accepting input
+        self._early_prompt_patch = None  # refreshed text that arrived before its prompt was shown
+        self._last_status = 0
+        self._last_duration = None
+        self._command_started = None
+
+        # --- Session and jobs ---
+        self._shell_input = None  # Session whose running shell command receives keystrokes, if any
+        self._shell_env = None  # the shell's exported environment, until the next command
+        self.session = None  # terminal_core Session, created and started in the background (see _get_session)
+        self._session_lock = threading.Lock()
+        self.jobs = JobManager(max_background=MAX_BACKGROUND_JOBS, on_finish=self._on_job_finished)
+        self._owns_completer = completer is None
+        self.completer = completer or CompletionService(extra_commands=BUILTIN_COMMANDS)
+        self._owns_output_cache = output_cache is None
+        self.output_cache = output_cache or OutputCache(_cache_rules(self.settings), self.settings.cache_max_bytes)
 
         # --- Terminal Text Widget ---
         self.terminal_area = scrolledtext.ScrolledText(
@@ -62,9 +248,23 @@ class TerminalUI(tk.Tk):
             wrap=tk.WORD
         )
         self.terminal_area.pack(fill=tk.BOTH, expand=True)
+        self.terminal_area.configure(yscrollcommand=self._on_yscroll)
 
-        # Initialize tags
-        self._init_tags()
+        self._init_output(scrollback_lines, virtual_scrollback)
+        self._init_links()
+
+        # --- Instrumentation ---
+        self.stats_overlay = StatsOverlay(self.terminal_area, STATS, extra_lines=self._runtime_stat_lines,
+                                          bg=self.background_color, fg=self.text_color,
+                                          font=(self.font_family, self.font_size - 2))
+        self.profiler = ProfileCapture()
+
+        # --- Scrollback search (Ctrl-Shift-F) ---
+        self.search_bar = None  # SearchBar, created on first use
+        self._find = None  # ScrollbackSearch of the current query
+        self._find_current = None  # index of the selected match in _find.matches
+        self._find_poll_id = None
+        self._find_highlight_pending = False
 
         # --- Bindings ---
         # Return "break" for keys we handle so default widget behavior doesn't interfere
@@ -74,53 +274,984 @@ class TerminalUI(tk.Tk):
         self.terminal_area.bind("<Down>", self.navigate_history)
         self.terminal_area.bind("<Key>", self.prevent_deletion_before_prompt)
         self.terminal_area.bind("<Button-1>", self.restrict_cursor_placement)
+        self.terminal_area.bind("<Control-Button-1>", self.open_link_at)
+        self.terminal_area.bind("<Configure>", self.handle_resize)
+        self.terminal_area.bind("<Control-c>", self.handle_interrupt)
+        self.terminal_area.bind("<Control-r>", self.handle_history_search)
+        self.terminal_area.bind("<Control-g>", self.cancel_history_search)
+        self.terminal_area.bind("<F12>", self.toggle_stats)
+        self.terminal_area.bind("<Control-Key-F>", self.open_find)
+        self._startup_mark("widgets and bindings")
 
         # Welcome and prompt
         self.print_initial_messages()
+        self._startup_mark("first prompt queued")
+        # Idle first (Tk paints the window in idle callbacks), then a timer: the
+        # deferred work starts only after the first frame is on screen
+        self.after_idle(lambda: self.after(0, self._after_first_paint))
+
+    # ---------------------------
+    # Deferred initialization
+    # ---------------------------
+    def _startup_mark(self, phase: str):
+        if self.startup_profile is not None:
+            self.startup_profile.mark(phase)
+
+    def _startup_measure(self, phase: str):
+        if self.startup_profile is not None:
+            return self.startup_profile.measure(phase)
+        return contextlib.nullcontext()
+
+    def _after_first_paint(self):
+        self._startup_mark("first paint")
+        threading.Thread(target=self._background_init, name="0term-init", daemon=True).start()
+
+    def _background_init(self):
+        """Import and warm up the heavy subsystems off the main thread."""
+        with self._startup_measure("import executor"):
+            import terminal_core.executor  # noqa: F401  (subprocess, pty, pipeline engine)
+            from terminal_core.capture import set_read_sizes
+            set_read_sizes(self.settings.min_read_size, self.settings.max_read_size)
+        with self._startup_measure("import screen model (pyte)"):
+            try:
+                import terminal_core.screen  # noqa: F401
+            except ImportError:
+                pass  # reported when a TUI app is started
+        with self._startup_measure("history store"):
+            try:
+                if self._history_source is not None:
+                    store = self._history_source()
+                else:
+                    from utils.history import HistoryStore
+                    store = HistoryStore()
+            except Exception:
+                store = None
+        if store is not None:
+            self._call_after_output(lambda: self._install_history(store))
+        with self._startup_measure("$PATH command index"):
+            self.completer.complete("", command_position=True)
+        with self._startup_measure("persistent shell start"):
+            try:
+                self._get_session().start()
+            except Exception:
+                pass  # the first command reports it and falls back
+        if self.startup_profile is not None:
+            self._call_after_output(self._print_startup_profile)
+
+    def _install_history(self, store):
+        """Main thread: switch to the real history store, keeping early commands."""
+        for command in self._early_history:
+            store.add(command)
+        self._early_history = []
+        self.history = store
+
+    def _get_session(self):
+        with self._session_lock:
+            if self.session is None:
+                from terminal_core.session import Session
+                from terminal_core.reactor import get_reactor
+                lines, columns = self._grid_size
+                self.session = Session(cwd=self.cwd, columns=columns, lines=lines, reactor=get_reactor())
+            return self.session
+
+    def _print_startup_profile(self):
+        print(self.startup_profile.report(), file=sys.stderr, flush=True)
+
+    def _init_output(self, scrollback_lines: int = None, virtual_scrollback: bool = False):
+        """
+        State of the output path (buffer, frame timer, TUI screen, scrollback,
+        links, tags), from self.settings, the theme colors, the font and terminal_area.
+        benchmarks/headless.py builds its UI with this too.
+        """
+        # --- Output pipeline ---
+        self.output_buffer = OutputBuffer(max_chars_per_frame=self.settings.max_chars_per_frame)
+        self.frame_interval = 1.0 / self.settings.frame_rate
+        self._last_flush = 0.0
+        self._flush_due = 0.0
+        self.current_line_start_index = "1.0"
+        self._output_ends_with_newline = True
+        self._screen = None  # ScreenModel of the running TUI app, if any
+        self._screen_grid = None  # CellGrid showing _screen (renderer = "grid"), else it renders into the widget
+        self._cell_metrics = None  # CellMetrics of the current font, measured on first use
+        self._cell_grid = None  # CellGrid, created for the first TUI app and kept
+        self._pty_session = None  # PtySession receiving keystrokes, if any
+        self._screen_backlog = 0  # bytes fed to the screen model since the last frame
+        self._grid_size = (24, 80)  # (lines, columns) that fit in the widget
+        # 0: a flooding command is held back to the render rate; N: only its newest N screenfuls render
+        self.fast_forward_screens = self.settings.fast_forward_screens
+        self._update_fast_forward()
+        # Output taken off the buffer while hidden: ("text", runs) / ("call", callback)
+        self._hidden_items = deque()
+        self._hidden_chars = 0
+        self._hidden_deferred = []  # callbacks whose text was pushed out to the LineStore
+        self._hidden_overflow = False
+        self.recorder = None  # AsciicastRecorder while `:record` is on
+
+        # --- Scrollback ---
+        self._fixed_scrollback_lines = scrollback_lines is not None
+        self.scrollback_lines = scrollback_lines or self.settings.scrollback_lines
+        self.scrollback = None
+        if virtual_scrollback:
+            from terminal_core.scrollback import LineStore
+            self.scrollback = LineStore(max_lines=self.settings.history_lines)
+        self._widget_first_line = 0  # absolute LineStore index shown on widget line 1
+
+        # --- Links ---
+        self.detect_links = self.settings.detect_links
+        self.links = None  # terminal_core.links.LinkDetector, created with the first output
+        self._link_epoch = 0  # bumped when the widget content is replaced; older results are dropped
+        self._link_carry = None  # (absolute line, column, text) of the unfinished last line
+        self._overwrite_col = None  # column output continues at after \r or \b; None: end of line
+        self._link_targets = OrderedDict()  # (absolute line, start column) -> Link
+
+        # --- Tags ---
+        self._init_tags()
+        self.tag_pool = TagPool(self.terminal_area, self.font_family, self.font_size,
+                                self.text_color, self.background_color)
+        # One parser per stream of the foreground job (stderr keeps the error color as base)
+        self._sgr_parsers = {"stdout": SgrParser(), "stderr": SgrParser()}
 
     # ---------------------------
     # Tag/Color helpers
     # ---------------------------
     def _init_tags(self):
-        # default
-        if "default" not in self.terminal_area.tag_names():
-            self.terminal_area.tag_config("default", foreground=self.text_color)
-        # error
-        if "error" not in self.terminal_area.tag_names():
-            self.terminal_area.tag_config("error", foreground=self.error_color)
-        # info (optional)
-        if "info" not in self.terminal_area.tag_names():
-            self.terminal_area.tag_config("info", foreground=self.text_color)
+        # Named tags configured so far; checked instead of tag_names() on every insert
+        self._configured_tags = set()
+        self._configure_tag("default")
+        self._configure_tag("error")
+        self._configure_tag("info")
+
+    def _configure_tag(self, tag: str):
+        self.terminal_area.tag_config(tag, foreground=(self.error_color if tag == "error" else self.text_color))
+        self._configured_tags.add(tag)
 
     # ---------------------------
     # Thread-safe append functions
     # ---------------------------
     def _append_text_safe(self, text: str, tag: str = "default", newline: bool = True):
         """
-        Schedule appending text on the main thread. Keep widget in NORMAL state so user can type.
+        Queue text for the next frame. Safe to call from any thread; the widget
+        itself is only touched by _flush_output on the main thread.
         """
         if newline and text and not text.endswith("\n"):
             text = text + "\n"
-        # Schedule insertion on main thread
-        self.terminal_area.after(0, lambda: self._append_text_now(text, tag))
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.output(text, translate_newlines=True)
+        if self.output_buffer.write(text, tag):
+            self._wake_flush()
+
+    def _call_after_output(self, callback):
+        """Run callback on the main thread once all previously queued text is inserted."""
+        if self.output_buffer.call_soon(callback):
+            self._wake_flush()
+
+    def _wake_flush(self):
+        # Only called when the buffer goes from idle to armed, i.e. once per frame at most.
+        delay = 0 if self.visible else 1.0 / HIDDEN_FRAME_RATE
+        try:
+            self._flush_due = time.monotonic() + delay
+            self.terminal_area.after(int(delay * 1000), self._flush_output)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _flush_output(self):
+        """
+        Frame tick (main thread): drain the buffer into one coalesced insert and one
+        scroll, then reschedule itself while output keeps arriving.
+        """
+        if not self.visible:
+            self._absorb_hidden()
+            self._release_screen_backlog()
+            if self.output_buffer.finish_frame():
+                self._schedule_flush(1.0 / HIDDEN_FRAME_RATE)
+            return
+        now = time.monotonic()
+        wait = self.frame_interval - (now - self._last_flush)
+        if wait > 0:
+            self._schedule_flush(wait)
+            return
+
+        late = now - self._flush_due
+        if late > self.frame_interval:
+            self.output_buffer.dropped_frames += int(late / self.frame_interval)
+        self._last_flush = now
+        if STATS.enabled:
+            STATS.histogram("gui.frame_late").observe(max(0.0, late))
+            STATS.gauge("output.pending_chars").set(self.output_buffer.pending())
+
+        # Only follow the output if the user has not scrolled away from the bottom
+        follow = self._at_bottom()
+        inserted = False
+        for kind, payload in self.output_buffer.drain():
+            if kind == "text":
+                self._append_text_now(payload, scroll=False)
+                inserted = True
+            else:
+                payload()
+        if inserted:
+            self._trim_scrollback()
+        if self._screen is not None:
+            self._render_screen()
+        self._release_screen_backlog()
+        if self._screen is None and inserted and follow:
+            try:
+                self.terminal_area.see(tk.END)
+            except tk.TclError:
+                pass
+
+        if STATS.enabled:
+            STATS.histogram("gui.frame").observe(time.monotonic() - now)
+        if self.output_buffer.finish_frame():
+            self._schedule_flush(self.frame_interval)
 
-    def _append_text_now(self, text: str, tag: str = "default"):
+    def _release_screen_backlog(self):
+        """A frame took the screen model's changes: read the PTY app's output again."""
+        self._screen_backlog = 0
+        session = self._pty_session
+        if session is not None and session.paused:
+            session.resume_reading()
+
+    def _schedule_flush(self, delay: float):
+        self._flush_due = time.monotonic() + delay
+        try:
+            self.terminal_area.after(max(1, int(delay * 1000)), self._flush_output)
+        except tk.TclError:
+            pass
+
+    def _append_text_now(self, runs, scroll: bool = True):
         """
-        Insert text at the end of the Text widget. Runs on main thread.
+        Insert a list of (text, tag) runs at the end of the Text widget with a
+        single multi-segment insert. Runs on main thread.
+
+        tag is a tag name, or (base tag name, Style) for ANSI-styled output.
         """
-        if tag not in self.terminal_area.tag_names():
-            # fallback if someone passed a custom tag
-            self.terminal_area.tag_config(tag, foreground=(self.error_color if tag == "error" else self.text_color))
+        started = time.perf_counter() if STATS.enabled else 0.0
+        args = []
+        if self.scrollback is not None:
+            for text, _ in runs:
+                self.scrollback.append(text)
+        configured = self._configured_tags
+        hyperlinks = None  # (offset, length, uri) of OSC 8 runs
+        offset = 0
+        for text, tag in runs:
+            if tag.__class__ is tuple:
+                base, style = tag
+                if style.link is not None:
+                    if hyperlinks is None:
+                        hyperlinks = []
+                    hyperlinks.append((offset, len(text), style.link))
+                name = self.tag_pool.tag_for(style)
+                tag = (base, name) if name is not None else base
+            elif tag not in configured:
+                # fallback if someone passed a custom tag
+                self._configure_tag(tag)
+            offset += len(text)
+            args.append(text)
+            args.append(tag)
 
-        # Insert and keep view scrolled to end.
+        inserted = "".join(args[::2])
+        if self._overwrite_col is not None or "\r" in inserted or "\b" in inserted:
+            self._insert_overwriting(args)
+            if scroll:
+                try:
+                    self.terminal_area.see(tk.END)
+                except tk.TclError:
+                    pass
+            if started:
+                STATS.histogram("gui.insert").observe(time.perf_counter() - started)
+            return
         try:
+            start = self.terminal_area.index("end-1c") if self.detect_links or hyperlinks else None
             # Ensure widget is writable (we keep it writable by design)
-            self.terminal_area.insert(tk.END, text, tag)
-            self.terminal_area.see(tk.END)
+            self.terminal_area.insert(tk.END, *args)
+            if scroll:
+                self.terminal_area.see(tk.END)
         except tk.TclError:
             # In very rare cases, widget may be destroyed — ignore
+            start = None
+        if start is not None:
+            if hyperlinks:
+                self._add_hyperlinks(start, inserted, hyperlinks)
+            if self.detect_links:
+                self._scan_links(start, inserted)
+        if started:
+            STATS.histogram("gui.insert").observe(time.perf_counter() - started)
+            STATS.counter("gui.inserted_chars").add(len(inserted))
+
+    def _insert_overwriting(self, args):
+        """
+        Slow path of _append_text_now for output with carriage returns or
+        backspaces: like a terminal, \\r moves back to the start of the last line
+        and \\b one column left, and the text after them overwrites what is
+        there (progress bars, spinners, tty echo of erased characters).
+        Each line is resolved here first; the widget then gets one replace per
+        changed stretch of its last line and a single insert for the rest.
+        OSC 8 hyperlinks are not tagged on this path.
+        """
+        area = self.terminal_area
+        try:
+            row, length = map(int, area.index("end-1c").split("."))
+        except tk.TclError:
+            return
+        column = length if self._overwrite_col is None else min(self._overwrite_col, length)
+        # (char, tag) per column of the line being written; None: as the widget has it
+        cells = [None] * length
+        last_line = None  # cells of the widget's last line, once output moved past it
+        appended = []  # cells of the lines after it, newlines included
+        for i in range(0, len(args), 2):
+            tag = args[i + 1]
+            for piece in _OVERWRITE_SPLIT.split(args[i]):
+                if piece == "\r":
+                    column = 0
+                elif piece == "\b":
+                    column = max(0, column - 1)
+                elif piece == "\n":
+                    if last_line is None:
+                        last_line = cells
+                    else:
+                        appended += cells
+                    appended.append(("\n", tag))
+                    cells, column = [], 0
+                elif piece:
+                    cells[column:column + len(piece)] = zip(piece, repeat(tag))
+                    column += len(piece)
+        if last_line is None:
+            last_line = cells
+        else:
+            appended += cells
+        self._overwrite_col = column if column < len(cells) else None
+
+        try:
+            start = 0
+            while start < length:
+                if last_line[start] is None:
+                    start += 1
+                    continue
+                end = start + 1
+                while end < length and last_line[end] is not None:
+                    end += 1
+                area.replace(f"{row}.{start}", f"{row}.{end}", *_cell_runs(last_line[start:end]))
+                start = end
+            appended[:0] = last_line[length:]
+            if appended:
+                area.insert(tk.END, *_cell_runs(appended))
+        except tk.TclError:
+            return
+        if self.detect_links:
+            # the first line changed in place: scan it again from its start
+            self._link_carry = None
+            try:
+                text = area.get(f"{row}.0", "end-1c")
+            except tk.TclError:
+                return
+            self._scan_links(f"{row}.0", text)
+
+    # ---------------------------
+    # Scrollback management
+    # ---------------------------
+    def _at_bottom(self) -> bool:
+        try:
+            return self.terminal_area.yview()[1] >= 0.999
+        except tk.TclError:
+            return True
+
+    def _line_of(self, index: str) -> int:
+        return int(self.terminal_area.index(index).split(".")[0])
+
+    def _trim_scrollback(self):
+        """
+        Delete whole lines from the top once the widget holds more than its
+        budget plus one batch, so trimming happens rarely and in bulk. A view
+        scrolled away from the bottom stays on the same text.
+        """
+        limit = VIRTUAL_WINDOW_LINES if self.scrollback is not None else self.scrollback_lines
+        try:
+            last = self._line_of("end-1c")
+            if last <= limit + SCROLLBACK_TRIM_BATCH:
+                return
+            excess = last - limit
+            if self._screen is not None:
+                # never cut into the live TUI screen
+                excess = min(excess, self._line_of("screen_top") - 1)
+            if excess > 0:
+                top = None if self._at_bottom() else self._line_of("@0,0")
+                self._delete_top_lines(excess)
+                if top is not None:
+                    self.terminal_area.yview(f"{max(1, top - excess)}.0")
+        except tk.TclError:
+            pass
+
+    def _delete_top_lines(self, count: int):
+        """Remove `count` lines from the top and keep the input index pointing at the same text."""
+        self.terminal_area.delete("1.0", f"{count + 1}.0")
+        line, col = self.current_line_start_index.split(".")
+        line = int(line) - count
+        self.current_line_start_index = f"{line}.{col}" if line >= 1 else "1.0"
+        self._widget_first_line += count
+
+    def _on_yscroll(self, first, last):
+        """
+        yscrollcommand: update the scrollbar and the search highlights and, in
+        virtualized mode, pull earlier lines out of the LineStore when the view
+        reaches the top of what is materialized.
+        """
+        self.terminal_area.vbar.set(first, last)
+        if self._find is not None and not self._find_highlight_pending:
+            self._find_highlight_pending = True
+            self.terminal_area.after_idle(self._highlight_find)
+        if (self.scrollback is not None and float(first) <= 0.0
+                and self._widget_first_line > self.scrollback.first):
+            self.terminal_area.after_idle(self._materialize_earlier)
+
+    def _materialize_earlier(self):
+        store = self.scrollback
+        start = max(store.first, self._widget_first_line - VIRTUAL_WINDOW_LINES)
+        lines = store.lines(start, self._widget_first_line)
+        if not lines:
+            return
+        count = len(lines)
+        try:
+            self.terminal_area.insert("1.0", "\n".join(lines) + "\n", "default")
+            self.terminal_area.see(f"{count + 1}.0")
+        except tk.TclError:
+            return
+        line, col = self.current_line_start_index.split(".")
+        self.current_line_start_index = f"{int(line) + count}.{col}"
+        self._widget_first_line = start
+        if self.detect_links:
+            self._get_link_detector().scan("\n".join(lines) + "\n", self.cwd, start, 0, self._link_epoch)
+
+    # ---------------------------
+    # Links (URLs, file paths, OSC 8 hyperlinks)
+    # ---------------------------
+    def _init_links(self):
+        self._text_cursor = self.terminal_area.cget("cursor")
+        self.terminal_area.tag_config("link", underline=True)
+        self.terminal_area.tag_bind("link", "<Enter>", lambda event: self.terminal_area.configure(cursor="hand2"))
+        self.terminal_area.tag_bind("link", "<Leave>",
+                                    lambda event: self.terminal_area.configure(cursor=self._text_cursor))
+
+    def _get_link_detector(self):
+        if self.links is None:
+            from terminal_core.links import LinkDetector
+            self.links = LinkDetector(self._on_links)
+        return self.links
+
+    def _scan_links(self, start: str, text: str):
+        """
+        Main thread: queue text just inserted at widget index `start` for link
+        detection on the worker. Only complete lines are scanned; an unfinished
+        last line is carried over to the insert that continues it.
+        """
+        from terminal_core.links import MAX_LINE_CHARS
+        detector = self._get_link_detector()
+        row, column = map(int, start.split("."))
+        line = self._widget_first_line + row - 1
+        carry, self._link_carry = self._link_carry, None
+        if carry is not None and carry[0] == line and carry[1] + len(carry[2]) == column:
+            line, column, text = carry[0], carry[1], carry[2] + text
+        cut = text.rfind("\n") + 1
+        if len(text) - cut <= MAX_LINE_CHARS:
+            self._link_carry = (line + text.count("\n", 0, cut), column if not cut else 0, text[cut:])
+        if cut:
+            detector.scan(text[:cut], self.cwd, line, column, self._link_epoch)
+
+    def _on_links(self, epoch: int, links: list):
+        # Link worker thread: apply with the next frame
+        self._call_after_output(lambda: self._apply_links(epoch, links))
+
+    def _apply_links(self, epoch: int, links: list):
+        """Main thread: underline detected links that are still in the widget."""
+        if epoch != self._link_epoch:
+            return  # the widget was cleared or rebuilt meanwhile
+        offset = self._widget_first_line - 1
+        ranges = []
+        for link in links:
+            row = link.line - offset
+            if row < 1:
+                continue  # trimmed meanwhile
+            ranges.append(f"{row}.{link.start}")
+            ranges.append(f"{row}.{link.end}")
+            self._remember_link(link)
+        if ranges:
+            try:
+                self.terminal_area.tag_add("link", *ranges)
+            except tk.TclError:
+                pass
+
+    def _add_hyperlinks(self, start: str, text: str, hyperlinks):
+        """Tag OSC 8 runs of `text` (inserted at widget index `start`), given as (offset, length, uri)."""
+        from terminal_core.links import Link
+        row, column = map(int, start.split("."))
+        ranges = []
+        for offset, length, uri in hyperlinks:
+            line_start = text.rfind("\n", 0, offset) + 1
+            link_row = row + text.count("\n", 0, line_start)
+            link_column = offset - line_start + (column if not line_start else 0)
+            # only the first line of a link that spans several is clickable
+            end = text.find("\n", offset, offset + length)
+            width = (end if end >= 0 else offset + length) - offset
+            ranges.append(f"{link_row}.{link_column}")
+            ranges.append(f"{link_row}.{link_column + width}")
+            line = self._widget_first_line + link_row - 1
+            self._remember_link(Link(line, link_column, link_column + width, uri))
+        try:
+            self.terminal_area.tag_add("link", *ranges)
+        except tk.TclError:
+            pass
+
+    def _remember_link(self, link):
+        targets = self._link_targets
+        targets[(link.line, link.start)] = link
+        if len(targets) > MAX_LINK_TARGETS:
+            targets.popitem(last=False)
+
+    def _reset_links(self):
+        """The widget content was replaced: forget its links and results still in flight."""
+        self._link_epoch += 1
+        self._link_carry = None
+        self._overwrite_col = None
+        self._link_targets.clear()
+
+    def open_link_at(self, event):
+        """Ctrl-click: open the link under the pointer (otherwise a plain click)."""
+        try:
+            index = self.terminal_area.index(f"@{event.x},{event.y}")
+            on_link = "link" in self.terminal_area.tag_names(index)
+        except tk.TclError:
+            return "break"
+        if not on_link:
+            return self.restrict_cursor_placement(event)
+        row, column = map(int, index.split("."))
+        line = self._widget_first_line + row - 1
+        for link in reversed(self._link_targets.values()):
+            if link.line == line and link.start <= column < link.end:
+                self._open_link(link)
+                break
+        return "break"
+
+    def _open_link(self, link):
+        """
+        URLs open in the web browser; file:line references in $VISUAL / $EDITOR
+        at that line (run as a command, when the prompt is free); other paths
+        with the desktop's default application.
+        """
+        target = link.target
+        if link.is_url:
+            from urllib.parse import urlsplit, unquote
+            parts = urlsplit(target)
+            if parts.scheme != "file":
+                import webbrowser
+                threading.Thread(target=webbrowser.open, args=(target,), name="0term-browser", daemon=True).start()
+                return
+            target = unquote(parts.path)
+        editor = os.environ.get("VISUAL") or os.environ.get("EDITOR")
+        if (editor and link.file_line is not None and self.jobs.foreground is None
+                and self._pty_session is None and self._search is None and not self._history_view):
+            self._set_input(f"{editor} +{link.file_line} {shlex.quote(target)}")
+            self.handle_input(None)
+            return
+        error = _open_externally(target)
+        if error:
+            self.notify([f"open: {error}"], color="error")
+
+    # ---------------------------
+    # Visibility (tabs)
+    # ---------------------------
+    def set_visible(self, visible: bool):
+        """Called by the window when the pane's tab is selected or deselected."""
+        self._tab_visible = visible
+        self._update_visible()
+
+    def _update_visible(self):
+        visible = self._tab_visible and not self._history_view
+        if visible == self.visible:
+            return
+        self.visible = visible
+        if visible:
+            self._show_hidden_output()
+
+    def _absorb_hidden(self):
+        """
+        Hidden pane (main thread, HIDDEN_FRAME_RATE times/s): take pending output
+        off the buffer without touching the widget. The newest HIDDEN_KEEP_CHARS
+        are kept as styled runs; older text goes straight to the LineStore.
+        """
+        while True:
+            items = self.output_buffer.drain()
+            if not items:
+                break
+            for kind, payload in items:
+                self._hidden_items.append((kind, payload))
+                if kind == "text":
+                    self._hidden_chars += sum(len(text) for text, _ in payload)
+        while self._hidden_chars > HIDDEN_KEEP_CHARS and self._hidden_items:
+            kind, payload = self._hidden_items.popleft()
+            if kind != "text":
+                self._hidden_deferred.append(payload)
+                continue
+            self._hidden_overflow = True
+            for text, _ in payload:
+                self._hidden_chars -= len(text)
+                if self.scrollback is not None:
+                    self.scrollback.append(text)
+                else:
+                    self.output_buffer.dropped_chars += len(text)
+
+    def _show_hidden_output(self):
+        """Pane shown again: render what arrived while it was hidden."""
+        self._absorb_hidden()
+        items, self._hidden_items = self._hidden_items, deque()
+        deferred, self._hidden_deferred = self._hidden_deferred, []
+        self._hidden_chars = 0
+        if self._hidden_overflow:
+            # More than the styled tail arrived: show the LineStore's tail as plain text first
+            self._hidden_overflow = False
+            self._rebuild_from_scrollback()
+            for callback in deferred:
+                callback()
+            self._prompt_shown = None  # its prompt text may not be where the marks say
+        for kind, payload in items:
+            if kind == "text":
+                self._append_text_now(payload, scroll=False)
+            else:
+                payload()
+        self._trim_scrollback()
+        if self._screen is not None:
+            self._render_screen()
+        else:
+            try:
+                self.terminal_area.see(tk.END)
+            except tk.TclError:
+                pass
+
+    def _rebuild_from_scrollback(self):
+        """Replace the widget content with the last VIRTUAL_WINDOW_LINES of the LineStore."""
+        store = self.scrollback
+        if store is None:
+            return
+        start = max(store.first, store.end - VIRTUAL_WINDOW_LINES)
+        lines = store.lines(start, store.end)
+        text = "\n".join(lines) + "\n" if lines else ""
+        try:
+            self.terminal_area.delete("1.0", tk.END)
+            self.terminal_area.insert(tk.END, text + store.tail, "default")
+            self.current_line_start_index = self.terminal_area.index("end-1c")
+        except tk.TclError:
+            return
+        self._widget_first_line = start
+        self._reset_links()
+        if self.detect_links:
+            self._scan_links("1.0", text + store.tail)
+
+    # ---------------------------
+    # Scrollback search (Ctrl-Shift-F)
+    # ---------------------------
+    def open_find(self, event=None):
+        if self._pty_session is not None:
+            return self._forward_key(event) if event is not None else "break"
+        if self.search_bar is None:
+            from gui.search_bar import SearchBar
+            self.search_bar = SearchBar(self, on_change=self._find_changed, on_step=self.find_step,
+                                        on_close=self.close_find, bg=self.background_color, fg=self.text_color,
+                                        font=(self.font_family, self.font_size))
+            self.terminal_area.tag_config("find_match", background="#665c00", foreground="#ffffff")
+            self.terminal_area.tag_config("find_current", background="#ff8c00", foreground="#000000")
+        self.search_bar.show(before=self.terminal_area)
+        return "break"
+
+    def close_find(self):
+        self._cancel_find()
+        self._find_current = None
+        self._clear_find_highlights()
+        if self.search_bar is not None:
+            self.search_bar.hide()
+        self._leave_history_view()
+        self.terminal_area.focus_set()
+
+    def _cancel_find(self):
+        if self._find is not None:
+            self._find.cancel()
+            self._find = None
+        if self._find_poll_id is not None:
+            self.after_cancel(self._find_poll_id)
+            self._find_poll_id = None
+
+    def _find_source(self):
+        """The LineStore to search: the pane's, or a copy of the widget text when not virtualized."""
+        if self.scrollback is not None:
+            return self.scrollback
+        from terminal_core.scrollback import LineStore
+        store = LineStore()
+        store.first = self._widget_first_line
+        try:
+            store.append(self.terminal_area.get("1.0", "end-1c") + "\n")
+        except tk.TclError:
+            pass
+        return store
+
+    def _find_changed(self):
+        """New query (SearchBar, after typing pauses): start a search in the background."""
+        from terminal_core.search import ScrollbackSearch
+        self._cancel_find()
+        self._find_current = None
+        self._clear_find_highlights()
+        query = self.search_bar.query
+        if not query:
+            self.search_bar.set_status("")
+            return
+        try:
+            self._find = ScrollbackSearch(self._find_source(), query, regex=self.search_bar.regex,
+                                          case_sensitive=self.search_bar.case_sensitive or None)
+        except re.error as e:
+            self.search_bar.set_status(f"bad regex: {e.msg}")
+            return
+        self._find.start()
+        self._poll_find()
+
+    def _poll_find(self):
+        """Collect matches while the search thread runs; select the newest one when it is done."""
+        self._find_poll_id = None
+        search = self._find
+        if search is None:
+            return
+        running = search.poll()
+        if running:
+            self._find_poll_id = self.after(FIND_POLL_MS, self._poll_find)
+        elif self._find_current is None and len(search.matches):
+            self.find_step(False)
+            return
+        self._update_find_status()
+        self._highlight_find()
+
+    def find_step(self, forward: bool = True):
+        """Select the next (older when not forward) match and scroll it into view."""
+        search = self._find
+        if search is None:
+            return
+        # Output that arrived since the last pass is searched incrementally
+        if not search.running and search.start() and self._find_poll_id is None:
+            self._find_poll_id = self.after(FIND_POLL_MS, self._poll_find)
+        search.poll()
+        matches = search.matches
+        dropped = matches.drop_before(search.store.first)
+        if self._find_current is not None:
+            self._find_current -= dropped
+            if self._find_current < 0:
+                self._find_current = None
+        if not len(matches):
+            self.bell()
+            self._update_find_status()
+            return
+        if self._find_current is not None:
+            line, column, _ = matches.get(self._find_current)
+        else:
+            # Start from the bottom of the view, so Shift-Return finds the newest match above it
+            line, column = self._widget_first_line - 1 + self._line_of(f"@0,{self.terminal_area.winfo_height()}"), 1 << 30
+        self._find_current = matches.step(line, column, forward)
+        self._show_find_match()
+        self._update_find_status()
+
+    def _show_find_match(self):
+        line, start, end = self._find.matches.get(self._find_current)
+        store = self.scrollback
+        try:
+            if store is not None and self._history_view and line >= store.end - VIRTUAL_WINDOW_LINES:
+                self._leave_history_view()  # the match is in the live window again
+            last = self._widget_first_line + self._line_of("end-1c") - 1
+            if store is not None and not self._widget_first_line <= line <= last:
+                self._show_history_window(line)
+            row = line - self._widget_first_line + 1
+            self.terminal_area.see(f"{row}.{end}")
+            self.terminal_area.see(f"{row}.{start}")
+        except tk.TclError:
+            return
+        self._find_highlight_pending = True
+        self.terminal_area.after_idle(self._highlight_find)
+
+    def _show_history_window(self, line: int):
+        """
+        Replace the widget content with the LineStore lines around `line`. Output
+        arriving meanwhile is absorbed like on a hidden tab; closing the search
+        (or typing in the terminal) rebuilds the live window.
+        """
+        store = self.scrollback
+        start = max(store.first, line - VIRTUAL_WINDOW_LINES // 2)
+        lines = store.lines(start, start + VIRTUAL_WINDOW_LINES)
+        if not self._history_view:
+            self._history_view = True
+            self._update_visible()
+        self.terminal_area.delete("1.0", tk.END)
+        self.terminal_area.insert(tk.END, "\n".join(lines), "default")
+        self._widget_first_line = start
+        self._reset_links()
+        if self.detect_links and lines:
+            self._scan_links("1.0", "\n".join(lines) + "\n")
+
+    def _leave_history_view(self):
+        if not self._history_view:
+            return
+        self._history_view = False
+        self._hidden_overflow = True  # the widget shows history: rebuild the live window
+        self._update_visible()
+
+    def _update_find_status(self):
+        search = self._find
+        if search is None or self.search_bar is None:
+            return
+        count = f"{len(search.matches)}{'+' if search.truncated else ''}"
+        if search.running:
+            text = f"{count}…"
+        elif self._find_current is not None:
+            text = f"{self._find_current + 1}/{count}"
+        else:
+            text = f"{count} matches" if len(search.matches) else "no matches"
+        self.search_bar.set_status(text)
+
+    def _clear_find_highlights(self):
+        try:
+            self.terminal_area.tag_remove("find_match", "1.0", tk.END)
+            self.terminal_area.tag_remove("find_current", "1.0", tk.END)
+        except tk.TclError:
+            pass
+
+    def _highlight_find(self):
+        """Tag the matches on the lines currently visible (main thread, after scrolling)."""
+        self._find_highlight_pending = False
+        self._clear_find_highlights()
+        search = self._find
+        if search is None or not len(search.matches):
+            return
+        area = self.terminal_area
+        try:
+            top = self._line_of("@0,0")
+            bottom = self._line_of(f"@0,{area.winfo_height()}")
+            offset = self._widget_first_line - 1
+            matches = search.matches
+            lo, hi = matches.between(top + offset, bottom + offset)
+            ranges = []
+            for i in range(lo, hi):
+                if i == self._find_current:
+                    continue
+                line, start, end = matches.get(i)
+                ranges += (f"{line - offset}.{start}", f"{line - offset}.{end}")
+            if ranges:
+                area.tag_add("find_match", *ranges)
+            if self._find_current is not None and lo <= self._find_current < hi:
+                line, start, end = matches.get(self._find_current)
+                area.tag_add("find_current", f"{line - offset}.{start}", f"{line - offset}.{end}")
+            area.tag_raise("find_match")
+            area.tag_raise("find_current")
+        except tk.TclError:
             pass
 
+    # ---------------------------
+    # Screen (TUI) rendering
+    # ---------------------------
+    def _attach_screen(self, screen):
+        """
+        Reserve `screen.lines` rows at the end of the widget for a TUI app and
+        start rendering its screen model there. Main thread.
+        """
+        try:
+            if self.terminal_area.get("end-1c linestart", "end-1c"):
+                self.terminal_area.insert(tk.END, "\n", "default")
+                if self.scrollback is not None:
+                    self.scrollback.append("\n")
+            top = self.terminal_area.index("end-1c linestart")
+            self.terminal_area.insert(tk.END, "\n" * (screen.lines - 1), "default")
+            self.terminal_area.mark_set("screen_top", top)
+            self.terminal_area.mark_gravity("screen_top", tk.LEFT)
+        except tk.TclError:
+            return
+        self._screen = screen
+        if self.settings.screen_renderer == "grid":
+            grid = self._get_cell_grid()
+            grid.resize(screen.lines)
+            grid.show()
+            if self.stats_overlay.visible:
+                self.stats_overlay.label.lift()
+            self._screen_grid = grid
+        self._render_screen()
+
+    def _get_cell_metrics(self):
+        if self._cell_metrics is None:
+            from gui.cell_grid import CellMetrics
+            self._cell_metrics = CellMetrics(self.font_family, self.font_size)
+        return self._cell_metrics
+
+    def _get_cell_grid(self):
+        if self._cell_grid is None:
+            from gui.cell_grid import CellGrid
+            self._cell_grid = CellGrid(self.terminal_area, self._get_cell_metrics(), self.text_color,
+                                       self.background_color, self.cursor_color,
+                                       pad_x=int(self.terminal_area.cget("padx")),
+                                       pad_y=int(self.terminal_area.cget("pady")))
+        return self._cell_grid
+
+    def _reserve_screen_rows(self, lines: int):
+        """Re-layout the reserved block after a resize; the next render redraws it all."""
+        try:
+            self.terminal_area.delete("screen_top", tk.END)
+            self.terminal_area.insert(tk.END, "\n" * (lines - 1), "default")
+        except tk.TclError:
+            pass
+
+    def _detach_screen(self):
+        """Render the final state of the screen and leave it in the scrollback."""
+        if self._screen is None:
+            return
+        if self._screen_grid is not None:
+            # The widget only held blank rows while the grid was drawn: fill them in once
+            try:
+                self.terminal_area.delete("screen_top", tk.END)
+                self.terminal_area.insert(tk.END, "\n".join(self._screen.display()), "default")
+                self.terminal_area.see(tk.END)
+            except tk.TclError:
+                pass
+            self._screen_grid.hide()
+            self._screen_grid = None
+        else:
+            self._render_screen()
+        if self.scrollback is not None:
+            self.scrollback.append("\n".join(self._screen.display()) + "\n")
+        self._screen = None
+        try:
+            self.terminal_area.mark_unset("screen_top")
+            self.terminal_area.insert(tk.END, "\n", "default")
+        except tk.TclError:
+            pass
+
+    def _render_screen(self):
+        """Redraw only the rows the screen model reports as dirty."""
+        screen = self._screen
+        started = time.perf_counter() if STATS.enabled else 0.0
+        if self._screen_grid is not None:
+            try:
+                self._screen_grid.draw(screen.take_dirty_cells(), screen.cursor())
+            except tk.TclError:
+                pass
+            if started:
+                STATS.histogram("gui.screen_render").observe(time.perf_counter() - started)
+            return
+        dirty = screen.take_dirty()
+        try:
+            top = int(self.terminal_area.index("screen_top").split(".")[0])
+            for row, text in dirty.items():
+                start = f"{top + row}.0"
+                self.terminal_area.delete(start, f"{start} lineend")
+                if text:
+                    self.terminal_area.insert(start, text, "default")
+            cursor_row, cursor_col = screen.cursor()
+            cursor = f"{top + cursor_row}.{cursor_col}"
+            self.terminal_area.mark_set(tk.INSERT, cursor)
+            self.terminal_area.see(cursor)
+        except tk.TclError:
+            pass
+        if started:
+            STATS.histogram("gui.screen_render").observe(time.perf_counter() - started)
+
     # ---------------------------
     # Printing and prompt
     # ---------------------------
@@ -135,28 +1266,89 @@ class TerminalUI(tk.Tk):
         """
         Print prompt and update current_line_start_index on the GUI thread.
         """
-        prompt = get_dynamic_prompt()
+        # Report background jobs that finished since the last prompt
+        for job in self.jobs.collect_finished():
+            status = "Done" if job.state == "done" else f"Exit {job.returncode}"
+            if job.state == "killed":
+                status = "Killed"
+            note = f"  (output kept, `fg %{job.id}` to show)" if job.output.pending() else ""
+            self.print_text(f"[{job.id}]+  {status:<8} {job.command}{note}")
+        # The prompt renders from cache at once; slow segments (git) are patched in later
+        self._prompt_serial += 1
+        serial = self._prompt_serial
+        ctx = PromptContext(cwd=self.cwd, last_status=self._last_status, duration=self._last_duration)
+        prompt = self.prompt_engine.render(
+            ctx, on_ready=lambda text: self._call_after_output(lambda: self._on_prompt_ready(serial, text))
+        )
         # Add newline + prompt (no automatic newline after prompt)
         self.print_text("\n" + prompt, new_line=False)
         # Update `current_line_start_index` after prompt is inserted
-        self.terminal_area.after(0, self._update_current_line_start)
+        self._call_after_output(lambda: self._update_current_line_start(serial, len(prompt)))
 
-    def _update_current_line_start(self):
+    def _update_current_line_start(self, serial: int = None, prompt_length: int = 0):
         """
         Called on the main thread to set where the user's input starts.
-        Also set the insertion cursor to that position.
+        Also set the insertion cursor to that position and remember where the
+        prompt begins (the `prompt_start` mark) so it can be patched later.
         """
         try:
             self.current_line_start_index = self.terminal_area.index("end-1c")
             self.terminal_area.mark_set(tk.INSERT, self.current_line_start_index)
+            self.terminal_area.mark_set("prompt_start", f"{self.current_line_start_index} - {prompt_length}c")
+            self.terminal_area.mark_gravity("prompt_start", tk.LEFT)
+        except tk.TclError:
+            return
+        self._prompt_shown = serial
+        if self._early_prompt_patch is not None:
+            early_serial, text = self._early_prompt_patch
+            self._early_prompt_patch = None
+            if early_serial == serial:
+                self._patch_prompt(text)
+
+    def _on_prompt_ready(self, serial: int, text: str):
+        """Main thread: a refreshed prompt arrived from the prompt engine."""
+        if serial == self._prompt_shown:
+            self._patch_prompt(text)
+        elif serial == self._prompt_serial:
+            # rendered faster than the prompt itself reached the widget
+            self._early_prompt_patch = (serial, text)
+
+    def _patch_prompt(self, text: str):
+        """Replace the current prompt in place, keeping what the user typed after it."""
+        try:
+            if self.terminal_area.get("prompt_start", self.current_line_start_index) == text:
+                return
+            self.terminal_area.delete("prompt_start", self.current_line_start_index)
+            self.terminal_area.insert("prompt_start", text, "default")
+            self.current_line_start_index = self.terminal_area.index(f"prompt_start + {len(text)}c")
         except tk.TclError:
             pass
 
     def print_initial_messages(self):
         self.print_text("0Term PTY Terminal started.", new_line=True)
-        self.print_text("Features: command history (Up/Down), tab completion, PTY-supported TUI apps.", new_line=True)
+        self.print_text("Features: command history (Up/Down, Ctrl-R search), tab completion, PTY-supported TUI apps.", new_line=True)
+        for error in self.settings.errors:
+            self.print_text(f"config: {error}", color="error")
         self.print_prompt()
 
+    def notify(self, lines, color: str = None):
+        """
+        Main thread: print a message that is not command output (config reload)
+        below the prompt, then a fresh prompt with the typed text carried over.
+        Dropped while a full-screen app owns the screen.
+        """
+        if self._pty_session is not None or self._screen is not None:
+            return
+        if self.jobs.foreground is not None or self._search is not None:
+            for line in lines:
+                self.print_text(line, color=color)
+            return
+        typed = self.get_current_input_text()
+        self.print_text("\n" + "\n".join(lines), color=color, new_line=False)
+        self.print_prompt()
+        if typed:
+            self._call_after_output(lambda: self._set_input(typed))
+
     # ---------------------------
     # Input helpers
     # ---------------------------
@@ -185,8 +1377,15 @@ class TerminalUI(tk.Tk):
     def prevent_deletion_before_prompt(self, event):
         """
         Prevent Backspace/Delete/Left from moving cursor before prompt.
-        Allow typing normally.
+        Allow typing normally. While a PTY app runs, keys go to the app instead.
         """
+        if self._forwarding_keys:
+            return self._forward_key(event)
+        if self._history_view:
+            self.close_find()  # back to the live window; the key is not typed into history
+            return "break"
+        if self._search is not None:
+            return self._search_key(event)
         try:
             cursor_index = self.terminal_area.index(tk.INSERT)
         except tk.TclError:
@@ -198,95 +1397,249 @@ class TerminalUI(tk.Tk):
                 return "break"
         return None
 
+    @property
+    def _forwarding_keys(self) -> bool:
+        """Keys go to a running program (PTY app or shell command) instead of the input line."""
+        return self._pty_session is not None or self._shell_input is not None
+
+    def _forward_key(self, event):
+        """Send a key event to the running PTY app or shell command and suppress default handling."""
+        session = self._pty_session
+        if session is not None:
+            session.send_key(event.keysym, event.char)
+            return "break"
+        shell = self._shell_input
+        if shell is not None:
+            from terminal_core.pty_session import encode_key
+            from terminal_core.shell import ShellError
+            data = encode_key(event.keysym, event.char)
+            if data:
+                try:
+                    shell.send_input(data)
+                except ShellError:
+                    self.bell()
+        return "break"
+
+    # ---------------------------
+    # Window size
+    # ---------------------------
+    def _measure_grid(self):
+        """(lines, columns) of monospace cells that fit in the text area."""
+        metrics = self._get_cell_metrics()
+        cell_w, cell_h = metrics.cell_width, metrics.cell_height
+        pad_x = int(self.terminal_area.cget("padx")) * 2
+        pad_y = int(self.terminal_area.cget("pady")) * 2
+        columns = (self.terminal_area.winfo_width() - pad_x) // cell_w
+        lines = (self.terminal_area.winfo_height() - pad_y) // cell_h
+        return max(2, lines), max(10, columns)
+
+    def handle_resize(self, event):
+        """
+        <Configure>: recompute the grid and propagate it to the running PTY app
+        (TIOCSWINSZ) and its screen model. No-op if the cell grid did not change.
+        """
+        try:
+            size = self._measure_grid()
+        except tk.TclError:
+            return
+        if size == self._grid_size:
+            return
+        self._grid_size = size
+        lines, columns = size
+        if self._screen is not None:
+            self._screen.resize(lines, columns)
+            self._reserve_screen_rows(lines)
+            if self._screen_grid is not None:
+                self._screen_grid.resize(lines)
+            self._render_screen()
+        if self._pty_session is not None:
+            self._pty_session.resize(lines, columns)
+        if self.session is not None:
+            self.session.resize(lines, columns)
+        if self.recorder is not None:
+            self.recorder.resize(columns, lines)
+        if self.fast_forward_screens:
+            self._update_fast_forward()
+
     # ---------------------------
     # History navigation
     # ---------------------------
     def navigate_history(self, event):
         """
-        Up/Down navigate through history. Keep history_index None when not browsing.
+        Up/Down navigate through history. Keep history_offset None when not browsing.
         """
+        if self._forwarding_keys:
+            return self._forward_key(event)
+        if self._search is not None:
+            self._end_history_search(accept=True)
         # Prevent default behavior
         self.terminal_area.mark_set(tk.INSERT, self.current_line_start_index)
 
-        if not self.command_history:
+        # Offsets count from the newest entry, so they stay valid when the
+        # background load swaps in the full history
+        entries = self.history.entries if self.history is not None else self._early_history
+        if not entries:
             return "break"
 
-        # initialize history_index if needed
-        if self.history_index is None:
-            self.history_index = len(self.command_history)
-
+        offset = self.history_offset or 0
         if event.keysym == "Up":
-            if self.history_index > 0:
-                self.history_index -= 1
+            offset = min(offset + 1, len(entries))
         elif event.keysym == "Down":
-            if self.history_index < len(self.command_history) - 1:
-                self.history_index += 1
-            else:
+            offset -= 1
+            if offset <= 0:
                 # beyond last => clear input
-                self.history_index = len(self.command_history)
+                self.history_offset = None
                 self.terminal_area.delete(self.current_line_start_index, tk.END)
                 return "break"
+        if offset <= 0:
+            return "break"
+        self.history_offset = offset
 
-        # Ensure bounds
-        if self.history_index < 0:
-            self.history_index = 0
-        if self.history_index > len(self.command_history):
-            self.history_index = len(self.command_history)
+        # Replace current input with history item
+        self._set_input(entries[-offset])
+        return "break"
 
-        # Replace current input with history item (if any)
-        self.terminal_area.delete(self.current_line_start_index, tk.END)
-        if 0 <= self.history_index < len(self.command_history):
-            cmd = self.command_history[self.history_index]
-            self.terminal_area.insert(self.current_line_start_index, cmd)
-            # place cursor after inserted command
-            self.terminal_area.mark_set(tk.INSERT, f"{self.current_line_start_index}+{len(cmd)}c")
+    def _set_input(self, text: str):
+        """Replace the typed text after the prompt and put the cursor at its end."""
+        try:
+            self.terminal_area.delete(self.current_line_start_index, tk.END)
+            self.terminal_area.insert(self.current_line_start_index, text)
+            self.terminal_area.mark_set(tk.INSERT, f"{self.current_line_start_index}+{len(text)}c")
+            self.terminal_area.see(tk.END)
+        except tk.TclError:
+            pass
 
+    # ---------------------------
+    # Reverse-i-search (Ctrl-R)
+    # ---------------------------
+    def handle_history_search(self, event):
+        """
+        Ctrl-R: start an incremental reverse search, or jump to the next older
+        match if one is already active. Typing edits the query, Return runs the
+        match, Escape/arrows accept it into the line, Ctrl-G cancels.
+        """
+        if self._forwarding_keys:
+            return self._forward_key(event)
+        if self.jobs.foreground is not None:
+            self.bell()
+            return "break"
+        if self._search is None:
+            self._search = {"query": "", "rank": None, "match": "",
+                            "original": self.get_current_input_text(), "failed": False}
+        elif self._search["query"]:
+            rank = self._search["rank"]
+            self._run_history_search(0 if rank is None else rank + 1)
+        self._render_history_search()
+        return "break"
+
+    def _run_history_search(self, start: int):
+        search = self._search
+        found = None
+        if search["query"] and self.history is not None:
+            found = self.history.search(search["query"], start)
+        search["failed"] = bool(search["query"]) and found is None
+        if found is not None:
+            search["rank"], search["match"] = found
+
+    def _render_history_search(self):
+        search = self._search
+        label = "failed reverse-i-search" if search["failed"] else "reverse-i-search"
+        self._set_input(f"({label})`{search['query']}': {search['match']}")
+
+    def _search_key(self, event):
+        """<Key> while a search is active: edit the query or leave the search."""
+        search = self._search
+        if event.keysym == "BackSpace":
+            search["query"] = search["query"][:-1]
+            search["rank"], search["match"] = None, ""
+            self._run_history_search(0)
+        elif event.keysym in ("Escape", "Left", "Right", "Home", "End"):
+            self._end_history_search(accept=True)
+            return "break"
+        elif event.char and event.char.isprintable():
+            search["query"] += event.char
+            # Stay on the current match while it still contains the query
+            self._run_history_search(search["rank"] or 0)
+        else:
+            return "break"
+        self._render_history_search()
         return "break"
 
+    def cancel_history_search(self, event=None):
+        """Ctrl-G: leave the search and restore what was typed before it."""
+        if self._search is not None:
+            self._end_history_search(accept=False)
+            return "break"
+        return None
+
+    def _end_history_search(self, accept: bool):
+        search, self._search = self._search, None
+        self._set_input(search["match"] if accept and search["match"] else search["original"])
+
     # ---------------------------
     # Tab completion
     # ---------------------------
     def handle_tab_completion(self, event):
         """
-        File/directory auto-completion using get_completions(partial_path).
+        File/directory and command-name completion. The lookup runs on the
+        completion service's worker thread; the result is applied on the main
+        thread only if the input did not change in the meantime.
         """
+        if self._forwarding_keys:
+            return self._forward_key(event)
+        if self._search is not None:
+            self._end_history_search(accept=True)
         current_input = self.get_current_input_text()
-        if ' ' in current_input:
-            parts = current_input.split(' ')
-            partial_path = parts[-1]
-        else:
-            partial_path = current_input
-
-        try:
-            completions = get_completions(partial_path)
-        except Exception:
-            completions = []
+        words = current_input.split(" ")
+        self.completer.complete_async(
+            words[-1],
+            lambda result: self._call_after_output(lambda: self._apply_completion(current_input, result)),
+            command_position=len(words) == 1,
+            cwd=self.cwd,
+        )
+        return "break"
 
-        # Remove current partial input
-        self.terminal_area.delete(self.current_line_start_index, tk.END)
+    def _apply_completion(self, typed: str, result):
+        """Main thread: extend the word to the common prefix, or list the candidates."""
+        if self.get_current_input_text() != typed or self._pty_session is not None:
+            return  # user kept typing; stale result
+        head = typed[:len(typed) - len(result.word)]
+        matches = result.matches
 
-        if len(completions) == 1:
-            full_path = completions[0]
-            if os.path.isdir(full_path) and not full_path.endswith(os.sep):
-                full_path += os.sep
-            if ' ' in current_input:
-                new_input = " ".join(current_input.split(' ')[:-1] + [full_path])
-            else:
-                new_input = full_path
-            self.terminal_area.insert(self.current_line_start_index, new_input)
-        elif len(completions) > 1:
+        if len(matches) == 1 or len(result.common) > len(result.word):
+            completion = matches[0] if len(matches) == 1 else result.common
+            try:
+                self.terminal_area.delete(self.current_line_start_index, tk.END)
+                self.terminal_area.insert(self.current_line_start_index, head + completion)
+                self.terminal_area.see(tk.END)
+            except tk.TclError:
+                pass
+        elif matches:
             # display options, then show prompt again
-            display_names = [os.path.basename(c) for c in completions]
+            display_names = [os.path.basename(c.rstrip(os.sep)) + (os.sep if c.endswith(os.sep) else "")
+                             for c in matches[:MAX_COMPLETIONS_SHOWN]]
+            if len(matches) > MAX_COMPLETIONS_SHOWN:
+                display_names.append(f"... ({len(matches)} total)")
+            if result.partial:
+                display_names.append("(listing incomplete)")
+            try:
+                self.terminal_area.delete(self.current_line_start_index, tk.END)
+            except tk.TclError:
+                pass
             self.print_text("", new_line=True)
             self.print_text("  ".join(display_names))
             self.print_prompt()
-            self.terminal_area.insert(self.current_line_start_index, current_input)
+            # restore the typed text once the new prompt has been rendered
+            self._call_after_output(lambda: self._restore_input(typed))
         else:
-            # no completions: reinsert unchanged input
-            self.terminal_area.insert(self.current_line_start_index, current_input)
+            self.bell()
 
-        self.terminal_area.see(tk.END)
-        return "break"
+    def _restore_input(self, text: str):
+        try:
+            self.terminal_area.insert(self.current_line_start_index, text)
+            self.terminal_area.see(tk.END)
+        except tk.TclError:
+            pass
 
     # ---------------------------
     # Enter handling & execution
@@ -296,8 +1649,30 @@ class TerminalUI(tk.Tk):
         Called when user presses Enter. Extract command and either handle built-ins
         or dispatch to executor or PTY-runner.
         """
+        if self._forwarding_keys:
+            return self._forward_key(event)
+        if self._history_view:
+            self.close_find()
+            return "break"
+        if self.jobs.foreground is not None:
+            # The input line is shared with the running job's output; wait for
+            # it to finish, or use `&` / Ctrl-C
+            self.bell()
+            return "break"
+        if self._search is not None:
+            # Return during Ctrl-R runs the match
+            self._end_history_search(accept=True)
+        # The prompt line is final now; late refreshes must not touch it
+        self._prompt_shown = None
+        self._last_status, self._last_duration = 0, None
         # Prevent default newline insertion
-        command = self.get_current_input_text().strip()
+        typed = self.get_current_input_text()
+        command = typed.strip()
+        if self.recorder is not None:
+            self.recorder.output(typed)
+        if self.scrollback is not None:
+            # typed text bypasses the output pipeline; keep the line store in step
+            self.scrollback.append(typed)
         # Move to new line (visual)
         self.print_text("", new_line=True)
 
@@ -305,136 +1680,942 @@ class TerminalUI(tk.Tk):
             self.print_prompt()
             return "break"
 
-        # Push to history (avoid duplicate consecutive entries)
-        if not self.command_history or self.command_history[-1] != command:
-            self.command_history.append(command)
+        # Push to history (the store skips duplicate consecutive entries)
+        if self.history is not None:
+            self.history.add(command)
+        elif not self._early_history or self._early_history[-1] != command:
+            self._early_history.append(command)
         # reset history browsing
-        self.history_index = None
+        self.history_offset = None
 
         # Built-in commands
         lower = command.lower()
         if lower in ("clear", "cls"):
-            # Clear all text
+            # Clear all text (and anything still waiting to be rendered)
+            self.output_buffer.clear()
+            if self.scrollback is not None:
+                self.scrollback.clear()
+                self._widget_first_line = self.scrollback.end
             try:
                 self.terminal_area.delete("1.0", tk.END)
             except tk.TclError:
                 pass
+            self._reset_links()
             self.print_prompt()
             return "break"
         if lower == "exit":
-            self.quit()
+            self.on_close()
+            return "break"
+        if self._handle_job_builtin(command):
+            return "break"
+        if self._handle_debug_builtin(command):
+            return "break"
+        if self._handle_record_builtin(command):
+            return "break"
+        if self._handle_flow_builtin(command):
+            return "break"
+        if self._handle_cache_builtin(command):
+            return "break"
+
+        # Trailing "&" (but not "&&") runs the command as a background job
+        background = command.endswith("&") and not command.endswith("&&")
+        if background:
+            command = command[:-1].rstrip()
+            job = self.jobs.submit(command, background=True, runner=self._background_runner)
+            self.print_text(f"[{job.id}] {command}")
+            self.print_prompt()
             return "break"
 
         # Decide whether to run as PTY TUI app or regular command
         cmd_base = command.split()[0].lower()
-        if cmd_base in TUI_APPS:
-            # start PTY app in background thread
-            threading.Thread(target=self._run_tui_app_thread, args=(command,), daemon=True).start()
+        if cmd_base in self.settings.tui_apps:
+            runner = self._tui_runner
+        elif self.output_cache.rules and self.output_cache.rule_for(command) is not None:
+            runner = self._cached_runner
         else:
-            threading.Thread(target=self._run_command_thread, args=(command,), daemon=True).start()
+            runner = self._shell_runner
+        self._output_ends_with_newline = True
+        self._reset_output_style()
+        self._command_started = time.monotonic()
+        self.jobs.submit(command, runner=runner, listener=self._on_job_output)
 
         return "break"
 
-    def _run_command_thread(self, command: str):
+    # ---------------------------
+    # Job control
+    # ---------------------------
+    def _handle_job_builtin(self, command: str) -> bool:
+        """jobs / fg [%n] / kill [-SIG] %n. Returns True if the command was handled."""
+        parts = command.split()
+        name = parts[0]
+        if name == "jobs":
+            jobs = self.jobs.list()
+            for job in jobs:
+                self.print_text(job.describe())
+            if not jobs:
+                self.print_text("No jobs.")
+            self.print_prompt()
+            return True
+
+        if name == "fg":
+            job = self._job_from_spec(parts[1] if len(parts) > 1 else None)
+            if job is None:
+                self.print_text("fg: no such job", color="error")
+                self.print_prompt()
+                return True
+            self.print_text(job.command)
+            self._output_ends_with_newline = True
+            self._reset_output_style()
+            if not self.jobs.bring_to_foreground(job, self._on_job_output):
+                # Already finished: show what it left behind
+                job.output.attach(self._on_job_output)
+                job.output.detach()
+                self.jobs.forget(job)
+                self._end_foreground_output()
+            return True
+
+        if name == "kill" and any(p.startswith("%") for p in parts[1:]):
+            sig = signal.SIGTERM
+            for arg in parts[1:]:
+                if arg.startswith("-"):
+                    try:
+                        sig = _parse_signal(arg[1:])
+                    except ValueError:
+                        self.print_text(f"kill: invalid signal: {arg}", color="error")
+                        self.print_prompt()
+                        return True
+                    continue
+                job = self._job_from_spec(arg)
+                if job is None or not job.send_signal(sig):
+                    self.print_text(f"kill: {arg}: no such job", color="error")
+            self.print_prompt()
+            return True
+
+        return False
+
+    def _job_from_spec(self, spec):
+        """Resolve '%n' / 'n' / None (most recent background job) to a Job."""
+        if spec is None:
+            return self.jobs.last_background()
+        try:
+            return self.jobs.get(int(spec.lstrip("%")))
+        except ValueError:
+            return None
+
+    def handle_interrupt(self, event):
+        """
+        Ctrl-C: forwarded to a running PTY app, otherwise SIGINT to the foreground
+        job's process group. With nothing running, the default binding (copy) applies.
+        """
+        if self._pty_session is not None:
+            return self._forward_key(event)
+        if self.jobs.interrupt_foreground():
+            self.print_text("^C", new_line=False)
+            return "break"
+        return None
+
+    def _on_job_output(self, kind: str, text: str):
         """
-        Execute non-TUI commands via execute_command_logic and print outputs.
-        Runs in a background thread.
+        Listener attached to the foreground job's output (worker thread). ANSI
+        escapes are parsed here, off the GUI thread, into styled runs. Blocks
+        while too much output is waiting to render (OutputBuffer.throttle).
         """
+        if not text:
+            return
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.output(text, translate_newlines=True)
+        base = "default" if kind == "stdout" else "error"
+        parser = self._sgr_parsers.get(kind)
+        started = time.perf_counter() if STATS.enabled else 0.0
+        runs = parser.feed(text) if parser is not None else [(text, DEFAULT_STYLE)]
+        if started:
+            STATS.histogram("ansi.parse").observe(time.perf_counter() - started)
+            STATS.counter("jobs.output_chars").add(len(text))
+        wake = False
+        for run, style in runs:
+            wake |= self.output_buffer.write(run, base if style is DEFAULT_STYLE else (base, style))
+        if wake:
+            self._wake_flush()
+        if runs:
+            self._output_ends_with_newline = runs[-1][0].endswith("\n")
+        # Backpressure: hold the worker (and so the command's pipe or PTY) while
+        # the widget is behind; no-op in fast-forward mode and on the main thread
+        self.output_buffer.throttle()
+
+    def _reset_output_style(self):
+        """A new foreground job starts with default colors."""
+        for parser in self._sgr_parsers.values():
+            parser.reset()
+
+    def _on_job_finished(self, job, was_foreground: bool):
+        """JobManager callback (worker thread)."""
+        if was_foreground:
+            self._last_status = job.returncode or 0
+            if self._command_started is not None:
+                self._last_duration = time.monotonic() - self._command_started
+                self._command_started = None
+            # The command may have changed the repository or directory state
+            self.prompt_engine.invalidate()
+            self._end_foreground_output()
+
+    def _end_foreground_output(self):
+        if not self._output_ends_with_newline:
+            self.print_text("", new_line=True)
+        self.print_prompt()
+
+    def close(self):
+        """Hang up this session's jobs and shell and stop the services it owns."""
+        if self._closed:
+            return
+        self._closed = True
+        if self.stats_overlay.visible:
+            self.stats_overlay.hide()
+        if self.recorder is not None:
+            self._stop_recording()
+        self._cancel_find()
+        self.output_buffer.release()  # nothing drains it any more
+        self.jobs.shutdown()
+        if self.session is not None:
+            self.session.close()
+        if self._owns_completer:
+            self.completer.shutdown()
+        if self._owns_prompt_engine:
+            self.prompt_engine.shutdown()
+        if self._owns_output_cache:
+            self.output_cache.close()
+        if self.history is not None and self._history_source is None:
+            self.history.close()
+
+    def on_close(self):
+        """`exit`: end the session, then close its pane (or quit when standalone)."""
+        if self._on_exit is not None:
+            self._on_exit(self)
+        else:
+            self.close()
+            self.quit()
+
+    # ---------------------------
+    # Settings (config reload)
+    # ---------------------------
+    def apply_settings(self, settings):
+        """
+        Switch to reloaded settings without restarting the session. Colors and
+        fonts are changed on the existing tags; no text is re-rendered.
+        """
+        previous, self.settings = self.settings, settings
+        colors = settings.theme_colors(self.theme_name)
+        if colors != self.current_theme:
+            self._apply_theme(colors)
+        if (settings.font_family, settings.font_size) != (self.font_family, self.font_size):
+            self._apply_font(settings.font_family, settings.font_size)
+        self.frame_interval = 1.0 / settings.frame_rate
+        self.output_buffer.max_chars_per_frame = settings.max_chars_per_frame
+        if not self._fixed_scrollback_lines:
+            self.scrollback_lines = settings.scrollback_lines
+        if self.scrollback is not None:
+            self.scrollback.max_lines = settings.history_lines
+        if settings.detect_links != previous.detect_links:
+            self.detect_links = settings.detect_links
+            self._link_carry = None
+        if settings.fast_forward_screens != previous.fast_forward_screens:
+            self.fast_forward_screens = settings.fast_forward_screens
+            self._update_fast_forward()
+        if "terminal_core.capture" in sys.modules:
+            from terminal_core.capture import set_read_sizes
+            set_read_sizes(settings.min_read_size, settings.max_read_size)
+        if self._owns_output_cache:
+            self.output_cache.configure(_cache_rules(settings), settings.cache_max_bytes)
+
+    def _apply_theme(self, colors: dict):
+        self.current_theme = colors
+        self.background_color = colors["bg"]
+        self.text_color = colors["text"]
+        self.error_color = colors["error"]
+        self.cursor_color = colors["cursor"]
         try:
-            result = execute_command_logic(command)
-        except Exception as e:
-            self.print_text(f"Executor error: {e}", color="error")
-            self.print_prompt()
+            self.configure(bg=self.background_color)
+            self.terminal_area.configure(bg=self.background_color, fg=self.text_color,
+                                         insertbackground=self.cursor_color)
+            for tag in list(self._configured_tags):
+                self._configure_tag(tag)
+            self.tag_pool.set_colors(self.text_color, self.background_color)
+            self.stats_overlay.label.configure(bg=self.background_color, fg=self.text_color)
+            if self.search_bar is not None:
+                self.search_bar.set_colors(self.background_color, self.text_color)
+            if self._cell_grid is not None:
+                self._cell_grid.set_colors(self.text_color, self.background_color, self.cursor_color)
+        except tk.TclError:
+            pass
+        if self._screen_grid is not None:
+            self._screen.invalidate()
+            self._render_screen()
+
+    def _apply_font(self, family: str, size: int):
+        self.font_family, self.font_size = family, size
+        try:
+            self.terminal_area.configure(font=(family, size))
+            self.tag_pool.set_font(family, size)
+            self.stats_overlay.label.configure(font=(family, size - 2))
+            if self._cell_metrics is not None:
+                self._cell_metrics.set_font(family, size)
+        except tk.TclError:
             return
+        if self._screen_grid is not None:
+            self._screen.invalidate()
+            self._render_screen()
+        # The cell size changed: recompute the grid for the shell and PTY apps
+        self.after_idle(lambda: self.handle_resize(None))
 
-        rtype = result.get("type", "error")
-        if rtype == "success":
-            out = result.get("output", "")
-            err = result.get("error", "")
-            if out:
-                self.print_text(out.rstrip("\n"))
-            if err:
-                self.print_text(err.rstrip("\n"), color="error")
-        elif rtype == "tui_error":
-            # executor indicates this is a TUI-only program
-            self.print_text(result.get("message", "TUI application requires PTY."), color="error")
+    # ---------------------------
+    # Instrumentation
+    # ---------------------------
+    def toggle_stats(self, event=None):
+        """F12: show/hide the live stats overlay (metrics are collected only while shown)."""
+        self.stats_overlay.toggle()
+        return "break"
+
+    def _runtime_stat_lines(self) -> list:
+        buf = self.output_buffer.stats()
+        try:
+            tk_queue = len(self.tk.splitlist(self.tk.call("after", "info")))
+        except tk.TclError:
+            tk_queue = "?"
+        lines = [
+            f"frames {buf['frames']}  coalesced {buf['coalesced_frames']}  late {buf['dropped_frames']}",
+            f"output pending {buf['pending_chars']} chars  dropped {buf['dropped_chars']}  "
+            f"skipped {buf['skipped_chars']}",
+            f"throttled {buf['throttled']}x for {buf['throttled_seconds']}s  "
+            f"fast-forward screens {self.fast_forward_screens or 'off'}",
+            f"tk after-queue {tk_queue}  style tags {len(self.tag_pool._tags)}  jobs {len(self.jobs.list())}  "
+            f"links {len(self._link_targets)}",
+        ]
+        cache = self.output_cache.stats()
+        if self.output_cache.rules or cache["entries"]:
+            lines.append(f"output cache {cache['entries']} entries {cache['bytes']}B  hits {cache['hits']}  "
+                         f"misses {cache['misses']}  refreshes {cache['refreshes']}")
+        reactor = self.session.reactor if self.session is not None else None
+        lines.append(f"threads {threading.active_count()}  reactor fds {len(reactor) if reactor is not None else 0}")
+        if self.profiler.profiling:
+            lines.append("cProfile: recording (:profile to stop)")
+        if self.profiler.tracing:
+            lines.append("tracemalloc: tracing (:tracemalloc to stop)")
+        return lines
+
+    def _handle_debug_builtin(self, command: str) -> bool:
+        """:stats [reset] / :profile / :tracemalloc. Returns True if handled."""
+        parts = command.split()
+        name = parts[0]
+        if name == ":stats":
+            if len(parts) > 1 and parts[1] == "reset":
+                STATS.reset()
+            else:
+                self.stats_overlay.toggle()
+        elif name == ":profile":
+            if self.profiler.profiling:
+                path = self.profiler.stop_profile()
+                self.print_text(f"cProfile data written to {path} (view with python -m pstats)")
+            else:
+                self.profiler.start_profile()
+                self.print_text("cProfile started on the GUI thread; run :profile again to stop.")
+        elif name == ":tracemalloc":
+            if self.profiler.tracing:
+                path, top = self.profiler.stop_tracemalloc()
+                for line in top:
+                    self.print_text(line)
+                self.print_text(f"tracemalloc snapshot written to {path}")
+            else:
+                self.profiler.start_tracemalloc()
+                self.print_text("tracemalloc started; run :tracemalloc again to stop.")
         else:
-            self.print_text(result.get("message", "Command failed."), color="error")
+            return False
+        self.print_prompt()
+        return True
 
+    # ---------------------------
+    # Flow control
+    # ---------------------------
+    def _handle_flow_builtin(self, command: str) -> bool:
+        """:fastforward [on|off|SCREENS]. Returns True if handled."""
+        parts = command.split()
+        if parts[0] != ":fastforward":
+            return False
+        arg = parts[1] if len(parts) > 1 else ("off" if self.fast_forward_screens else "on")
+        if arg == "on":
+            screens = FAST_FORWARD_SCREENS
+        elif arg == "off":
+            screens = 0
+        elif arg.isdigit():
+            screens = int(arg)
+        else:
+            self.print_text(":fastforward: usage: :fastforward [on|off|SCREENS]", color="error")
+            self.print_prompt()
+            return True
+        self.fast_forward_screens = screens
+        self._update_fast_forward()
+        if screens:
+            self.print_text(f"Fast-forward on: floods keep only their newest {screens} screenfuls.")
+        else:
+            self.print_text("Fast-forward off: floods are slowed to the render rate.")
+        self.print_prompt()
+        return True
+
+    def _update_fast_forward(self):
+        lines, columns = self._grid_size
+        self.output_buffer.set_fast_forward(self.fast_forward_screens * lines * columns)
+
+    # ---------------------------
+    # Output cache
+    # ---------------------------
+    def _handle_cache_builtin(self, command: str) -> bool:
+        """:cache [stats|clear]. Returns True if handled."""
+        parts = command.split()
+        if parts[0] != ":cache":
+            return False
+        arg = parts[1] if len(parts) > 1 else "stats"
+        if arg == "clear":
+            self.output_cache.clear()
+            self.print_text("Output cache cleared.")
+        elif arg == "stats":
+            stats = self.output_cache.stats()
+            lookups = stats["hits"] + stats["misses"]
+            rate = f" ({100 * stats['hits'] // lookups}%)" if lookups else ""
+            self.print_text(f"{stats['entries']} entries, {stats['bytes']} of {stats['max_bytes']} bytes")
+            self.print_text(f"hits {stats['hits']}{rate}  misses {stats['misses']}  expired {stats['expired']}  "
+                            f"evictions {stats['evictions']}")
+            self.print_text(f"background refreshes {stats['refreshes']}, {stats['refresh_changed']} changed")
+            if not self.output_cache.rules:
+                self.print_text("No commands are cached: add patterns to [cache] commands in the config file.")
+        else:
+            self.print_text(":cache: usage: :cache [stats|clear]", color="error")
         self.print_prompt()
+        return True
+
+    def _on_cached_output_changed(self, command: str):
+        # Cache worker thread: the refreshed output differs from what was shown
+        self._call_after_output(lambda: self.notify(
+            [f"[cache] output of `{command}` changed since it was shown; run it again to see it"], color="info"))
+
+    # ---------------------------
+    # Recording and replay
+    # ---------------------------
+    def _handle_record_builtin(self, command: str) -> bool:
+        """:record [FILE] / :replay FILE [SPEED|max]. Returns True if handled."""
+        name = command.split()[0]
+        if name not in (":record", ":replay"):
+            return False
+        try:
+            args = shlex.split(command)[1:]
+        except ValueError as e:
+            self.print_text(f"{name}: {e}", color="error")
+            self.print_prompt()
+            return True
+
+        if name == ":record":
+            if self.recorder is not None:
+                self._stop_recording()
+            else:
+                self._start_recording(args[0] if args else f"0term-{time.strftime('%Y%m%d-%H%M%S')}.cast")
+            self.print_prompt()
+            return True
+
+        speed = 1.0
+        try:
+            if not args:
+                raise ValueError("usage: :replay FILE [SPEED|max]")
+            if len(args) > 1:
+                speed = None if args[1] == "max" else float(args[1].rstrip("x"))
+                if speed is not None and speed <= 0:
+                    raise ValueError(f"invalid speed: {args[1]}")
+        except ValueError as e:
+            self.print_text(f":replay: {e}", color="error")
+            self.print_prompt()
+            return True
+        path = os.path.join(self.cwd, os.path.expanduser(args[0]))
+        self._output_ends_with_newline = True
+        self._reset_output_style()
+        self._command_started = time.monotonic()
+        self.jobs.submit(command, runner=lambda job: self._replay_runner(job, path, speed),
+                         listener=self._on_job_output)
+        return True
+
+    def _start_recording(self, path: str):
+        from terminal_core.recording import AsciicastRecorder
+        path = os.path.join(self.cwd, os.path.expanduser(path))
+        lines, columns = self._grid_size
+        try:
+            self.recorder = AsciicastRecorder(path, columns=columns, lines=lines, title="0Term")
+        except OSError as e:
+            self.print_text(f":record: {e}", color="error")
+            return
+        self.print_text(f"Recording to {path} (:record again to stop).")
+
+    def _stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        try:
+            events, size = recorder.close()
+        except OSError as e:
+            self.print_text(f":record: {e}", color="error")
+            return
+        self.print_text(f"Recording saved to {recorder.path} ({events} events, {size} chars).")
+
+    def _mark_recording(self, screen: bool):
+        """Note in the recording where a PTY app's screen starts or ends."""
+        recorder = self.recorder
+        if recorder is not None:
+            from terminal_core.recording import SCREEN_MARKER, TEXT_MARKER
+            if screen:
+                lines, columns = self._grid_size
+                recorder.resize(columns, lines)
+            recorder.marker(SCREEN_MARKER if screen else TEXT_MARKER)
+
+    def _replay_runner(self, job, path: str, speed):
+        """
+        Feed a recording through the normal output path: text goes through the SGR
+        parser and output buffer like command output, PTY-app segments (between
+        screen/text markers) through a screen model. Recordings made elsewhere
+        are terminal streams and go to a screen model as a whole. Ctrl-C stops.
+        """
+        from terminal_core.recording import (read_asciicast, paced, recorded_here,
+                                             SCREEN_MARKER, TEXT_MARKER)
+        try:
+            header, events = read_asciicast(path)
+            from terminal_core.screen import ScreenModel
+        except (OSError, ValueError, ImportError) as e:
+            yield ("error", f":replay: {e}")
+            yield ("exit", 1)
+            return
+        stop = threading.Event()
+        job.interrupt_handler = lambda sig: stop.set()
+        size = [int(header.get("width", 80)), int(header.get("height", 24))]
+        screen = None
+
+        def open_screen():
+            model = ScreenModel(columns=size[0], lines=size[1])
+            self._call_after_output(lambda: self._attach_screen(model))
+            return model
+
+        def close_screen():
+            self._call_after_output(self._detach_screen)
+
+        if not recorded_here(header):
+            screen = open_screen()
+        count = chars = 0
+        started = time.monotonic()
+        try:
+            for code, data in paced(events, speed, header.get("idle_time_limit"), stop):
+                if code == "o":
+                    count += 1
+                    chars += len(data)
+                    if screen is not None:
+                        screen.feed(data.encode("utf-8"))
+                        if self.output_buffer.touch():
+                            self._wake_flush()
+                    else:
+                        yield ("stdout", data.replace("\r\n", "\n"))
+                elif code == "r":
+                    columns, _, lines = data.partition("x")
+                    size = [int(columns), int(lines)]
+                    if screen is not None:
+                        screen.resize(size[1], size[0])
+                        self._call_after_output(lambda rows=size[1]: self._reserve_screen_rows(rows))
+                elif code == "m" and data == SCREEN_MARKER and screen is None:
+                    screen = open_screen()
+                elif code == "m" and data == TEXT_MARKER and screen is not None:
+                    close_screen()
+                    screen = None
+        except (OSError, ValueError) as e:
+            yield ("error", f":replay: {e}")
+        if screen is not None:
+            close_screen()
+        note = "interrupted" if stop.is_set() else "done"
+        lead = "" if self._output_ends_with_newline else "\n"
+        yield ("stdout", f"{lead}[replay {note}: {count} events, {chars} chars in "
+                         f"{time.monotonic() - started:.2f}s]\n")
+        yield ("exit", 130 if stop.is_set() else 0)
+
+    # ---------------------------
+    # Runners (executed on JobManager workers)
+    # ---------------------------
+    def _shell_runner(self, job):
+        """Run a foreground command in the persistent shell. Yields executor events."""
+        job.interrupt_handler = lambda sig: self._get_session().interrupt()
+        yield from self._command_events(job.command)
+
+    def _background_runner(self, job):
+        """
+        Run a background job (`cmd &`) in a process of its own, started in this
+        pane's directory with the environment of the pane's shell, like a
+        subshell: a `cd` or export in it changes neither the pane nor the GUI.
+        """
+        from terminal_core.executor import stream_command
+        return stream_command(job.command, on_spawn=job.set_process, new_session=True, cwd=self.cwd,
+                              env=self._shell_environment())
+
+    def _shell_environment(self) -> dict:
+        """The environment of this pane's shell (worker threads; read again after each command)."""
+        env = self._shell_env
+        if env is None:
+            env = self._shell_env = self._get_session().environment()
+        return env
+
+    def _cached_runner(self, job):
+        """
+        Run a command matching a [cache] rule. A fresh stored run is replayed at
+        once, marked as cached, and rerun in the background; otherwise the
+        command runs in the shell and a successful run is stored.
+        """
+        cache = self.output_cache
+        command, cwd = job.command, self.cwd
+        rule = cache.rule_for(command)
+        if rule is None:  # the rules changed since the command was submitted
+            yield from self._shell_runner(job)
+            return
+        env = self._shell_environment()
+        entry = cache.get(cache.key(command, cwd, rule, env), rule.ttl)
+        if entry is not None:
+            yield from entry.events
+            lead = "" if self._output_ends_with_newline else "\n"
+            self._output_ends_with_newline = True
+            self.print_text(f"{lead}[cached {describe_age(entry.age)} ago, refreshing]", color="info")
+            lines, columns = self._grid_size
+            cache.refresh(command, cwd, rule, shown=entry, columns=columns, lines=lines,
+                          on_changed=lambda: self._on_cached_output_changed(command), env=env)
+            yield ("exit", entry.returncode)
+            return
+
+        job.interrupt_handler = lambda sig: self._get_session().interrupt()
+        events, size, returncode = [], 0, None
+        for kind, payload in self._command_events(command):
+            if kind == "exit":
+                returncode = payload
+            elif events is not None and kind in ("stdout", "stderr"):
+                size += len(payload)
+                if size <= cache.max_entry_bytes:
+                    events.append((kind, payload))
+                else:
+                    events = None  # too big to store: stop keeping a copy
+            yield (kind, payload)
+        if events is not None and returncode == 0 and self.cwd == cwd:
+            # Keyed after the run: commands like `git status` touch their own inputs
+            cache.put(cache.key(command, cwd, rule, env), events, returncode)
+
+    def _command_events(self, command: str):
+        """
+        Run command in this pane's Session (the persistent shell, or a one-off
+        process if the shell cannot be started). Yields executor events.
+        """
+        session = self._get_session()
+        # Typed keys go to the command (read, sudo, rm -i, python3 ...) while it runs
+        if session.persistent:
+            self._shell_input = session
+        try:
+            yield from session.stream(command)
+        finally:
+            self._shell_input = None
+            self._shell_env = None  # the command may have exported or unset variables
+        # Follow the shell's directory; the process's own never changes, paths
+        # are resolved against self.cwd (completion, PTY apps, jobs)
+        self.cwd = session.cwd
 
     # ---------------------------
     # PTY-backed TUI runner
     # ---------------------------
-    def _run_tui_app_thread(self, command: str):
+    def _tui_runner(self, job):
         """
-        Fork a PTY and run the requested TUI application. Read bytes from PTY and print them.
-        Runs in a background thread.
+        Run the requested TUI application in a PtySession sized to the widget.
+        The command line goes through bash -c in the pane shell's directory and
+        environment, so quoting, variables and exported settings behave as at
+        the prompt. Keystrokes are forwarded to it until it exits. Yields
+        executor events.
         """
+        import pty
         # Check platform support
         if not hasattr(pty, "fork"):
-            self.print_text("PTY is not available on this platform. Use a Unix-like system or WSL.", color="error")
-            self.print_prompt()
+            yield ("error", "PTY is not available on this platform. Use a Unix-like system or WSL.")
+            yield ("exit", 1)
             return
 
+        try:
+            from terminal_core.screen import ScreenModel
+            from terminal_core.pty_session import PtySession
+        except ImportError as e:
+            yield ("error", f"TUI support unavailable: {e}")
+            yield ("exit", 1)
+            return
+
+        lines, columns = self._grid_size
+        screen = ScreenModel(columns=columns, lines=lines)
+
         def append_bytes(bs: bytes):
-            try:
-                decoded = bs.decode(errors="ignore")
-            except Exception:
-                decoded = str(bs)
-            # print raw bytes content (no extra newline)
-            self.print_text(decoded, new_line=False)
+            recorder = self.recorder
+            if recorder is not None:
+                recorder.output(bs)
+            # Interpret escape sequences; the next frame redraws dirty rows only
+            if STATS.enabled:
+                started = time.perf_counter()
+                screen.feed(bs)
+                STATS.histogram("pty.feed").observe(time.perf_counter() - started)
+            else:
+                screen.feed(bs)
+            # Backpressure: stop reading the PTY until a frame has caught up
+            # (never in fast-forward mode, which is for getting through floods)
+            self._screen_backlog += len(bs)
+            if (self._screen_backlog > SCREEN_HIGH_WATER and not self.output_buffer.fast_forward_chars
+                    and not session.paused):
+                session.pause_reading()
+            if self.output_buffer.touch():
+                self._wake_flush()
 
         try:
-            pid, fd = pty.fork()
+            session = PtySession(["bash", "-c", job.command], columns=columns, lines=lines, cwd=self.cwd,
+                                 env=self._shell_environment())
+            session.start()
         except Exception as e:
-            self.print_text(f"Failed to fork PTY: {e}", color="error")
-            self.print_prompt()
+            yield ("error", f"Failed to fork PTY: {e}")
+            yield ("exit", 1)
             return
 
-        if pid == 0:
-            # Child: exec the command
-            try:
-                parts = command.split()
-                os.execvp(parts[0], parts)
-            except Exception as e:
-                # If exec fails, write to stderr and exit child
-                sys.stderr.write(f"Exec failed: {e}\n")
-                os._exit(1)
+        job.interrupt_handler = session.send_signal
+        self._pty_session = session
+        self._mark_recording(screen=True)
+        self._call_after_output(lambda: self._attach_screen(screen))
+        # The shared reactor reads the PTY; this worker only waits for the app to exit
+        from terminal_core.reactor import get_reactor
+        exited = threading.Event()
+        session.attach(get_reactor(), append_bytes, lambda status: exited.set())
+        exited.wait()
+        self._pty_session = None
+        self._mark_recording(screen=False)
+        if session.read_error is not None:
+            yield ("error", f"PTY read error: {session.read_error}")
+        self._call_after_output(self._detach_screen)
+        yield ("exit", session.exit_status)
+
+
+class TerminalUI(tk.Tk):
+    """
+    Main window: sessions in tabs, each tab split into one or more panes.
+
+    Ctrl-Shift-T opens a tab, Ctrl-Shift-D / Ctrl-Shift-E split the focused pane
+    side by side / stacked (a tab keeps the direction of its first split),
+    Ctrl-Shift-W closes the pane and Ctrl-PageUp / Ctrl-PageDown switch tabs.
+    Panes share the reactor thread, the completion index, the prompt engine,
+    the output cache and the history file; only the panes of the selected tab render.
+
+    The config file is checked every CONFIG_POLL_MS; changes are applied to
+    every pane live (theme_name, when given, overrides the configured theme).
+    """
+
+    def __init__(self, theme_name: str = None, startup_profile=None, settings=None, **pane_options):
+        # pane_options: passed to every TerminalPane (scrollback_lines, virtual_scrollback)
+        self.startup_profile = startup_profile
+        super().__init__()
+        self.settings = settings or current_settings()
+        self.title("0Term")
+        self.geometry(self.settings.geometry)
+        if startup_profile is not None:
+            startup_profile.mark("tk root")
+
+        self.theme_name = theme_name
+        self.background_color = self.settings.theme_colors(theme_name)["bg"]
+        self.configure(bg=self.background_color)
+        # Hidden panes keep their output in a LineStore, so panes are virtualized by default
+        pane_options.setdefault("virtual_scrollback", True)
+        self.pane_options = pane_options
+
+        # --- Shared services ---
+        self.completer = CompletionService(extra_commands=BUILTIN_COMMANDS)
+        self.prompt_engine = PromptEngine()
+        self.output_cache = OutputCache(_cache_rules(self.settings), self.settings.cache_max_bytes)
+        self.history = None  # HistoryStore, opened by the first pane's background init
+        self._history_lock = threading.Lock()
+
+        # --- Sessions ---
+        self.panes = []
+        self._tab_focus = {}  # tab widget name -> pane that last had focus there
+        ttk.Style(self).configure("TNotebook", background=self.background_color, borderwidth=0)
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.new_tab()
+
+        from utils.config import ConfigWatcher
+        self._config_watcher = ConfigWatcher(self.settings.path)
+        self._config_poll_id = self.after(CONFIG_POLL_MS, self._poll_config)
+
+    def _history_store(self):
+        """The HistoryStore shared by all panes (any thread; opened on first call)."""
+        with self._history_lock:
+            if self.history is None:
+                from utils.history import HistoryStore
+                self.history = HistoryStore()
+            return self.history
+
+    def _new_pane(self, paned):
+        pane = TerminalPane(
+            paned, theme_name=self.theme_name,
+            startup_profile=self.startup_profile if not self.panes else None,
+            completer=self.completer, prompt_engine=self.prompt_engine, output_cache=self.output_cache,
+            history_source=self._history_store, on_exit=self.close_pane, settings=self.settings,
+            **self.pane_options,
+        )
+        self.panes.append(pane)
+        self._bind_shortcuts(pane)
+        return pane
+
+    def _bind_shortcuts(self, pane):
+        # Bound on the text widget itself: more specific than the pane's <Key>
+        # binding, so they also work while a PTY app receives the keystrokes
+        shortcuts = {
+            "<Control-Key-T>": self.new_tab,
+            "<Control-Key-D>": lambda: self.split(pane, tk.HORIZONTAL),
+            "<Control-Key-E>": lambda: self.split(pane, tk.VERTICAL),
+            "<Control-Key-W>": lambda: self.close_pane(pane),
+            "<Control-Next>": lambda: self.next_tab(1),
+            "<Control-Prior>": lambda: self.next_tab(-1),
+        }
+        for sequence, action in shortcuts.items():
+            pane.terminal_area.bind(sequence, lambda event, action=action: action() or "break")
+        pane.terminal_area.bind("<FocusIn>", lambda event: self._on_pane_focus(pane), add="+")
+
+    # ---------------------------
+    # Tabs and panes
+    # ---------------------------
+    def new_tab(self):
+        paned = tk.PanedWindow(self.notebook, orient=tk.HORIZONTAL, sashwidth=4, borderwidth=0,
+                               bg=self.background_color)
+        pane = self._new_pane(paned)
+        paned.add(pane, stretch="always")
+        self.notebook.add(paned)
+        self._renumber_tabs()
+        self.notebook.select(paned)
+        pane.terminal_area.focus_set()
+
+    def split(self, pane, orient):
+        """Open a session next to pane: side by side (HORIZONTAL) or stacked (VERTICAL)."""
+        paned = pane.master
+        if len(paned.panes()) == 1:
+            paned.configure(orient=orient)
+        new = self._new_pane(paned)
+        paned.add(new, after=pane, stretch="always")
+        self.after_idle(lambda: self._even_out(paned))
+        new.terminal_area.focus_set()
+
+    def close_pane(self, pane):
+        """Ctrl-Shift-W / `exit`: end the pane's session; closing the last one quits."""
+        if pane not in self.panes:
+            return
+        self.panes.remove(pane)
+        paned = pane.master
+        pane.close()
+        paned.forget(pane)
+        pane.destroy()
+        if not self.panes:
+            self.on_close()
+            return
+        if self._tab_focus.get(str(paned)) is pane:
+            del self._tab_focus[str(paned)]
+        if paned.panes():
+            self.after_idle(lambda: self._even_out(paned))
+            self._focus_selected_tab()
         else:
-            # Parent: read from fd until EOF
-            try:
-                while True:
-                    r, _, _ = select.select([fd], [], [], 0.1)
-                    if fd in r:
-                        try:
-                            data = os.read(fd, 4096)
-                        except OSError:
-                            break
-                        if not data:
-                            break
-                        append_bytes(data)
-                    # Non-blocking check if child exited (optional)
-                    try:
-                        wpid, status = os.waitpid(pid, os.WNOHANG)
-                        if wpid == pid:
-                            # child exited; continue to drain fd until EOF
-                            pass
-                    except ChildProcessError:
-                        break
-                # Try to reap if not already
-                try:
-                    os.waitpid(pid, 0)
-                except Exception:
-                    pass
-            except Exception as e:
-                self.print_text(f"PTY read error: {e}", color="error")
+            self.notebook.forget(paned)
+            paned.destroy()
+            self._renumber_tabs()
+
+    def next_tab(self, step: int):
+        tabs = self.notebook.tabs()
+        if len(tabs) > 1:
+            self.notebook.select(tabs[(self.notebook.index("current") + step) % len(tabs)])
+
+    def _on_tab_changed(self, event=None):
+        selected = self.notebook.select()
+        for pane in self.panes:
+            pane.set_visible(str(pane.master) == selected)
+        self._focus_selected_tab()
+
+    def _on_pane_focus(self, pane):
+        self._tab_focus[str(pane.master)] = pane
+
+    def _focus_selected_tab(self):
+        selected = self.notebook.select()
+        panes = [p for p in self.panes if str(p.master) == selected]
+        if panes:
+            pane = self._tab_focus.get(selected)
+            (pane if pane in panes else panes[0]).terminal_area.focus_set()
+
+    def _renumber_tabs(self):
+        for number, tab in enumerate(self.notebook.tabs(), 1):
+            self.notebook.tab(tab, text=f" {number} ")
+
+    def _even_out(self, paned):
+        """Give every pane of a tab the same share of its width (or height)."""
+        try:
+            count = len(paned.panes())
+            horizontal = str(paned.cget("orient")) == tk.HORIZONTAL
+            size = paned.winfo_width() if horizontal else paned.winfo_height()
+            for i in range(count - 1):
+                position = size * (i + 1) // count
+                if horizontal:
+                    paned.sash_place(i, position, 0)
+                else:
+                    paned.sash_place(i, 0, position)
+        except tk.TclError:
+            pass
+
+    # ---------------------------
+    # Config reload
+    # ---------------------------
+    def _poll_config(self):
+        settings = self._config_watcher.check()
+        if settings is not None:
+            self.apply_settings(settings)
+        self._config_poll_id = self.after(CONFIG_POLL_MS, self._poll_config)
+
+    def apply_settings(self, settings):
+        """Apply reloaded settings to the window and every pane, and report the result."""
+        previous, self.settings = self.settings, settings
+        set_current_settings(settings)
+        if settings.geometry != previous.geometry:
+            self.geometry(settings.geometry)
+        self.background_color = settings.theme_colors(self.theme_name)["bg"]
+        self.configure(bg=self.background_color)
+        ttk.Style(self).configure("TNotebook", background=self.background_color)
+        for tab in self.notebook.tabs():
+            self.nametowidget(tab).configure(bg=self.background_color)
+        self.output_cache.configure(_cache_rules(settings), settings.cache_max_bytes)
+        for pane in self.panes:
+            pane.apply_settings(settings)
+        selected = self.notebook.select()
+        focused = self._tab_focus.get(selected)
+        if focused not in self.panes:
+            focused = next((p for p in self.panes if str(p.master) == selected), None)
+        if focused is not None:
+            if settings.errors:
+                focused.notify([f"config: {error}" for error in settings.errors], color="error")
+            else:
+                focused.notify([f"config reloaded from {settings.path}"])
+
+    def on_close(self):
+        """Window close: end every session, then quit."""
+        if self._config_poll_id is not None:
+            self.after_cancel(self._config_poll_id)
+            self._config_poll_id = None
+        for pane in self.panes:
+            pane.close()
+        self.panes = []
+        self.completer.shutdown()
+        self.prompt_engine.shutdown()
+        self.output_cache.close()
+        if self.history is not None:
+            self.history.close()
+        self.quit()
 
-        # After TUI app exits, restore prompt
-        self.print_prompt()
 
 # If executed directly, run the UI
 if __name__ == "__main__":
-    # Example: choose theme "Dracula" or "Dark"
-    app = TerminalUI(theme_name="Dracula")
+    # The theme comes from the config file; pass theme_name="Dark" etc. to override it
+    app = TerminalUI()
     app.mainloop()
@@ -0,0 +1,6 @@
+# terminal_core/__main__.py
+import sys
+
+from terminal_core.batch import main
+
+sys.exit(main())
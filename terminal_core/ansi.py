@@ -0,0 +1,215 @@
+# terminal_core/ansi.py
+"""
+Streaming ANSI escape-sequence parser for regular (non-PTY-screen) output.
+
+SgrParser.feed() turns a chunk of decoded text into (text, Style) runs:
+SGR sequences (`ESC [ ... m`) update the current style, every other escape
+sequence (cursor movement, erase, OSC titles, charset selection...) is
+removed, except OSC 8 hyperlinks (`ESC ] 8 ; params ; URI ST`), which set
+Style.link for the text up to the closing `ESC ] 8 ; ; ST`. A sequence cut in
+half by a chunk boundary is held back until the next chunk, so colors never
+leak as raw `\\x1b[...m` text.
+
+Styles are immutable and interned by the parser, so a colorized log produces
+a handful of Style objects that consumers can use as dictionary keys (e.g.
+to map each distinct style onto one Tk tag).
+"""
+import re
+from collections import namedtuple
+
+# fg / bg: None (default), a palette index 0-255, or "#rrggbb"; link: OSC 8 URI or None
+Style = namedtuple("Style", "fg bg bold dim italic underline inverse strike link", defaults=(None,))
+DEFAULT_STYLE = Style(None, None, False, False, False, False, False, False)
+
+# xterm's 16 base colors
+ANSI_PALETTE = (
+    "#000000", "#cd0000", "#00cd00", "#cdcd00", "#0000ee", "#cd00cd", "#00cdcd", "#e5e5e5",
+    "#7f7f7f", "#ff0000", "#00ff00", "#ffff00", "#5c5cff", "#ff00ff", "#00ffff", "#ffffff",
+)
+
+# Complete sequences: CSI (group 1 = params, group 2 = final byte), OSC, charset
+# designation and the remaining two-byte escapes
+_SEQUENCE = re.compile(
+    r"\x1b(?:\[([0-?]*)[ -/]*([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)|[()*+].|[ -/]*[0-Z\\^-~])",
+    re.S,
+)
+# A prefix that may still become a complete sequence with more input
+_PARTIAL = re.compile(r"\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[()*+]|[ -/]*)?\Z")
+# Longest incomplete sequence held back before it is given up on (OSC titles can be long)
+MAX_PENDING = 4096
+MAX_TRANSITIONS = 1024
+# Interned styles kept at most (each OSC 8 URI makes new ones)
+MAX_STYLES = 4096
+_HYPERLINK = "\x1b]8;"
+
+# Attribute toggles: SGR code -> (field, value)
+_ATTRIBUTES = {
+    1: ("bold", True), 2: ("dim", True), 3: ("italic", True), 4: ("underline", True),
+    7: ("inverse", True), 9: ("strike", True),
+    22: ("bold", False), 23: ("italic", False), 24: ("underline", False),
+    27: ("inverse", False), 29: ("strike", False),
+}
+
+
+def color_hex(color) -> str:
+    """Resolve a Style color (palette index or "#rrggbb") to "#rrggbb"."""
+    if isinstance(color, str):
+        return color
+    if color < 16:
+        return ANSI_PALETTE[color]
+    if color < 232:
+        # 6x6x6 color cube
+        color -= 16
+        levels = [0 if c == 0 else 55 + c * 40 for c in (color // 36, color // 6 % 6, color % 6)]
+        return "#{:02x}{:02x}{:02x}".format(*levels)
+    gray = 8 + (color - 232) * 10
+    return f"#{gray:02x}{gray:02x}{gray:02x}"
+
+
+def _extended_color(values, i):
+    """
+    Parse `38;5;n` / `38;2;r;g;b` style arguments starting at values[i] (the 5/2).
+    Returns (color or None, next index).
+    """
+    if i >= len(values):
+        return None, i
+    mode = values[i]
+    if mode == 5 and i + 1 < len(values):
+        return max(0, min(values[i + 1], 255)), i + 2
+    if mode == 2 and i + 3 < len(values):
+        r, g, b = (max(0, min(v, 255)) for v in values[i + 1:i + 4])
+        return f"#{r:02x}{g:02x}{b:02x}", i + 4
+    return None, len(values)
+
+
+def _colon_color(param: str):
+    """`38:5:n` / `38:2:[colorspace]:r:g:b` (ITU T.416 form)."""
+    parts = [int(p) if p.isdigit() else 0 for p in param.split(":")]
+    if len(parts) >= 3 and parts[1] == 5:
+        return max(0, min(parts[2], 255))
+    if len(parts) >= 5 and parts[1] == 2:
+        r, g, b = (max(0, min(v, 255)) for v in parts[-3:])
+        return f"#{r:02x}{g:02x}{b:02x}"
+    return None
+
+
+class SgrParser:
+    """
+    Stateful parser for one output stream (keep one per stdout/stderr).
+
+    feed(text) -> list of (text, Style) runs, adjacent runs never share a style.
+    """
+
+    def __init__(self):
+        self.style = DEFAULT_STYLE
+        self._pending = ""
+        self._interned = {DEFAULT_STYLE: DEFAULT_STYLE}
+        # (style, params) -> resulting style; colorized output repeats the same few
+        self._transitions = {}
+
+    def reset(self):
+        self.style = DEFAULT_STYLE
+        self._pending = ""
+
+    def feed(self, text: str) -> list:
+        if self._pending:
+            text = self._pending + text
+            self._pending = ""
+        esc = text.find("\x1b")
+        if esc < 0:
+            # fast path: plain text keeps the current style
+            return [(text, self.style)] if text else []
+
+        runs = []
+        pos = 0
+        while esc >= 0:
+            if esc > pos:
+                self._emit(runs, text[pos:esc])
+            match = _SEQUENCE.match(text, esc)
+            if match is None:
+                if _PARTIAL.match(text, esc) and len(text) - esc <= MAX_PENDING:
+                    self._pending = text[esc:]
+                    return runs
+                pos = esc + 1  # stray ESC: drop it
+            else:
+                if match.group(2) == "m":
+                    key = (self.style, match.group(1))
+                    style = self._transitions.get(key)
+                    if style is None:
+                        style = self._apply_sgr(*key)
+                        if len(self._transitions) >= MAX_TRANSITIONS:
+                            self._transitions.clear()
+                        self._transitions[key] = style
+                    self.style = style
+                elif text.startswith(_HYPERLINK, esc):
+                    self.style = self._link_style(match.group())
+                pos = match.end()
+            esc = text.find("\x1b", pos)
+        if pos < len(text):
+            self._emit(runs, text[pos:])
+        return runs
+
+    def _emit(self, runs, text):
+        if runs and runs[-1][1] is self.style:
+            runs[-1] = (runs[-1][0] + text, self.style)
+        else:
+            runs.append((text, self.style))
+
+    def _link_style(self, sequence: str) -> Style:
+        """Current style with the link of an OSC 8 sequence (an empty URI ends the link)."""
+        body = sequence[len(_HYPERLINK):-2 if sequence.endswith("\\") else -1]
+        uri = body.partition(";")[2] or None
+        return self._intern(self.style._replace(link=uri))
+
+    def _intern(self, style: Style) -> Style:
+        interned = self._interned
+        if len(interned) >= MAX_STYLES and style not in interned:
+            interned.clear()
+            interned[DEFAULT_STYLE] = DEFAULT_STYLE
+        return interned.setdefault(style, style)
+
+    def _apply_sgr(self, style: Style, params: str) -> Style:
+        """Style that results from applying SGR `params` to `style`."""
+        if params and params[0] in "<=>?":
+            return style  # private-mode sequence ending in `m` (e.g. xterm modifyOtherKeys)
+        fields = style._asdict()
+        if not params:
+            params = "0"
+        tokens = params.split(";")
+        values = [int(t) if t.isdigit() else 0 for t in tokens]
+        i = 0
+        while i < len(values):
+            code = values[i]
+            token = tokens[i]
+            i += 1
+            if ":" in token:
+                head = token.split(":", 1)[0]
+                code = int(head) if head.isdigit() else 0
+                if code in (38, 48):
+                    fields["fg" if code == 38 else "bg"] = _colon_color(token)
+                elif code == 4:
+                    fields["underline"] = token != "4:0"
+                continue
+            if code == 0:
+                fields = dict(DEFAULT_STYLE._asdict(), link=fields["link"])  # SGR 0 does not end a link
+            elif code in _ATTRIBUTES:
+                name, value = _ATTRIBUTES[code]
+                fields[name] = value
+                if code == 22:
+                    fields["dim"] = False
+            elif 30 <= code <= 37:
+                fields["fg"] = code - 30
+            elif 90 <= code <= 97:
+                fields["fg"] = code - 90 + 8
+            elif 40 <= code <= 47:
+                fields["bg"] = code - 40
+            elif 100 <= code <= 107:
+                fields["bg"] = code - 100 + 8
+            elif code == 39:
+                fields["fg"] = None
+            elif code == 49:
+                fields["bg"] = None
+            elif code in (38, 48):
+                color, i = _extended_color(values, i)
+                fields["fg" if code == 38 else "bg"] = color
+        return self._intern(Style(**fields))
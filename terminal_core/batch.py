@@ -0,0 +1,114 @@
+# terminal_core/batch.py
+"""
+Headless batch frontend for terminal_core (no Tk).
+
+Runs commands on a pool of worker processes, each with its own Session, and
+writes one JSON object per finished command to stdout, in completion order
+("index" is the command's position in the input):
+
+    {"index": 0, "command": "make -j8", "returncode": 0, "stdout": "...", "stderr": "",
+     "error": null, "duration": 12.3, "timed_out": false, "truncated": false, "cwd": "/src"}
+
+Commands come from FILE (one per line; blank lines and # comments are
+skipped; "-" reads stdin) or from -c options. The input is read lazily and at
+most 2 x --jobs commands are in flight, so command files of any length run in
+constant memory. A summary goes to stderr at the end; the exit status is 0
+only if every command succeeded.
+
+Usage:
+    python -m terminal_core commands.txt --jobs 8 --timeout 60 > results.jsonl
+    python -m terminal_core -c "make test" -c "make lint" --shell
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+_session = None  # the worker process's Session
+
+
+def read_commands(lines):
+    """Commands from an iterable of lines, skipping blanks and # comments."""
+    for line in lines:
+        command = line.strip()
+        if command and not command.startswith("#"):
+            yield command
+
+
+def _init_worker(persistent: bool, cwd: str):
+    global _session
+    from terminal_core.session import Session
+    _session = Session(persistent=persistent, cwd=cwd)
+
+
+def _run(index: int, command: str, timeout: float, max_output: int) -> dict:
+    record = {"index": index}
+    record.update(_session.run(command, timeout=timeout, max_output=max_output).to_dict())
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m terminal_core", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", nargs="?", help='command file, one per line ("-": stdin)')
+    parser.add_argument("-c", "--command", action="append", default=[], help="a command to run (repeatable)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("-t", "--timeout", type=float, help="seconds per command before it is interrupted")
+    parser.add_argument("--shell", action="store_true",
+                        help="run in a persistent bash per worker (state carries over between that worker's commands)")
+    parser.add_argument("--cwd", help="working directory of the commands")
+    parser.add_argument("--max-output", type=int, help="characters of stdout/stderr kept per command")
+    args = parser.parse_args(argv)
+    if args.file is None and not args.command:
+        parser.error("give a command file or -c COMMAND")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    source = None
+    commands = iter(args.command)
+    if args.file is not None:
+        source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+        commands = read_commands(source)
+
+    started = time.perf_counter()
+    summary = {"commands": 0, "failed": 0, "timed_out": 0}
+    pool = ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker, initargs=(args.shell, args.cwd))
+    pending = {}  # future -> (index, command)
+    try:
+        for index, command in enumerate(commands):
+            pending[pool.submit(_run, index, command, args.timeout, args.max_output)] = (index, command)
+            if len(pending) >= 2 * args.jobs:
+                _report_finished(pending, summary)
+        while pending:
+            _report_finished(pending, summary)
+    except KeyboardInterrupt:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    finally:
+        pool.shutdown()
+        if source is not None and source is not sys.stdin:
+            source.close()
+
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+def _report_finished(pending: dict, summary: dict):
+    """Wait for at least one command to finish and write the results of all that have."""
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        index, command = pending.pop(future)
+        try:
+            record = future.result()
+        except Exception as e:  # the worker died (or the result could not be sent back)
+            record = {"index": index, "command": command, "returncode": None, "error": f"worker failed: {e}"}
+        summary["commands"] += 1
+        if record.get("timed_out"):
+            summary["timed_out"] += 1
+        if record.get("returncode") != 0 or record.get("error") is not None or record.get("timed_out"):
+            summary["failed"] += 1
+        sys.stdout.write(json.dumps(record) + "\n")
+    sys.stdout.flush()
@@ -0,0 +1,204 @@
+# terminal_core/capture.py
+"""
+Output capture helpers shared by the executor, PTY sessions and the shell.
+
+- ReadSizer: adaptive read size; grows while reads fill the request (a flood),
+  shrinks again when the child goes back to trickling output.
+- CaptureBuffer: accumulates an fd's output by reading directly into a
+  preallocated, geometrically grown bytearray (no per-chunk bytes objects and
+  no quadratic `output += data`). With max_bytes set, everything past the cap
+  is spilled to a temporary file instead of memory.
+- incremental_decoder(): UTF-8 decoder that keeps partial multibyte sequences
+  between chunks, so chunk boundaries never corrupt text.
+- pump_fds(): multiplexes several child output fds with one selector.
+
+With STATS enabled, reads are counted per source ("read.<source>.bytes" and
+"read.<source>.calls") and decoding time goes to the "decode" histogram.
+"""
+import os
+import time
+import codecs
+import selectors
+import tempfile
+
+from terminal_core.metrics import STATS
+
+MIN_READ_SIZE = 4 * 1024
+MAX_READ_SIZE = 1024 * 1024
+
+
+def incremental_decoder(encoding: str = "utf-8", errors: str = "replace"):
+    return codecs.getincrementaldecoder(encoding)(errors=errors)
+
+
+def set_read_sizes(min_size: int, max_size: int):
+    """Change the default bounds; running ReadSizers without explicit bounds follow at once."""
+    global MIN_READ_SIZE, MAX_READ_SIZE
+    MIN_READ_SIZE, MAX_READ_SIZE = min_size, max_size
+
+
+class ReadSizer:
+    """Adaptive read size between min_size and max_size (default: MIN_READ_SIZE / MAX_READ_SIZE)."""
+
+    __slots__ = ("size", "min_size", "max_size", "source")
+
+    def __init__(self, min_size: int = None, max_size: int = None, source: str = "fd"):
+        self.min_size = min_size  # None: follow the module default
+        self.max_size = max_size
+        self.size = min_size or MIN_READ_SIZE
+        self.source = source  # label for the read counters
+
+    def update(self, nread: int):
+        if nread >= self.size:
+            self.size = min(self.size * 2, self.max_size or MAX_READ_SIZE)
+        elif nread < self.size // 4:
+            self.size = max(self.size // 2, self.min_size or MIN_READ_SIZE)
+
+
+def read_chunk(fd: int, sizer: ReadSizer) -> bytes:
+    """os.read() with an adaptive size. Returns b"" on EOF."""
+    data = os.read(fd, sizer.size)
+    sizer.update(len(data))
+    if STATS.enabled:
+        _count_read(sizer.source, len(data))
+    return data
+
+
+def _count_read(source: str, nread: int):
+    STATS.counter(f"read.{source}.bytes").add(nread)
+    STATS.counter(f"read.{source}.calls").add()
+
+
+class CaptureBuffer:
+    """
+    Accumulates raw output bytes.
+
+    readinto_from(fd) reads straight into the internal buffer. Once more than
+    max_bytes have been captured the rest goes to a temporary file (`spill_path`)
+    through a reusable scratch buffer.
+    """
+
+    def __init__(self, max_bytes: int = None, initial_size: int = 64 * 1024):
+        self.max_bytes = max_bytes
+        self._buf = bytearray(initial_size)
+        self._len = 0
+        self._sizer = ReadSizer(source="capture")
+        self._spill = None
+        self._scratch = None
+        self.spilled_bytes = 0
+
+    def __len__(self):
+        return self._len + self.spilled_bytes
+
+    @property
+    def spill_path(self):
+        return self._spill.name if self._spill is not None else None
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def _reserve(self, size: int) -> int:
+        """Make room for `size` more in-memory bytes; returns how many fit under the cap."""
+        if self.max_bytes is not None:
+            size = max(0, min(size, self.max_bytes - self._len))
+        needed = self._len + size
+        if needed > len(self._buf):
+            new_size = len(self._buf) * 2
+            while new_size < needed:
+                new_size *= 2
+            self._buf.extend(bytes(new_size - len(self._buf)))
+        return size
+
+    def readinto_from(self, fd: int) -> int:
+        """Read one chunk from fd. Returns bytes read (0 on EOF)."""
+        want = self._sizer.size
+        room = self._reserve(want)
+        if room > 0:
+            view = memoryview(self._buf)[self._len:self._len + room]
+            try:
+                nread = os.readv(fd, [view])
+            finally:
+                view.release()
+            self._len += nread
+        else:
+            if self._scratch is None:
+                self._scratch = bytearray(MAX_READ_SIZE)
+            with memoryview(self._scratch) as scratch:
+                nread = os.readv(fd, [scratch[:want]])
+                self._spill_write(scratch[:nread])
+        self._sizer.update(nread)
+        if STATS.enabled:
+            _count_read("capture", nread)
+        return nread
+
+    def write(self, data):
+        """Append bytes-like data."""
+        room = self._reserve(len(data))
+        if room:
+            self._buf[self._len:self._len + room] = data[:room]
+            self._len += room
+        if room < len(data):
+            self._spill_write(memoryview(data)[room:])
+
+    def _spill_write(self, data):
+        if not data:
+            return
+        if self._spill is None:
+            self._spill = tempfile.NamedTemporaryFile(prefix="0term-capture-", suffix=".log", delete=False)
+        self._spill.write(data)
+        self.spilled_bytes += len(data)
+
+    # ---------------------------
+    # Reading
+    # ---------------------------
+    def getvalue(self) -> bytes:
+        """In-memory part of the capture (everything if nothing was spilled)."""
+        return bytes(memoryview(self._buf)[:self._len])
+
+    def text(self, errors: str = "replace") -> str:
+        """Decoded in-memory output, with a note pointing at the spill file if any."""
+        text = codecs.decode(memoryview(self._buf)[:self._len], "utf-8", errors)
+        if self._spill is not None:
+            self._spill.flush()
+            text += f"\n[output truncated: {self.spilled_bytes} more bytes in {self.spill_path}]\n"
+        return text
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+
+
+def pump_fds(streams):
+    """
+    Multiplex output fds with a selector. streams: iterable of (kind, fd).
+    Yields (kind, decoded_text, raw_bytes) as data arrives until every fd
+    reaches EOF. The fds are not closed.
+    """
+    sel = selectors.DefaultSelector()
+    decoders = {}
+    sizers = {}
+    for kind, fd in streams:
+        sel.register(fd, selectors.EVENT_READ, kind)
+        decoders[fd] = incremental_decoder()
+        sizers[fd] = ReadSizer(source="pipe")
+
+    try:
+        while sel.get_map():
+            for key, _ in sel.select():
+                fd = key.fd
+                data = read_chunk(fd, sizers[fd])
+                if not data:
+                    sel.unregister(fd)
+                    tail = decoders[fd].decode(b"", final=True)
+                    if tail:
+                        yield (key.data, tail, b"")
+                    continue
+                if STATS.enabled:
+                    start = time.perf_counter()
+                    text = decoders[fd].decode(data)
+                    STATS.histogram("decode").observe(time.perf_counter() - start)
+                else:
+                    text = decoders[fd].decode(data)
+                yield (key.data, text, data)
+    finally:
+        sel.close()
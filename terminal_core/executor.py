@@ -1,116 +1,215 @@
 # terminal_core/executor.py
 import os
 import pty
+import time
+import signal
 import subprocess
 from utils.helpers import get_dynamic_prompt
+from terminal_core.capture import CaptureBuffer, ReadSizer, incremental_decoder, pump_fds, read_chunk
+from terminal_core.pipeline import parse_pipeline, run_pipeline
+from terminal_core.metrics import STATS
+from utils.config import current as current_settings
+
 
 def execute_command_logic(command: str):
     """
     Executes given shell command and returns a dict (type, output, error).
-    Supports PTY (TUI apps), I/O redirection, and internal commands like 'cd'.
+    Supports PTY (TUI apps), pipes and I/O redirection, and internal commands like 'cd'.
+
+    Compatibility wrapper around stream_command(): output is collected in
+    memory, so prefer stream_command() for anything long-running.
     """
+    if not command.strip():
+        return {"type": "empty"}
+
+    out_parts = []
+    err_parts = []
+    for kind, payload in stream_command(command):
+        if kind == "stdout":
+            out_parts.append(payload)
+        elif kind == "stderr":
+            err_parts.append(payload)
+        elif kind == "error":
+            return {"type": "error", "message": payload}
 
+    return {"type": "success", "output": "".join(out_parts), "error": "".join(err_parts)}
+
+
+def stream_command(command: str, on_spawn=None, new_session: bool = False, cwd: str = None, env: dict = None):
+    """
+    Executes given shell command and yields its output as it arrives.
+    on_spawn(proc) is called with the Popen object right after the child starts;
+    new_session=True puts the child in its own session/process group (job control).
+    With cwd (and env), the command runs in that directory (environment) and
+    `cd` is not handled here: it goes to a child shell, so this process's
+    directory never changes.
+
+    Yields (kind, payload) tuples:
+    - ("stdout", text) / ("stderr", text): decoded output chunks, in arrival order.
+    - ("error", message): the command could not be run (nothing else but "exit" follows).
+    - ("exit", returncode): always the last item.
+    """
     parts = command.strip().split()
     if not parts:
-        return {"type": "empty"}
+        yield ("exit", 0)
+        return
+    if STATS.enabled:
+        STATS.counter("exec.commands").add()
 
     cmd = parts[0].lower()
 
     # --- Internal Command: cd ---
-    if cmd == "cd":
+    if cmd == "cd" and cwd is None:
         target_dir = parts[1] if len(parts) > 1 else os.path.expanduser("~")
         try:
             os.chdir(target_dir)
-            return {"type": "success", "output": f"Directory changed to: {os.getcwd()}"}
+            yield ("stdout", f"Directory changed to: {os.getcwd()}")
+            yield ("exit", 0)
         except FileNotFoundError:
-            return {"type": "error", "message": f"Error: Directory not found: {target_dir}"}
+            yield ("error", f"Error: Directory not found: {target_dir}")
+            yield ("exit", 1)
         except Exception as e:
-            return {"type": "error", "message": f"Error in cd: {e}"}
-
-    # --- I/O Redirection (>, >>) ---
-    target_file = None
-    redirect_type = None
-    command_to_run = command
-
-    if ">" in parts or ">>" in parts:
-        if ">>" in parts:
-            redirect_type = "append"
-            redirect_index = parts.index(">>")
-        else:
-            redirect_type = "write"
-            redirect_index = parts.index(">")
-        try:
-            command_to_run = " ".join(parts[:redirect_index])
-            target_file = parts[redirect_index + 1]
-        except (ValueError, IndexError):
-            return {"type": "error", "message": "Error: Missing filename for redirection."}
-
-    # --- Detect if command needs PTY (TUI) ---
-    tui_required = False
-    TUI_APPS = ["nano", "vi", "vim", "micro", "top", "htop", "less", "man"]
-    if cmd in TUI_APPS:
-        tui_required = True
-
-    # --- Run the command ---
+            yield ("error", f"Error in cd: {e}")
+            yield ("exit", 1)
+        return
+
+    # --- Run inside a PTY if it is a TUI app ---
+    if cmd in current_settings().tui_apps:
+        yield from stream_pty(command, cwd=cwd, env=env)
+        return
+
+    # --- Pipes and redirections (|, <, >, >>, 2>, 2>&1, &>) without a shell ---
+    pipeline = parse_pipeline(command, path=env.get("PATH") if env is not None else None)
+    if pipeline is not None:
+        yield from run_pipeline(pipeline, on_spawn=on_spawn, new_session=new_session, cwd=cwd, env=env)
+        return
+
+    # --- Anything else (variables, globs, &&, ;, ...) goes through the shell ---
+    started = time.perf_counter()
     try:
-        if tui_required:
-            output = run_in_pty(command_to_run)
-            return {"type": "success", "output": output}
-
-        else:
-            result = subprocess.run(
-                command_to_run,
-                shell=True,
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                check=False,
-            )
-
-            output = result.stdout
-            error = result.stderr
-
-            # --- Write to file if redirection is used ---
-            if target_file:
-                mode = "w" if redirect_type == "write" else "a"
-                try:
-                    with open(target_file, mode, encoding="utf-8") as f:
-                        f.write(output)
-                    msg = f"Output {'written' if mode == 'w' else 'appended'} to '{target_file}'."
-                    return {"type": "success", "output": msg, "error": error}
-                except Exception as e:
-                    return {"type": "error", "message": f"File write error: {e}"}
-
-            return {"type": "success", "output": output, "error": error}
-
-    except FileNotFoundError:
-        return {"type": "error", "message": f"Error: Command not found: {cmd}"}
+        proc = subprocess.Popen(
+            command,
+            shell=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=new_session,
+            cwd=cwd,
+            env=env,
+        )
     except Exception as e:
-        return {"type": "error", "message": f"Unexpected error: {e}"}
+        yield ("error", f"Unexpected error: {e}")
+        yield ("exit", 1)
+        return
 
+    if STATS.enabled:
+        STATS.histogram("exec.spawn").observe(time.perf_counter() - started)
+    if on_spawn is not None:
+        on_spawn(proc)
 
-def run_in_pty(command: str) -> str:
-    """
-    Runs a command inside a pseudo-terminal (PTY) to support TUI applications.
-    Returns the captured output as text.
-    """
-    output = b""
+    try:
+        streams = (("stdout", proc.stdout.fileno()), ("stderr", proc.stderr.fileno()))
+        for kind, text, _ in pump_fds(streams):
+            if text:
+                yield (kind, text)
+        returncode = proc.wait()
+    finally:
+        # Generator closed early (consumer stopped): do not leak the child
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        for pipe in (proc.stdout, proc.stderr):
+            if pipe:
+                pipe.close()
+
+    yield ("exit", returncode)
+
+
+def _fork_pty(command: str, cwd: str = None, env: dict = None):
+    """Start `bash -c command` on a new PTY. Returns (pid, master fd)."""
     pid, fd = pty.fork()
-
     if pid == 0:
         # Child process executes the command
-        os.execvp("bash", ["bash", "-c", command])
-    else:
-        # Parent process reads PTY output
         try:
-            while True:
-                data = os.read(fd, 1024)
-                if not data:
-                    break
-                output += data
-        except OSError:
-            pass
+            if cwd is not None:
+                os.chdir(cwd)
+            os.execvpe("bash", ["bash", "-c", command], os.environ if env is None else env)
         finally:
-            os.close(fd)
+            os._exit(127)
+    return pid, fd
 
-    return output.decode("utf-8", errors="ignore")
+
+def _reap_pty(pid: int, fd: int) -> int:
+    """Close the PTY and wait for the child. Returns its exit code (-N: killed by signal N)."""
+    os.close(fd)
+    try:
+        _, status = os.waitpid(pid, 0)
+    except ChildProcessError:
+        return -1
+    return os.waitstatus_to_exitcode(status)
+
+
+def stream_pty(command: str, cwd: str = None, env: dict = None):
+    """
+    Runs a command inside a pseudo-terminal (PTY) to support TUI applications,
+    yielding ("stdout", text) chunks as they are read and finally
+    ("exit", returncode), like stream_command().
+    """
+    try:
+        pid, fd = _fork_pty(command, cwd, env)
+    except OSError as e:
+        yield ("error", f"Failed to fork PTY: {e}")
+        yield ("exit", 1)
+        return
+
+    decoder = incremental_decoder()
+    sizer = ReadSizer(source="pty")
+    finished = False
+    try:
+        while True:
+            try:
+                data = read_chunk(fd, sizer)
+            except OSError:
+                break  # EIO once the child side of the PTY is closed
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                yield ("stdout", text)
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield ("stdout", text)
+        finished = True
+    finally:
+        if not finished:
+            # Generator closed early (consumer stopped): do not leak the child
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        returncode = _reap_pty(pid, fd)
+    yield ("exit", returncode)
+
+
+def run_in_pty(command: str, max_bytes: int = None, cwd: str = None, env: dict = None):
+    """
+    Runs a command inside a pseudo-terminal (PTY) to support TUI applications.
+    Returns (output text, returncode). With max_bytes, output beyond the cap
+    is spilled to a temporary file whose path is noted in the returned text.
+    """
+    capture = CaptureBuffer(max_bytes=max_bytes)
+    pid, fd = _fork_pty(command, cwd, env)
+    # Read PTY output straight into the capture buffer
+    try:
+        while capture.readinto_from(fd):
+            pass
+    except OSError:
+        # EIO once the child side of the PTY is closed
+        pass
+    finally:
+        returncode = _reap_pty(pid, fd)
+
+    try:
+        return capture.text(), returncode
+    finally:
+        capture.close()
@@ -0,0 +1,262 @@
+# terminal_core/jobs.py
+"""
+Job control for 0Term.
+
+Every command becomes a Job tracked by a JobManager:
+- foreground jobs run one at a time, in submission order, on a single worker;
+- background jobs (trailing `&`) run on a bounded pool, each child in its own
+  process group so signals reach the whole pipeline.
+
+A job's output events are routed to its own JobOutput buffer. A listener (the
+GUI) can attach to a job to receive buffered output followed by live output;
+detached jobs keep accumulating into their buffer (bounded) until `fg`.
+"""
+import os
+import signal
+import threading
+from collections import deque
+
+# Per-job output kept while no listener is attached (characters)
+JOB_OUTPUT_LIMIT = 1024 * 1024
+
+
+class JobOutput:
+    """Bounded buffer of (kind, text) events with an optional live listener."""
+
+    def __init__(self, limit: int = JOB_OUTPUT_LIMIT):
+        self.limit = limit
+        self.dropped_chars = 0
+        self._events = deque()
+        self._size = 0
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def put(self, kind: str, text: str):
+        with self._lock:
+            listener = self._listener
+            if listener is None:
+                self._events.append((kind, text))
+                self._size += len(text)
+                while self._size > self.limit and len(self._events) > 1:
+                    _, old = self._events.popleft()
+                    self._size -= len(old)
+                    self.dropped_chars += len(old)
+                return
+        listener(kind, text)
+
+    def attach(self, listener):
+        """Replay buffered events to listener, then deliver new ones live."""
+        with self._lock:
+            events, self._events = self._events, deque()
+            self._size = 0
+            if self.dropped_chars:
+                listener("stderr", f"[{self.dropped_chars} characters of earlier output dropped]\n")
+                self.dropped_chars = 0
+            for kind, text in events:
+                listener(kind, text)
+            self._listener = listener
+
+    def detach(self):
+        with self._lock:
+            self._listener = None
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._size
+
+
+class Job:
+    """A command tracked by the JobManager."""
+
+    def __init__(self, job_id: int, command: str, background: bool):
+        self.id = job_id
+        self.command = command
+        self.background = background
+        self.state = "queued"  # queued -> running -> done | killed
+        self.returncode = None
+        self.proc = None
+        self.interrupt_handler = None  # optional callable(sig) for jobs without their own pgid
+        self.output = JobOutput()
+        self.finished = threading.Event()
+        self.reported = False  # "Done" notice printed
+
+    @property
+    def pid(self):
+        return self.proc.pid if self.proc is not None else None
+
+    def set_process(self, proc):
+        self.proc = proc
+
+    def send_signal(self, sig: int) -> bool:
+        """Signal the job's whole process group. Returns False if there is nothing to signal."""
+        if self.finished.is_set():
+            return False
+        if self.proc is not None:
+            try:
+                os.killpg(self.proc.pid, sig)
+                return True
+            except ProcessLookupError:
+                return False
+        if self.interrupt_handler is not None:
+            self.interrupt_handler(sig)
+            return True
+        if self.state == "queued":
+            # never started: just make sure it will not run
+            self.state = "killed"
+            return True
+        return False
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.finished.wait(timeout)
+
+    def describe(self) -> str:
+        pid = f" {self.pid}" if self.pid else ""
+        return f"[{self.id}]{pid}  {self.state:<8} {self.command}"
+
+
+def process_runner(job: Job):
+    """Default runner: the command in its own process group via stream_command."""
+    # Imported on first use: the executor pulls in subprocess/pty, which app startup does not need
+    from terminal_core.executor import stream_command
+    return stream_command(job.command, on_spawn=job.set_process, new_session=True)
+
+
+class JobManager:
+    """
+    Tracks jobs and runs them on bounded executors.
+
+    on_finish(job, was_foreground) is called from the worker thread when a job ends.
+    """
+
+    def __init__(self, max_background: int = 4, on_finish=None):
+        self.on_finish = on_finish
+        self.max_background = max_background
+        # Pools are created on first submit (concurrent.futures is slow to import at startup)
+        self._foreground_pool = None
+        self._background_pool = None
+        self._jobs = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.foreground = None  # Job currently attached to the terminal, if any
+
+    def submit(self, command: str, background: bool = False, runner=process_runner, listener=None) -> Job:
+        """
+        Queue a command. runner(job) must return an iterator of executor events
+        (see terminal_core.executor.stream_command). A foreground job becomes
+        `self.foreground` immediately; listener, if given, is attached before it starts.
+        """
+        with self._lock:
+            job = Job(self._next_id, command, background)
+            self._next_id += 1
+            self._jobs[job.id] = job
+            if not background:
+                self.foreground = job
+            if listener is not None:
+                job.output.attach(listener)
+            pool = self._pool(background)
+        pool.submit(self._run, job, runner)
+        return job
+
+    def _pool(self, background: bool):
+        """The executor for foreground/background jobs (caller holds _lock)."""
+        if background:
+            if self._background_pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._background_pool = ThreadPoolExecutor(max_workers=self.max_background,
+                                                           thread_name_prefix="0term-bg")
+            return self._background_pool
+        if self._foreground_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._foreground_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="0term-fg")
+        return self._foreground_pool
+
+    def bring_to_foreground(self, job: Job, listener) -> bool:
+        """
+        `fg`: attach listener to a running job and make it the foreground job.
+        Returns False if the job already finished (its buffered output stays readable).
+        """
+        with self._lock:
+            if job.finished.is_set() or self.foreground is not None:
+                return False
+            self.foreground = job
+            job.output.attach(listener)
+            return True
+
+    def _run(self, job: Job, runner):
+        if job.state == "killed":
+            self._finish(job)
+            return
+        job.state = "running"
+        try:
+            for kind, payload in runner(job):
+                if kind == "exit":
+                    job.returncode = payload
+                else:
+                    job.output.put(kind, payload)
+        except Exception as e:
+            job.output.put("error", f"Job error: {e}")
+            job.returncode = -1
+        if job.state == "running":
+            job.state = "killed" if job.returncode is not None and job.returncode < 0 else "done"
+        self._finish(job)
+
+    def _finish(self, job: Job):
+        with self._lock:
+            job.finished.set()
+            was_foreground = self.foreground is job
+            if was_foreground:
+                self.foreground = None
+            # Finished background jobs stay listed until reported once
+            if not job.background:
+                self._jobs.pop(job.id, None)
+        job.output.detach()
+        if self.on_finish is not None:
+            self.on_finish(job, was_foreground)
+
+    # ---------------------------
+    # Queries / control
+    # ---------------------------
+    def get(self, job_id: int):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.id)
+
+    def last_background(self):
+        jobs = [j for j in self.list() if j.background and not j.finished.is_set()]
+        return jobs[-1] if jobs else None
+
+    def collect_finished(self) -> list:
+        """
+        Finished background jobs not reported yet (for "Done" notices). Jobs with
+        no buffered output are forgotten; the others stay until `fg` shows them.
+        """
+        with self._lock:
+            done = [j for j in self._jobs.values() if j.finished.is_set() and not j.reported]
+            for job in done:
+                job.reported = True
+                if not job.output.pending():
+                    del self._jobs[job.id]
+        return sorted(done, key=lambda j: j.id)
+
+    def forget(self, job: Job):
+        with self._lock:
+            self._jobs.pop(job.id, None)
+
+    def kill(self, job_id: int, sig: int = signal.SIGTERM) -> bool:
+        job = self.get(job_id)
+        return job.send_signal(sig) if job is not None else False
+
+    def interrupt_foreground(self) -> bool:
+        """Ctrl-C: SIGINT to the foreground job's process group."""
+        job = self.foreground
+        return job.send_signal(signal.SIGINT) if job is not None else False
+
+    def shutdown(self):
+        for job in self.list():
+            job.send_signal(signal.SIGHUP)
+        for pool in (self._foreground_pool, self._background_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
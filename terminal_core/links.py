@@ -0,0 +1,209 @@
+# terminal_core/links.py
+"""
+URL and file path detection for terminal output.
+
+One precompiled alternation recognizes URLs, Python traceback locations
+(`File "x.py", line 3`) and path candidates (`src/app.py:12:5`, `./x`, `/etc/hosts`,
+`~/notes.md`, `name.ext:line`). It is only tried on the words around a "/",
+":" or '"', which a C-level search finds in a whole chunk of text at once;
+positions are mapped to lines by bisecting the newline offsets, as in
+terminal_core.search. Path candidates become links only if they exist,
+checked through a StatCache that remembers stat() results per (cwd, path):
+compiler output naming the same file a thousand times costs one stat().
+
+LinkDetector scans newly arrived lines on a worker thread and hands the links
+back through a callback; OSC 8 hyperlinks need no detection (the SGR parser
+carries them in Style.link).
+"""
+import os
+import re
+import time
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+from terminal_core.workers import get_worker
+
+_PATH_CHARS = r"[\w.+@%=,-]"
+_LINKS = re.compile(
+    # URLs (trailing punctuation is trimmed afterwards)
+    r"(?P<url>\b(?:https?|ftp|file)://[^\s<>\"'`]+)"
+    # Python tracebacks: File "path", line N
+    r"|File \"(?P<pyfile>[^\"\n]+)\", line (?P<pyline>\d+)"
+    # Paths: with a slash, or a bare file name with an extension followed by :line
+    rf"|(?<![\w/.~-])(?P<path>(?:~|\.{{1,2}})?/?(?:{_PATH_CHARS}+/)+{_PATH_CHARS}+/?"
+    rf"|{_PATH_CHARS}*\w\.[A-Za-z]\w{{0,7}}(?=:\d))"
+    r"(?::(?P<line>\d+)(?::(?P<col>\d+))?)?"
+)
+_URL_TRAILER = ".,;:!?'\")]}>"
+_ANCHOR = re.compile(r"[/:\"]")
+
+# Lines longer than this are not scanned (minified JSON, base64 dumps...)
+MAX_LINE_CHARS = 4096
+# Text queued for the worker at most; a flood beyond that is not scanned
+MAX_PENDING_CHARS = 4 * 1024 * 1024
+
+
+class Link:
+    """A detected link: columns start..end of `line` open `target` (a URL or an absolute path)."""
+
+    __slots__ = ("line", "start", "end", "target", "file_line", "file_column")
+
+    def __init__(self, line: int, start: int, end: int, target: str, file_line: int = None,
+                 file_column: int = None):
+        self.line = line
+        self.start = start
+        self.end = end
+        self.target = target
+        self.file_line = file_line  # for paths: line and column given after the name, if any
+        self.file_column = file_column
+
+    @property
+    def is_url(self) -> bool:
+        return not self.target.startswith("/")
+
+    def __repr__(self):
+        return f"Link({self.line}, {self.start}, {self.end}, {self.target!r}, {self.file_line}, {self.file_column})"
+
+
+class StatCache:
+    """
+    resolve(cwd, path) -> absolute path if it exists, else None. Results are
+    remembered for `ttl` seconds (at most `max_entries`, least recently used
+    dropped first). Not thread-safe: it belongs to the detector's worker.
+    """
+
+    def __init__(self, ttl: float = 10.0, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (cwd, path) -> (checked_at, absolute path or None)
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, cwd: str, path: str):
+        key = (cwd, path)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        full = os.path.normpath(os.path.join(cwd, os.path.expanduser(path)))
+        resolved = full if os.path.exists(full) else None
+        self._entries[key] = (now, resolved)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return resolved
+
+
+def find_links(text: str, cwd: str, stat_cache: StatCache, first_line: int = 0, first_column: int = 0) -> list:
+    """
+    Links in text (any number of lines). Line numbers count from first_line;
+    columns on the first line are shifted by first_column (text continues a
+    line that started earlier).
+    """
+    offsets = [0]
+    find = text.find
+    pos = find("\n")
+    while pos >= 0:
+        offsets.append(pos + 1)
+        pos = find("\n", pos + 1)
+    offsets.append(len(text) + 1)
+
+    # _LINKS is only tried on space-delimited words holding a "/" or ":" (and on
+    # traceback lines); everything in between is skipped by _ANCHOR at C speed
+    links = []
+    pos = 0
+    end_of_text = len(text)
+    while pos < end_of_text:
+        anchor = _ANCHOR.search(text, pos)
+        if anchor is None:
+            break
+        hit = anchor.start()
+        row = bisect_right(offsets, hit) - 1
+        line_start, line_end = offsets[row], offsets[row + 1] - 1
+        if line_end - line_start > MAX_LINE_CHARS:
+            pos = line_end + 1
+            continue
+        if text[hit] == "\"":
+            if not text.startswith("File ", hit - 5):
+                pos = hit + 1
+                continue
+            start, stop = hit - 5, line_end
+        else:
+            start = max(text.rfind(" ", line_start, hit) + 1, line_start)
+            stop = text.find(" ", hit, line_end)
+            if stop < 0:
+                stop = line_end
+            token = text[start:stop]
+            if "/" not in token and "." not in token:
+                pos = stop + 1
+                continue  # "12:00", "error:" - a lone ":" needs name.ext before it
+        pos = stop + 1
+        match = _LINKS.search(text, start, stop)
+        if match is None:
+            continue
+        begin = match.start()
+        url = match.group("url")
+        if url is not None:
+            url = url.rstrip(_URL_TRAILER) if not url.endswith(")") or "(" not in url else url
+            end = begin + len(url)
+            target, file_line, file_column = url, None, None
+        else:
+            pyfile = match.group("pyfile")
+            if pyfile is not None:
+                begin, end = match.span("pyfile")
+                target = stat_cache.resolve(cwd, pyfile)
+                file_line, file_column = int(match.group("pyline")), None
+            else:
+                end = match.end()
+                target = stat_cache.resolve(cwd, match.group("path"))
+                file_line = int(match.group("line")) if match.group("line") else None
+                file_column = int(match.group("col")) if match.group("col") else None
+            if target is None:
+                continue
+        shift = first_column if row == 0 else 0
+        links.append(Link(first_line + row, begin - line_start + shift, end - line_start + shift, target,
+                          file_line, file_column))
+    return links
+
+
+class LinkDetector:
+    """
+    scan() queues text for the worker thread; on_links(token, links) is
+    called there with what was found (not called when nothing was). The
+    token is passed through unchanged, e.g. to discard results for a widget
+    that has been cleared meanwhile. While more than MAX_PENDING_CHARS wait
+    to be scanned, scan() drops the text and returns False.
+    """
+
+    def __init__(self, on_links, stat_cache: StatCache = None):
+        self.on_links = on_links
+        self.stat_cache = stat_cache or StatCache()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.skipped_chars = 0
+
+    def scan(self, text: str, cwd: str, first_line: int, first_column: int = 0, token=None) -> bool:
+        with self._lock:
+            if self._pending > MAX_PENDING_CHARS:
+                self.skipped_chars += len(text)
+                return False
+            self._pending += len(text)
+        get_worker("links").submit(self._scan, text, cwd, first_line, first_column, token)
+        return True
+
+    def _scan(self, text, cwd, first_line, first_column, token):
+        try:
+            links = find_links(text, cwd, self.stat_cache, first_line, first_column)
+        except Exception:
+            import traceback
+            traceback.print_exc()
+            return
+        finally:
+            with self._lock:
+                self._pending -= len(text)
+        if links:
+            self.on_links(token, links)
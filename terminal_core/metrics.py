@@ -0,0 +1,304 @@
+# terminal_core/metrics.py
+"""
+Lightweight runtime instrumentation.
+
+STATS is a process-wide registry of counters, gauges and latency histograms.
+Hot paths guard every update with `if STATS.enabled:` so a disabled registry
+costs one attribute check. Counters and histograms are lock-free: each thread
+updates its own cell (keyed by thread id) and readers sum the cells, so
+writers never contend and never need a lock.
+
+Metric names are dotted, e.g. "read.pty.bytes", "gui.insert", "exec.spawn".
+
+ProfileCapture toggles cProfile (main thread) or tracemalloc and dumps the
+result to a file when stopped. StartupProfile collects the phase timings
+printed by `app.py --startup-profile`.
+"""
+import os
+import time
+import threading
+from threading import get_ident
+
+# Histogram buckets: bucket i holds durations below 2**i microseconds
+HISTOGRAM_BUCKETS = 28  # up to ~134 s
+
+
+class Counter:
+    __slots__ = ("name", "_cells")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._cells = {}  # thread id -> [value]
+
+    def add(self, amount: int = 1):
+        cells = self._cells
+        cell = cells.get(get_ident())
+        if cell is None:
+            cell = cells.setdefault(get_ident(), [0])
+        cell[0] += amount
+
+    @property
+    def value(self) -> int:
+        return sum(cell[0] for cell in list(self._cells.values()))
+
+    def reset(self):
+        self._cells = {}
+
+
+class Gauge:
+    """Last value set plus the maximum seen (single writer expected)."""
+
+    __slots__ = ("name", "value", "max")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+        self.max = 0
+
+    def set(self, value):
+        self.value = value
+        if value > self.max:
+            self.max = value
+
+    def reset(self):
+        self.value = self.max = 0
+
+
+class Histogram:
+    """Log2-bucketed durations (seconds in, microsecond buckets)."""
+
+    __slots__ = ("name", "_cells")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._cells = {}  # thread id -> [bucket counts..., total seconds, max seconds]
+
+    def observe(self, seconds: float):
+        cells = self._cells
+        cell = cells.get(get_ident())
+        if cell is None:
+            cell = cells.setdefault(get_ident(), [0] * HISTOGRAM_BUCKETS + [0.0, 0.0])
+        bucket = min(int(seconds * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)
+        cell[bucket] += 1
+        cell[HISTOGRAM_BUCKETS] += seconds
+        if seconds > cell[HISTOGRAM_BUCKETS + 1]:
+            cell[HISTOGRAM_BUCKETS + 1] = seconds
+
+    def summary(self) -> dict:
+        """count, mean/max and approximate p50/p95/p99 (bucket upper bounds), in ms."""
+        counts = [0] * HISTOGRAM_BUCKETS
+        total = peak = 0.0
+        for cell in list(self._cells.values()):
+            for i in range(HISTOGRAM_BUCKETS):
+                counts[i] += cell[i]
+            total += cell[HISTOGRAM_BUCKETS]
+            peak = max(peak, cell[HISTOGRAM_BUCKETS + 1])
+        n = sum(counts)
+        result = {"count": n, "mean_ms": round(total / n * 1000, 3) if n else 0.0,
+                  "max_ms": round(peak * 1000, 3)}
+        for label, q in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            result[label] = 0.0
+            if n:
+                seen, rank = 0, q * n
+                for i, c in enumerate(counts):
+                    seen += c
+                    if seen >= rank:
+                        result[label] = min((1 << i) / 1000, result["max_ms"])
+                        break
+        return result
+
+    def reset(self):
+        self._cells = {}
+
+
+class Stats:
+    def __init__(self):
+        self.enabled = False
+        self.since = time.monotonic()
+        self._metrics = {}
+
+    def _get(self, cls, name):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics.setdefault(name, cls(name))
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get(Counter, name)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get(Gauge, name)
+
+    def histogram(self, name: str) -> Histogram:
+        return self._get(Histogram, name)
+
+    def enable(self, enabled: bool = True):
+        if enabled and not self.enabled:
+            self.reset()
+        self.enabled = enabled
+
+    def reset(self):
+        for metric in list(self._metrics.values()):
+            metric.reset()
+        self.since = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """{name: value | {value, max} | histogram summary} plus "elapsed_s"."""
+        out = {"elapsed_s": round(time.monotonic() - self.since, 3)}
+        for name, metric in sorted(self._metrics.items()):
+            if isinstance(metric, Counter):
+                out[name] = metric.value
+            elif isinstance(metric, Gauge):
+                out[name] = {"value": metric.value, "max": metric.max}
+            else:
+                out[name] = metric.summary()
+        return out
+
+    def format(self) -> list:
+        """Human-readable lines for the stats overlay."""
+        snap = self.snapshot()
+        elapsed = snap.pop("elapsed_s") or 1e-9
+        lines = [f"stats over {elapsed:.1f}s"]
+        for name, value in snap.items():
+            if isinstance(value, int):
+                rate = value / elapsed
+                if name.endswith("bytes") or name.endswith("chars"):
+                    lines.append(f"{name:<24} {_human(value):>9}  {_human(rate)}/s")
+                else:
+                    lines.append(f"{name:<24} {value:>9}  {rate:.1f}/s")
+            elif "count" in value:
+                if value["count"]:
+                    lines.append(f"{name:<24} n={value['count']:<7} p50 {value['p50_ms']:.2f}ms "
+                                 f"p95 {value['p95_ms']:.2f}ms max {value['max_ms']:.2f}ms")
+            else:
+                lines.append(f"{name:<24} {value['value']:>9}  max {value['max']}")
+        return lines
+
+
+def _human(amount: float) -> str:
+    for unit in ("", "K", "M", "G"):
+        if amount < 1024 or unit == "G":
+            return f"{amount:.0f}{unit}" if unit == "" else f"{amount:.1f}{unit}"
+        amount /= 1024
+    return str(amount)
+
+
+STATS = Stats()
+
+
+class ProfileCapture:
+    """
+    On-demand cProfile / tracemalloc capture.
+
+    cProfile only sees the thread that calls start() (the Tk main thread in the
+    GUI), which is where inserts, rendering and frame scheduling happen.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = directory  # default: the system temp dir, resolved on first dump
+        self._profile = None
+        self._tracing = False
+
+    @property
+    def profiling(self) -> bool:
+        return self._profile is not None
+
+    @property
+    def tracing(self) -> bool:
+        return self._tracing
+
+    def _path(self, kind: str, suffix: str) -> str:
+        if self.directory is None:
+            import tempfile
+            self.directory = tempfile.gettempdir()
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"0term-{kind}-{time.strftime('%Y%m%d-%H%M%S')}{suffix}")
+
+    def start_profile(self):
+        import cProfile
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop_profile(self) -> str:
+        """Stop profiling and dump pstats data; returns the file path."""
+        profile, self._profile = self._profile, None
+        if profile is None:
+            return None
+        profile.disable()
+        path = self._path("profile", ".prof")
+        profile.dump_stats(path)
+        return path
+
+    def start_tracemalloc(self, frames: int = 10):
+        import tracemalloc
+        tracemalloc.start(frames)
+        self._tracing = True
+
+    def stop_tracemalloc(self, top: int = 5):
+        """Stop tracing and dump a snapshot; returns (path, top allocation sites as text)."""
+        import tracemalloc
+        if not self._tracing:
+            return None, []
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self._tracing = False
+        path = self._path("tracemalloc", ".snapshot")
+        snapshot.dump(path)
+        lines = [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+        return path, lines
+
+
+class StartupProfile:
+    """
+    Phase timings for `--startup-profile`.
+
+    mark(phase) closes a sequential main-thread phase (time since the previous
+    mark); measure(phase) times a block on any thread (imports, background init).
+    Offsets are relative to the profile's creation.
+    """
+
+    def __init__(self, origin: float = None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self._last = time.perf_counter()
+        self._lock = threading.Lock()
+        self.phases = []  # (phase, duration s, end offset s, thread name)
+
+    def _add(self, phase: str, duration: float, end: float):
+        with self._lock:
+            self.phases.append((phase, duration, end - self.origin, threading.current_thread().name))
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self._add(phase, now - self._last, now)
+        self._last = now
+
+    def measure(self, phase: str):
+        return _Measure(self, phase)
+
+    def report(self) -> str:
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p[2])
+        lines = [f"{'phase':<40} {'ms':>8} {'at ms':>8}  thread"]
+        for phase, duration, end, thread in phases:
+            lines.append(f"{phase:<40} {duration * 1000:8.1f} {end * 1000:8.1f}  {thread}")
+        return "\n".join(lines)
+
+
+class _Measure:
+    __slots__ = ("profile", "phase", "start")
+
+    def __init__(self, profile, phase):
+        self.profile = profile
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profile._add(self.phase, end - self.start, end)
+        if threading.current_thread() is threading.main_thread():
+            self.profile._last = end
+        return False
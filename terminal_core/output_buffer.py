@@ -0,0 +1,268 @@
+# terminal_core/output_buffer.py
+"""
+Thread-safe output ring buffer shared by producer threads and the GUI.
+
+Producer threads (command runners, PTY readers) call write() with decoded text.
+The GUI main thread calls drain() once per frame and receives the pending text
+already coalesced into (text, tag) runs, so one frame costs one widget insert
+no matter how many chunks arrived in between.
+
+Flow control: a producer thread calls throttle() after writing. It blocks
+while more than the high watermark is pending and resumes once the consumer
+has drained down to the low watermark. Since the producer stops reading its
+pipe or PTY meanwhile, the kernel blocks the child's writes and a flood runs
+at render speed in bounded memory. In fast-forward mode producers are never
+blocked: only the newest `fast_forward_chars` of pending text are kept, and
+one marker line says how much was skipped.
+"""
+import time
+import threading
+from collections import deque
+
+# Watermarks in frames' worth of text (max_chars_per_frame): at most this
+# much output is waiting to render when a producer is stopped / let go again
+HIGH_WATER_FRAMES = 8
+LOW_WATER_FRAMES = 2
+
+
+def skipped_marker(chars: int) -> str:
+    if chars >= 1000000:
+        size = f"{chars / 1e6:.1f} MB"
+    elif chars >= 1000:
+        size = f"{chars / 1e3:.1f} KB"
+    else:
+        size = f"{chars} bytes"
+    return f"\n[fast-forward: skipped {size} of output]\n"
+
+
+class OutputBuffer:
+    """
+    Bounded FIFO of (text, tag) chunks plus ordered callbacks.
+
+    - capacity: maximum number of characters held; when exceeded, the oldest
+      text is discarded and counted in `dropped_chars`.
+    - max_chars_per_frame: upper bound of characters returned by one drain().
+    - high_water / low_water: throttle() thresholds in characters (default:
+      HIGH_WATER_FRAMES / LOW_WATER_FRAMES frames' worth).
+
+    Callbacks queued with call_soon() run in order relative to text, which
+    lets the GUI update marks (e.g. the prompt start) right after the text
+    they depend on has been inserted.
+    """
+
+    def __init__(self, capacity: int = 8 * 1024 * 1024, max_chars_per_frame: int = 256 * 1024,
+                 high_water: int = None, low_water: int = None):
+        self.capacity = capacity
+        self.max_chars_per_frame = max_chars_per_frame
+        self.high_water = high_water
+        self.low_water = low_water
+        self.fast_forward_chars = 0  # > 0: fast-forward mode, keep this much pending text
+
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)  # notified when pending text falls to low water
+        self._chunks = deque()  # items: (text, tag) or (callable, None)
+        self._size = 0
+        self._armed = False  # True while the consumer has a drain scheduled
+        self._consumer = threading.get_ident()  # the thread that drains (never throttled)
+        self._released = False
+        self._skipped = 0  # characters skipped since the last marker was drained
+
+        # --- Counters ---
+        self.frames = 0
+        self.coalesced_frames = 0
+        self.dropped_frames = 0
+        self.dropped_chars = 0
+        self.chunks_written = 0
+        self.skipped_chars = 0
+        self.throttled = 0  # times a producer was blocked
+        self.throttled_seconds = 0.0
+
+    # ---------------------------
+    # Producer side
+    # ---------------------------
+    def write(self, text: str, tag: str = "default") -> bool:
+        """
+        Append text. Returns True if the consumer must be woken up (the buffer
+        was idle), False if a drain is already scheduled.
+        """
+        if not text:
+            return False
+        with self._lock:
+            self._chunks.append((text, tag))
+            self._size += len(text)
+            self.chunks_written += 1
+            keep = self.fast_forward_chars
+            if keep and self._size > 2 * keep:
+                skipped = self._trim_locked(keep)
+                self._skipped += skipped
+                self.skipped_chars += skipped
+            elif self._size > self.capacity:
+                self.dropped_chars += self._trim_locked(self.capacity)
+            return self._arm_locked()
+
+    def throttle(self, timeout: float = None) -> bool:
+        """
+        Producer side: block while more than the high watermark is pending,
+        until the consumer has drained down to the low watermark. Returns at
+        once in fast-forward mode, after release(), and on the consumer's own
+        thread (which would wait for itself). Returns False on timeout.
+        """
+        if threading.get_ident() == self._consumer:
+            return True
+        with self._lock:
+            if self._size <= self._high_water() or self.fast_forward_chars or self._released:
+                return True
+            started = time.monotonic()
+            self.throttled += 1
+            low = self._low_water()
+            done = self._drained.wait_for(
+                lambda: self._size <= low or self.fast_forward_chars or self._released, timeout)
+            self.throttled_seconds += time.monotonic() - started
+            return done
+
+    def set_fast_forward(self, keep_chars: int):
+        """keep_chars > 0: fast-forward, keeping that much pending text; 0: throttle producers."""
+        with self._lock:
+            self.fast_forward_chars = max(0, keep_chars)
+            self._drained.notify_all()
+
+    def release(self):
+        """Stop blocking producers for good (the consumer is going away)."""
+        with self._lock:
+            self._released = True
+            self._drained.notify_all()
+
+    def _high_water(self) -> int:
+        return self.high_water or HIGH_WATER_FRAMES * self.max_chars_per_frame
+
+    def _low_water(self) -> int:
+        return self.low_water or LOW_WATER_FRAMES * self.max_chars_per_frame
+
+    def call_soon(self, callback) -> bool:
+        """Queue a callback to run on the consumer thread after preceding text."""
+        with self._lock:
+            self._chunks.append((callback, None))
+            return self._arm_locked()
+
+    def touch(self) -> bool:
+        """
+        Request a frame without queueing text (e.g. a screen model changed).
+        Same return value as write().
+        """
+        with self._lock:
+            return self._arm_locked()
+
+    def _arm_locked(self) -> bool:
+        if self._armed:
+            return False
+        self._armed = True
+        return True
+
+    def _trim_locked(self, limit: int) -> int:
+        # Drop oldest text (never callbacks) until at most `limit` is left; returns how much.
+        excess = self._size - limit
+        dropped = 0
+        kept = deque()
+        while excess > 0 and self._chunks:
+            item, tag = self._chunks.popleft()
+            if tag is None:
+                kept.append((item, tag))
+                continue
+            if len(item) <= excess:
+                excess -= len(item)
+                dropped += len(item)
+            else:
+                self._chunks.appendleft((item[excess:], tag))
+                dropped += excess
+                excess = 0
+        self._size -= dropped
+        self._chunks.extendleft(reversed(kept))
+        return dropped
+
+    # ---------------------------
+    # Consumer side
+    # ---------------------------
+    def drain(self):
+        """
+        Pop up to max_chars_per_frame characters of pending output.
+
+        Returns a list of items, each either ("text", [(text, tag), ...]) with
+        adjacent same-tag chunks merged, or ("call", callback). Text skipped by
+        fast-forward shows up as one "info" run in place of what was dropped.
+        """
+        budget = self.max_chars_per_frame
+        items = []
+        runs = []
+        merged = 0
+
+        with self._lock:
+            if self._skipped:
+                runs.append(([skipped_marker(self._skipped)], "info"))
+                self._skipped = 0
+            while self._chunks and budget > 0:
+                item, tag = self._chunks.popleft()
+                if tag is None:
+                    if runs:
+                        items.append(("text", _join_runs(runs)))
+                        runs = []
+                    items.append(("call", item))
+                    continue
+                if len(item) > budget:
+                    self._chunks.appendleft((item[budget:], tag))
+                    item = item[:budget]
+                budget -= len(item)
+                self._size -= len(item)
+                merged += 1
+                if runs and runs[-1][1] == tag:
+                    runs[-1][0].append(item)
+                else:
+                    runs.append(([item], tag))
+            if runs:
+                items.append(("text", _join_runs(runs)))
+
+            self.frames += 1
+            if merged > 1:
+                self.coalesced_frames += 1
+            if self._size <= self._low_water():
+                self._drained.notify_all()
+        return items
+
+    def finish_frame(self) -> bool:
+        """
+        Called by the consumer after a drain. Returns True if more data is
+        pending and another frame must be scheduled; otherwise disarms.
+        """
+        with self._lock:
+            if self._chunks:
+                return True
+            self._armed = False
+            return False
+
+    def pending(self) -> int:
+        """Number of characters waiting to be drained."""
+        with self._lock:
+            return self._size
+
+    def clear(self):
+        with self._lock:
+            self._chunks = deque((cb, None) for cb, tag in self._chunks if tag is None)
+            self._size = 0
+            self._skipped = 0
+            self._drained.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "coalesced_frames": self.coalesced_frames,
+            "dropped_frames": self.dropped_frames,
+            "dropped_chars": self.dropped_chars,
+            "chunks_written": self.chunks_written,
+            "skipped_chars": self.skipped_chars,
+            "throttled": self.throttled,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "pending_chars": self.pending(),
+        }
+
+
+def _join_runs(runs):
+    return [("".join(parts), tag) for parts, tag in runs]
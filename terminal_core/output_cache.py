@@ -0,0 +1,294 @@
+# terminal_core/output_cache.py
+"""
+Opt-in cache of command output for read-only commands that are rerun with
+unchanged inputs (`git status`, `ls -la` of a big directory, local CLI
+queries).
+
+Only commands matching a CacheRule are cached (shell-style patterns on the
+command line, e.g. "git status*"). The key is the command, the working
+directory, the values of the rule's environment variables and the (mtime,
+size) of the rule's input paths, relative to the working directory ("." by
+default: the directory changes when files are added or removed). Changing any
+of them means a different key, i.e. a miss. Entries expire after the rule's
+ttl; the total size is bounded by max_bytes, least recently used first out.
+
+Only successful runs (exit status 0) are stored, keyed by the inputs as they
+are after the run (`git status` rewrites .git/index). A hit is served at once
+and refresh() reruns the command on a worker thread, in a persistent shell of
+its own (a PTY like the panes' shells, so output looks the same) started with
+the environment of the shell the command came from, to replace the entry;
+on_changed is called if the output was different. Exported variables carry
+over that way; aliases and unexported variables of that shell do not.
+"""
+import os
+import time
+import shlex
+import fnmatch
+import threading
+from collections import OrderedDict
+
+from terminal_core.workers import get_worker
+
+DEFAULT_TTL = 30
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+# One entry may use at most this fraction of max_bytes
+MAX_ENTRY_SHARE = 0.25
+# A background refresh that runs longer than this is interrupted
+REFRESH_TIMEOUT = 60.0
+# Hits on an entry younger than this are not refreshed again
+MIN_REFRESH_AGE = 1.0
+
+
+def describe_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m"
+    return f"{int(seconds // 3600)}h"
+
+
+class CacheRule:
+    """Commands matching `pattern` (fnmatch, whole command line) are cached for `ttl` seconds."""
+
+    __slots__ = ("pattern", "ttl", "env", "inputs")
+
+    def __init__(self, pattern: str, ttl: float = DEFAULT_TTL, env=(), inputs=(".",)):
+        self.pattern = pattern
+        self.ttl = ttl
+        self.env = tuple(env)  # environment variables that are part of the key
+        self.inputs = tuple(inputs)  # paths whose (mtime, size) are part of the key
+
+    def matches(self, command: str) -> bool:
+        return fnmatch.fnmatchcase(command, self.pattern)
+
+    def __repr__(self):
+        return f"CacheRule({self.pattern!r}, ttl={self.ttl}, env={self.env}, inputs={self.inputs})"
+
+
+def rules_from_config(commands, ttl: float = DEFAULT_TTL, env=(), inputs=(".",)) -> list:
+    """
+    CacheRules from the [cache] config: each item of commands is a pattern, or
+    a table with "pattern" and optional "ttl", "env" and "inputs" overriding
+    the section-wide values.
+    """
+    rules = []
+    for item in commands:
+        if isinstance(item, str):
+            rules.append(CacheRule(item, ttl, env, inputs))
+        else:
+            rules.append(CacheRule(item["pattern"], item.get("ttl", ttl), item.get("env", env),
+                                   item.get("inputs", inputs)))
+    return rules
+
+
+class CachedOutput:
+    """A stored run: its events (without the final "exit") and exit status."""
+
+    __slots__ = ("events", "returncode", "created", "size")
+
+    def __init__(self, events: list, returncode: int, size: int):
+        self.events = events
+        self.returncode = returncode
+        self.created = time.monotonic()
+        self.size = size
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created
+
+    def text(self) -> str:
+        return "".join(text for _, text in self.events)
+
+
+def _compact(events) -> tuple:
+    """Merge adjacent events of the same kind; returns (events, size in bytes)."""
+    merged = []
+    for kind, text in events:
+        if merged and merged[-1][0] == kind:
+            merged[-1][1].append(text)
+        else:
+            merged.append((kind, [text]))
+    events = [(kind, "".join(parts)) for kind, parts in merged]
+    return events, sum(len(text.encode("utf-8", "surrogatepass")) for _, text in events)
+
+
+class OutputCache:
+    """
+    Thread-safe LRU of CachedOutput by key (see key()). Counters: hits,
+    misses, expired (found but older than the ttl), evictions, refreshes and
+    refresh_changed.
+    """
+
+    def __init__(self, rules=(), max_bytes: int = DEFAULT_MAX_BYTES):
+        self.rules = list(rules)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> CachedOutput
+        self._size = 0
+        self._lock = threading.Lock()
+        self._refreshing = set()  # keys with a refresh queued or running
+        self._session = None  # Session the refreshes run in, started on first use
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_changed = 0
+
+    def configure(self, rules, max_bytes: int):
+        """New rules and size limit (config reload); entries over the limit are evicted."""
+        with self._lock:
+            self.rules = list(rules)
+            self.max_bytes = max_bytes
+            self._evict_locked()
+
+    @property
+    def max_entry_bytes(self) -> int:
+        return int(self.max_bytes * MAX_ENTRY_SHARE)
+
+    def rule_for(self, command: str):
+        """The first rule matching command, or None (not cached)."""
+        command = command.strip()
+        for rule in self.rules:
+            if rule.matches(command):
+                return rule
+        return None
+
+    def key(self, command: str, cwd: str, rule: CacheRule, env: dict = None) -> tuple:
+        """
+        Cache key: command, cwd, the rule's env values and (mtime, size) of its
+        inputs. env is the environment the command runs with (default: os.environ).
+        """
+        env = os.environ if env is None else env
+        values = tuple(env.get(name) for name in rule.env)
+        stamps = []
+        for path in rule.inputs:
+            try:
+                st = os.stat(os.path.join(cwd, os.path.expanduser(path)))
+            except OSError:
+                stamps.append(None)
+            else:
+                stamps.append((st.st_mtime_ns, st.st_size))
+        return (command.strip(), cwd, values, tuple(stamps))
+
+    def get(self, key: tuple, ttl: float):
+        """The entry for key if it is younger than ttl, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.age >= ttl:
+                self._remove_locked(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, events, returncode: int) -> bool:
+        """Store a finished run. Not stored (False): failed, or too big for one entry."""
+        if returncode != 0:
+            return False
+        events, size = _compact(events)
+        if size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = CachedOutput(events, returncode, size)
+            self._size += size
+            self._evict_locked()
+        return True
+
+    def _remove_locked(self, key):
+        self._size -= self._entries.pop(key).size
+
+    def _evict_locked(self):
+        while self._size > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= entry.size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "refreshes": self.refreshes,
+                "refresh_changed": self.refresh_changed,
+            }
+
+    # ---------------------------
+    # Background refresh
+    # ---------------------------
+    def refresh(self, command: str, cwd: str, rule: CacheRule, shown: CachedOutput = None,
+                columns: int = 200, lines: int = 50, on_changed=None, env: dict = None):
+        """
+        Rerun command in cwd with env (default: os.environ) on the cache's worker
+        and store the result.
+        on_changed() is called there if it differs from `shown`. Does nothing
+        if shown is younger than MIN_REFRESH_AGE or a refresh is pending.
+        """
+        if shown is not None and shown.age < MIN_REFRESH_AGE:
+            return
+        token = (command.strip(), cwd)
+        with self._lock:
+            if token in self._refreshing:
+                return
+            self._refreshing.add(token)
+        get_worker("cache").submit(self._refresh, token, command, cwd, rule, shown, columns, lines, on_changed,
+                                   env)
+
+    def _refresh(self, token, command, cwd, rule, shown, columns, lines, on_changed, env):
+        try:
+            session = self._get_session(env)
+            session.resize(lines, columns)
+            result = session.run(f"cd -- {shlex.quote(cwd)} && {command}", timeout=REFRESH_TIMEOUT,
+                                 max_output=self.max_entry_bytes)
+            if not result.ok or result.truncated:
+                return
+            # Keyed after the run: commands like `git status` touch their own inputs
+            key = self.key(command, cwd, rule, env)
+            events = [(kind, text) for kind, text in (("stdout", result.stdout), ("stderr", result.stderr)) if text]
+            with self._lock:
+                self.refreshes += 1
+            self.put(key, events, result.returncode)
+            if shown is not None and _compact(events)[0] != shown.events:
+                with self._lock:
+                    self.refresh_changed += 1
+                if on_changed is not None:
+                    on_changed()
+        except Exception:
+            import traceback
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self._refreshing.discard(token)
+
+    def _get_session(self, env: dict = None):
+        # Only used on the worker thread; a shell with another environment is replaced
+        if self._session is not None and self._session.env != env:
+            self._session.close()
+            self._session = None
+        if self._session is None:
+            from terminal_core.session import Session
+            from terminal_core.reactor import get_reactor
+            self._session = Session(reactor=get_reactor(), env=env)
+        return self._session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
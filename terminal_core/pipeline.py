@@ -0,0 +1,358 @@
+# terminal_core/pipeline.py
+"""
+Native pipeline and redirection engine.
+
+parse_pipeline() turns a command line into stages connected by `|`, each with
+its argv and redirections (`<`, `>`, `>>`, `2>`, `2>>`, `2>&1`, `&>`).
+run_pipeline() spawns the stages with raw fds: each stage's stdout is an
+os.pipe() feeding the next stage's stdin and redirection targets are opened
+as fds and handed straight to the child, so redirected output goes to disk
+without ever passing through Python memory.
+
+Anything that needs real shell semantics (variables, globs, `&&`, `;`,
+subshells, assignments, builtins, commands not on $PATH...) makes
+parse_pipeline() return None; callers then fall back to running the line
+through a shell.
+"""
+import os
+import sys
+import time
+import shutil
+import signal
+import subprocess
+
+from terminal_core.capture import pump_fds
+from terminal_core.metrics import STATS
+
+# Unquoted characters that need shell expansion or syntax we do not implement
+SHELL_ONLY_CHARS = set("$`*?[]{}();#~!")
+
+# Bash builtins and reserved words: as a command name they only work in a shell
+SHELL_BUILTINS = frozenset("""
+    . : [ [[ ]] { } ! alias bg bind break builtin caller case cd command compgen complete compopt
+    continue coproc declare dirs disown do done echo elif else enable esac eval exec exit export
+    false fc fg fi for function getopts hash help history if in jobs kill let local logout mapfile
+    popd printf pushd pwd read readarray readonly return select set shift shopt source suspend test
+    then time times trap true type typeset ulimit umask unalias unset until wait while
+""".split())
+
+# Popen(process_group=) is new in Python 3.11; older versions use a preexec_fn
+_POPEN_PROCESS_GROUP = sys.version_info >= (3, 11)
+
+
+class Redirect:
+    __slots__ = ("fd", "op", "target")
+
+    def __init__(self, fd: int, op: str, target: str):
+        self.fd = fd  # 0, 1 or 2
+        self.op = op  # "<", ">", ">>" or ">&" (target is an fd number)
+        self.target = target
+
+    def __repr__(self):
+        return f"Redirect({self.fd}{self.op}{self.target})"
+
+
+class Stage:
+    __slots__ = ("argv", "redirects")
+
+    def __init__(self):
+        self.argv = []
+        self.redirects = []
+
+    def __repr__(self):
+        return f"Stage({self.argv!r}, {self.redirects!r})"
+
+
+class Pipeline:
+    __slots__ = ("stages",)
+
+    def __init__(self, stages):
+        self.stages = stages
+
+    @property
+    def stdout_file(self):
+        """(op, path) of the last stage's stdout redirection, if any."""
+        for redirect in reversed(self.stages[-1].redirects):
+            if redirect.fd == 1 and redirect.op in (">", ">>"):
+                return redirect.op, redirect.target
+        return None
+
+    def __repr__(self):
+        return f"Pipeline({self.stages!r})"
+
+
+# ---------------------------
+# Parsing
+# ---------------------------
+def tokenize(command: str):
+    """
+    Split a command line into ("word", text) and ("redir", (fd, op)) / ("pipe", "|")
+    tokens, applying POSIX shell quoting rules (as shlex does in posix mode).
+    Returns None for syntax that needs a real shell.
+    """
+    tokens = []
+    word = []
+    quoted = False  # current word contains quoted parts
+    in_word = False
+    i = 0
+    n = len(command)
+
+    def flush():
+        nonlocal word, quoted, in_word
+        if in_word:
+            tokens.append(("word", "".join(word)))
+        word, quoted, in_word = [], False, False
+
+    while i < n:
+        c = command[i]
+        if c.isspace():
+            flush()
+            i += 1
+        elif c == "'":
+            end = command.find("'", i + 1)
+            if end < 0:
+                return None
+            word.append(command[i + 1:end])
+            quoted = in_word = True
+            i = end + 1
+        elif c == '"':
+            i += 1
+            while i < n and command[i] != '"':
+                ch = command[i]
+                if ch in "$`":
+                    return None
+                if ch == "\\" and i + 1 < n and command[i + 1] in '"\\$`\n':
+                    i += 1
+                    ch = command[i]
+                word.append(ch)
+                i += 1
+            if i >= n:
+                return None
+            quoted = in_word = True
+            i += 1
+        elif c == "\\":
+            if i + 1 >= n:
+                return None
+            word.append(command[i + 1])
+            in_word = True
+            i += 2
+        elif c == "|":
+            if command.startswith("||", i):
+                return None
+            flush()
+            tokens.append(("pipe", "|"))
+            i += 1
+        elif c == "&":
+            if command.startswith("&>", i):
+                flush()
+                op = ">>" if command.startswith("&>>", i) else ">"
+                tokens.append(("redir", (-1, op)))  # -1: stdout and stderr
+                i += 1 + len(op)
+            else:
+                return None
+        elif c in "<>":
+            # A bare unquoted number right before the operator is its fd
+            fd = 0 if c == "<" else 1
+            if in_word and not quoted and "".join(word).isdigit():
+                fd = int("".join(word))
+                word, in_word = [], False
+            else:
+                flush()
+            if fd not in (0, 1, 2):
+                return None
+            if command.startswith(">>", i):
+                op, i = ">>", i + 2
+            elif command.startswith(">&", i):
+                op, i = ">&", i + 2
+            elif c == "<" and command.startswith("<<", i):
+                return None
+            else:
+                op, i = c, i + 1
+            tokens.append(("redir", (fd, op)))
+        elif c in SHELL_ONLY_CHARS and not (c == "~" and in_word) and not (c == "#" and in_word):
+            return None
+        else:
+            word.append(c)
+            in_word = True
+            i += 1
+    flush()
+    return tokens
+
+
+def parse_pipeline(command: str, path: str = None):
+    """
+    Parse a command line into a Pipeline, or None if a real shell is needed.
+    path is the $PATH command names are looked up in (default: os.environ's).
+    """
+    tokens = tokenize(command)
+    if not tokens:
+        return None
+
+    stages = [Stage()]
+    i = 0
+    while i < len(tokens):
+        kind, value = tokens[i]
+        stage = stages[-1]
+        if kind == "word":
+            if not stage.argv and "=" in value and value.split("=", 1)[0].isidentifier():
+                return None  # VAR=value command
+            stage.argv.append(value)
+        elif kind == "pipe":
+            if not stage.argv:
+                return None
+            stages.append(Stage())
+        else:
+            fd, op = value
+            if i + 1 >= len(tokens) or tokens[i + 1][0] != "word":
+                return None
+            target = tokens[i + 1][1]
+            i += 1
+            if op == ">&":
+                if target not in ("1", "2") or fd == -1:
+                    return None
+            if fd == -1:
+                stage.redirects.append(Redirect(1, op, target))
+                stage.redirects.append(Redirect(2, ">&", "1"))
+            else:
+                stage.redirects.append(Redirect(fd, op, target))
+        i += 1
+
+    if not stages[-1].argv:
+        return None
+    for stage in stages:
+        name = stage.argv[0]
+        if name in SHELL_BUILTINS or ("/" not in name and shutil.which(name, path=path) is None):
+            return None  # let the shell run it (or report "command not found")
+    return Pipeline(stages)
+
+
+# ---------------------------
+# Execution
+# ---------------------------
+def _open_target(redirect: Redirect, cwd: str = None) -> int:
+    path = os.path.join(cwd, redirect.target) if cwd is not None else redirect.target
+    if redirect.op == "<":
+        return os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC
+    flags |= os.O_APPEND if redirect.op == ">>" else os.O_TRUNC
+    return os.open(path, flags, 0o666)
+
+
+def run_pipeline(pipeline: Pipeline, on_spawn=None, new_session: bool = False, cwd: str = None,
+                 env: dict = None):
+    """
+    Spawn all stages and stream the output that is not redirected.
+    Yields ("stdout", text), ("stderr", text), ("error", message) and finally
+    ("exit", returncode of the last stage). on_spawn(proc) receives the first
+    (process-group leader) Popen object. Stages run in cwd with env (default:
+    this process's); relative redirect targets are opened in cwd too.
+    """
+    owned = []  # fds the parent must close once the children have them
+    procs = []
+    out_r, err_r = None, None
+    started = time.perf_counter()
+    try:
+        err_r, err_w = os.pipe()
+        owned.append(err_w)
+        prev_read = None
+        last = len(pipeline.stages) - 1
+        for index, stage in enumerate(pipeline.stages):
+            if index < last:
+                next_read, stage_out = os.pipe()
+                owned.extend((next_read, stage_out))
+            else:
+                out_r, stage_out = os.pipe()
+                owned.append(stage_out)
+                next_read = None
+
+            fds = {0: prev_read if prev_read is not None else subprocess.DEVNULL, 1: stage_out, 2: err_w}
+            for redirect in stage.redirects:
+                if redirect.op == ">&":
+                    fds[redirect.fd] = fds[int(redirect.target)]
+                else:
+                    try:
+                        fd = _open_target(redirect, cwd)
+                    except OSError as e:
+                        yield ("error", f"{redirect.target}: {e.strerror}")
+                        yield ("exit", 1)
+                        return
+                    owned.append(fd)
+                    fds[redirect.fd] = fd
+
+            group = {}
+            if new_session:
+                # One process group led by the first stage: a new group, not a new
+                # session, since a group cannot be joined from another session
+                pgid = procs[0].pid if procs else 0
+                if _POPEN_PROCESS_GROUP:
+                    group["process_group"] = pgid
+                else:
+                    group["preexec_fn"] = lambda pgid=pgid: os.setpgid(0, pgid)
+            try:
+                proc = subprocess.Popen(stage.argv, stdin=fds[0], stdout=fds[1], stderr=fds[2], cwd=cwd, env=env,
+                                        **group)
+            except FileNotFoundError:
+                yield ("error", f"Error: Command not found: {stage.argv[0]}")
+                yield ("exit", 127)
+                return
+            except PermissionError:
+                yield ("error", f"Error: Permission denied: {stage.argv[0]}")
+                yield ("exit", 126)
+                return
+            except (OSError, subprocess.SubprocessError) as e:
+                yield ("error", f"Error: Cannot start {stage.argv[0]}: {e}")
+                yield ("exit", 126)
+                return
+            if new_session:
+                # Also from the parent, so the group is complete before any signal is sent
+                try:
+                    os.setpgid(proc.pid, pgid or proc.pid)
+                except OSError:
+                    pass  # the child already exec'd (EACCES) or exited
+            procs.append(proc)
+            if index == 0 and on_spawn is not None:
+                on_spawn(proc)
+            prev_read = next_read
+
+        # Children hold their ends now; keep only the two read ends we stream
+        for fd in owned:
+            os.close(fd)
+        owned = []
+        if STATS.enabled:
+            STATS.histogram("exec.spawn").observe(time.perf_counter() - started)
+
+        for kind, text, _ in pump_fds([("stdout", out_r), ("stderr", err_r)]):
+            if text:
+                yield (kind, text)
+        returncode = procs[-1].wait()
+        for proc in procs[:-1]:
+            proc.wait()
+    finally:
+        for fd in owned:
+            os.close(fd)
+        for fd in (out_r, err_r):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        # Generator closed early or spawn failed midway: do not leak children
+        running = [proc for proc in procs if proc.poll() is None]
+        if running:
+            if new_session:
+                # the whole group, including anything the stages started
+                try:
+                    os.killpg(procs[0].pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            for proc in running:
+                if not new_session:
+                    proc.kill()
+                proc.wait()
+
+    redirected = pipeline.stdout_file
+    if redirected:
+        op, path = redirected
+        verb = "written" if op == ">" else "appended"
+        yield ("stdout", f"Output {verb} to '{path}'.")
+    yield ("exit", returncode)
@@ -0,0 +1,366 @@
+# terminal_core/pty_session.py
+"""
+Interactive pseudo-terminal session.
+
+PtySession owns the PTY master fd and the child pid. It forwards input
+(keystrokes) to the child, propagates window size changes with TIOCSWINSZ and
+reads output with a single blocking select() that wakes up on data, on child
+exit (via a pidfd where the platform has one) or on close(); there is no
+timer-based polling. attach() does the same through a shared
+terminal_core.reactor.Reactor, so many sessions need no reader thread each.
+pause_reading() / resume_reading() stop and restart reading for flow control:
+while nothing reads the master, the kernel blocks the child's writes.
+"""
+import os
+import pty
+import errno
+import fcntl
+import select
+import signal
+import struct
+import termios
+import threading
+
+from terminal_core.capture import ReadSizer, read_chunk
+
+# Keysym -> bytes for keys that do not produce a usable event.char
+KEYSYM_SEQUENCES = {
+    "Return": b"\r",
+    "KP_Enter": b"\r",
+    "BackSpace": b"\x7f",
+    "Tab": b"\t",
+    "ISO_Left_Tab": b"\x1b[Z",
+    "Escape": b"\x1b",
+    "Up": b"\x1b[A",
+    "Down": b"\x1b[B",
+    "Right": b"\x1b[C",
+    "Left": b"\x1b[D",
+    "Home": b"\x1b[H",
+    "End": b"\x1b[F",
+    "Insert": b"\x1b[2~",
+    "Delete": b"\x1b[3~",
+    "Prior": b"\x1b[5~",
+    "Next": b"\x1b[6~",
+    "F1": b"\x1bOP",
+    "F2": b"\x1bOQ",
+    "F3": b"\x1bOR",
+    "F4": b"\x1bOS",
+    "F5": b"\x1b[15~",
+    "F6": b"\x1b[17~",
+    "F7": b"\x1b[18~",
+    "F8": b"\x1b[19~",
+    "F9": b"\x1b[20~",
+    "F10": b"\x1b[21~",
+    "F11": b"\x1b[23~",
+    "F12": b"\x1b[24~",
+}
+
+
+def encode_key(keysym: str, char: str) -> bytes:
+    """
+    Translate a key event (Tk keysym + char) into the bytes a terminal sends.
+    Returns b"" for keys that produce nothing (e.g. bare modifiers).
+    """
+    seq = KEYSYM_SEQUENCES.get(keysym)
+    if seq is not None:
+        return seq
+    if char:
+        # Printable characters and Ctrl+<key> control characters alike
+        return char.encode("utf-8")
+    return b""
+
+
+class PtySession:
+    """
+    A child process attached to a pseudo-terminal.
+
+    Usage:
+        session = PtySession(["htop"], columns=120, lines=40)
+        session.start()
+        session.read_loop(on_data)   # blocks until the child exits or close()
+        status = session.wait()
+
+    or, without a thread of its own:
+        session.attach(reactor, on_data, on_exit)   # on_exit(status) once reaped
+    """
+
+    def __init__(self, argv, columns: int = 80, lines: int = 24, env: dict = None, cwd: str = None):
+        self.argv = list(argv)
+        self.columns = columns
+        self.lines = lines
+        self.env = env
+        self.cwd = cwd  # working directory of the child (default: inherited)
+        self.pid = None
+        self.fd = None
+        self.exit_status = None
+        self.read_error = None  # exception that stopped an attached reader, if any
+        self._pidfd = None
+        self._wake_r, self._wake_w = None, None
+        self._sizer = ReadSizer(source="pty")
+        self._flowing = threading.Event()  # cleared while reading is paused
+        self._flowing.set()
+        self._reactor = None  # set by attach()
+        self._readable = None  # attach()'s read callback, until reading stops for good
+        self._watching = False  # fd registered with the reactor (reactor thread only)
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+    def start(self):
+        """Fork the child inside a new PTY. Raises OSError on failure."""
+        pid, fd = pty.fork()
+        if pid == 0:
+            # Child: exec the command
+            try:
+                env = dict(self.env if self.env is not None else os.environ)
+                env.setdefault("TERM", "xterm-256color")
+                if self.cwd is not None:
+                    os.chdir(self.cwd)
+                os.execvpe(self.argv[0], self.argv, env)
+            except Exception as e:
+                os.write(2, f"Exec failed: {e}\r\n".encode())
+            os._exit(127)
+
+        self.pid, self.fd = pid, fd
+        self._wake_r, self._wake_w = os.pipe()
+        if hasattr(os, "pidfd_open"):
+            try:
+                self._pidfd = os.pidfd_open(pid)
+            except OSError:
+                self._pidfd = None
+        self.resize(self.lines, self.columns)
+
+    def close(self):
+        """Stop the reader, terminate the child if still running and release fds."""
+        self._flowing.set()  # a paused read_loop must see the wake-up
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"x")
+            except OSError:
+                pass
+        if self.pid and self.exit_status is None:
+            try:
+                os.kill(self.pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+
+    def wait(self) -> int:
+        """Reap the child and return its exit code (negative signal number if killed)."""
+        if self.exit_status is None and self.pid:
+            try:
+                _, status = os.waitpid(self.pid, 0)
+                self.exit_status = os.waitstatus_to_exitcode(status)
+            except ChildProcessError:
+                self.exit_status = -1
+        self._release_fds()
+        return self.exit_status
+
+    def poll(self):
+        """Reap the child if it has exited. Returns the exit code, or None while it runs."""
+        if self.exit_status is None and self.pid:
+            try:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                self.exit_status = -1
+            else:
+                if pid:
+                    self.exit_status = os.waitstatus_to_exitcode(status)
+        return self.exit_status
+
+    def _release_fds(self):
+        for name in ("fd", "_pidfd", "_wake_r", "_wake_w"):
+            fd = getattr(self, name)
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+                setattr(self, name, None)
+
+    @property
+    def alive(self) -> bool:
+        return self.pid is not None and self.exit_status is None and self.fd is not None
+
+    # ---------------------------
+    # Input / control
+    # ---------------------------
+    def write(self, data):
+        """Send bytes (or str, encoded as UTF-8) to the child's terminal."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        fd = self.fd
+        while data and fd is not None:
+            try:
+                written = os.write(fd, data)
+            except InterruptedError:
+                continue
+            except OSError:
+                return
+            data = data[written:]
+
+    def send_key(self, keysym: str, char: str) -> bool:
+        """Forward a key event. Returns True if anything was sent."""
+        data = encode_key(keysym, char)
+        if data:
+            self.write(data)
+        return bool(data)
+
+    def resize(self, lines: int, columns: int):
+        """Set the terminal window size; the kernel sends SIGWINCH to the child."""
+        self.lines, self.columns = lines, columns
+        if self.fd is None:
+            return
+        try:
+            fcntl.ioctl(self.fd, termios.TIOCSWINSZ, struct.pack("HHHH", lines, columns, 0, 0))
+        except OSError:
+            pass
+
+    def set_echo(self, on: bool):
+        """Turn the terminal's local echo of typed input on or off."""
+        if self.fd is None:
+            return
+        try:
+            attrs = termios.tcgetattr(self.fd)
+            attrs[3] = attrs[3] | termios.ECHO if on else attrs[3] & ~termios.ECHO
+            termios.tcsetattr(self.fd, termios.TCSANOW, attrs)
+        except (OSError, termios.error):
+            pass
+
+    def send_signal(self, sig: int):
+        if self.pid and self.exit_status is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    # ---------------------------
+    # Output
+    # ---------------------------
+    def read_loop(self, on_data):
+        """
+        Call on_data(bytes) for every chunk the child writes. Blocks in a single
+        select() until data arrives, the child exits or close() is called.
+        Returns when the PTY reaches EOF or the session is closed.
+        Read sizes adapt to the output rate (see terminal_core.capture.ReadSizer).
+        """
+        watched = [self.fd, self._wake_r]
+        if self._pidfd is not None:
+            watched.append(self._pidfd)
+
+        while True:
+            if not self._flowing.is_set():
+                self._flowing.wait()
+            try:
+                ready, _, _ = select.select(watched, [], [])
+            except InterruptedError:
+                continue
+            if self._wake_r in ready:
+                return
+            if self.fd in ready:
+                if not self._read_once(on_data):
+                    return
+            elif self._pidfd is not None and self._pidfd in ready:
+                # Child exited: drain whatever is still buffered, then stop
+                while select.select([self.fd], [], [], 0)[0]:
+                    if not self._read_once(on_data):
+                        break
+                return
+
+    def attach(self, reactor, on_data, on_exit):
+        """
+        Read through a shared reactor instead of blocking a thread in read_loop().
+        on_data(bytes) runs on the reactor thread for every chunk; on_exit(status)
+        runs once the session is done (EOF, child exit or close()) and the child
+        is reaped. The fds are released before on_exit is called.
+        """
+        fd, wake, pidfd = self.fd, self._wake_r, self._pidfd
+        done = False
+
+        def stop_reading():
+            self._readable = None
+            self._sync_reading()
+
+        def read_once() -> bool:
+            try:
+                return self._read_once(on_data)
+            except Exception as e:
+                self.read_error = e
+                return False
+
+        def finish():
+            nonlocal done
+            if done:
+                return
+            done = True
+            stop_reading()
+            reactor.remove_reader(wake)
+            if pidfd is not None:
+                reactor.remove_reader(pidfd)
+            if self.poll() is not None:
+                self._release_fds()
+                on_exit(self.exit_status)
+            else:
+                # Still running (e.g. closed after SIGHUP): reap it off the reactor thread
+                threading.Thread(target=lambda: on_exit(self.wait()), name="0term-reap", daemon=True).start()
+
+        def readable():
+            if not read_once():
+                if pidfd is not None and self.poll() is None:
+                    stop_reading()  # the pidfd reports when the child is gone
+                else:
+                    finish()
+
+        def exited():
+            # Child exited: drain whatever is still buffered (even if paused), then stop
+            while self._readable is not None and select.select([fd], [], [], 0)[0]:
+                if not read_once():
+                    break
+            finish()
+
+        self._reactor = reactor
+        self._readable = readable
+        reactor.call_soon(self._sync_reading)
+        reactor.add_reader(wake, finish)
+        if pidfd is not None:
+            reactor.add_reader(pidfd, exited)
+
+    # ---------------------------
+    # Flow control
+    # ---------------------------
+    @property
+    def paused(self) -> bool:
+        return not self._flowing.is_set()
+
+    def pause_reading(self):
+        """Stop reading output until resume_reading(). Any thread."""
+        self._flowing.clear()
+        if self._reactor is not None:
+            self._reactor.call_soon(self._sync_reading)
+
+    def resume_reading(self):
+        self._flowing.set()
+        if self._reactor is not None:
+            self._reactor.call_soon(self._sync_reading)
+
+    def _sync_reading(self):
+        # Reactor thread: watch the fd iff attached, not finished and not paused
+        want = self._readable is not None and self._flowing.is_set()
+        if want != self._watching:
+            self._watching = want
+            if want:
+                self._reactor.add_reader(self.fd, self._readable)
+            else:
+                self._reactor.remove_reader(self.fd)
+
+    def _read_once(self, on_data) -> bool:
+        try:
+            data = read_chunk(self.fd, self._sizer)
+        except OSError as e:
+            # Linux reports EIO on the master once the slave side is closed
+            if e.errno not in (errno.EIO, errno.EBADF):
+                raise
+            return False
+        if not data:
+            return False
+        on_data(data)
+        return True
@@ -0,0 +1,167 @@
+# terminal_core/reactor.py
+"""
+Shared I/O reactor.
+
+One thread multiplexes every session's PTY/pipe fds with a single selector
+(epoll on Linux) and runs the registered callbacks when an fd becomes
+readable, instead of one blocking reader thread per session. Callbacks run on
+the reactor thread and must not block: they read one chunk and hand it to the
+session's own buffers.
+
+add_reader()/remove_reader() may be called from any thread; from other
+threads the change is applied by the reactor thread shortly after, so a
+callback may still run once after remove_reader() returns. Calls made from a
+callback take effect immediately.
+
+With STATS enabled, callbacks are timed in the "reactor.dispatch" histogram.
+"""
+import os
+import time
+import selectors
+import threading
+from collections import deque
+
+from terminal_core.metrics import STATS
+
+
+class Reactor:
+    def __init__(self, name: str = "0term-reactor"):
+        self.name = name
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._calls = deque()  # callbacks queued for the reactor thread
+        self._lock = threading.Lock()
+        self._thread = None  # started on first use
+        self._thread_id = None
+        self._closed = False
+
+    def __len__(self):
+        """Number of fds being watched (the internal wake-up pipe excluded)."""
+        return max(0, len(self._selector.get_map()) - 1)
+
+    # ---------------------------
+    # Registration
+    # ---------------------------
+    def add_reader(self, fd: int, callback):
+        """Call callback() on the reactor thread whenever fd is readable."""
+        if threading.get_ident() == self._thread_id:
+            self._register(fd, callback)
+        else:
+            self.call_soon(lambda: self._register(fd, callback))
+
+    def remove_reader(self, fd: int):
+        if threading.get_ident() == self._thread_id:
+            self._unregister(fd)
+        else:
+            self.call_soon(lambda: self._unregister(fd))
+
+    def call_soon(self, callback):
+        """Run callback() on the reactor thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._calls.append(callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._wake()
+
+    def close(self):
+        """Stop the reactor thread. Registered fds are not closed."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            self._wake()
+        if thread is None:
+            self._release()
+
+    def _wake(self):
+        # Caller holds _lock, so the pipe cannot be closed underneath the write
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass  # the pipe is full, so the reactor is already due to wake up
+
+    def _register(self, fd, callback):
+        try:
+            self._selector.register(fd, selectors.EVENT_READ, callback)
+        except KeyError:
+            self._selector.modify(fd, selectors.EVENT_READ, callback)
+        except (ValueError, OSError):
+            pass  # fd already closed
+
+    def _unregister(self, fd):
+        try:
+            self._selector.unregister(fd)
+        except (KeyError, ValueError, OSError):
+            pass
+
+    # ---------------------------
+    # Reactor thread
+    # ---------------------------
+    def _run(self):
+        self._thread_id = threading.get_ident()
+        watched = self._selector.get_map()
+        try:
+            while not self._closed:
+                for key, _ in self._selector.select():
+                    if watched.get(key.fd) is not key:
+                        continue  # removed by an earlier callback of this batch
+                    callback = key.data
+                    if callback is None:
+                        self._run_calls()
+                    elif STATS.enabled:
+                        started = time.perf_counter()
+                        self._dispatch(key.fd, callback)
+                        STATS.histogram("reactor.dispatch").observe(time.perf_counter() - started)
+                    else:
+                        self._dispatch(key.fd, callback)
+        finally:
+            self._release()
+
+    def _run_calls(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        while self._calls:
+            self._dispatch(None, self._calls.popleft())
+
+    def _dispatch(self, fd, callback):
+        try:
+            callback()
+        except Exception:
+            # A failing callback must not take the other sessions down; stop
+            # watching its fd so it cannot spin
+            import traceback
+            traceback.print_exc()
+            if fd is not None:
+                self._unregister(fd)
+
+    def _release(self):
+        with self._lock:
+            self._selector.close()
+            for fd in (self._wake_r, self._wake_w):
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+
+_default_reactor = None
+_default_lock = threading.Lock()
+
+
+def get_reactor() -> Reactor:
+    """The process-wide reactor shared by all sessions."""
+    global _default_reactor
+    with _default_lock:
+        if _default_reactor is None:
+            _default_reactor = Reactor()
+        return _default_reactor
@@ -0,0 +1,219 @@
+# terminal_core/recording.py
+"""
+Session recording and replay in asciicast v2 format.
+
+A recording is a JSON header line followed by one JSON array per event:
+    {"version": 2, "width": 80, "height": 24, "timestamp": 1700000000, ...}
+    [0.103, "o", "output text"]
+    [1.5, "r", "120x40"]          (terminal resized)
+    [2.0, "m", "0term:screen"]    (marker)
+Files ending in .gz are gzip-compressed; the reader detects compression by
+content, so any asciicast v2 file (e.g. from asciinema) can be replayed.
+
+AsciicastRecorder keeps the read path cheap: output() only timestamps the
+chunk and appends it to a batch under a lock. Decoding, JSON encoding,
+compression and disk writes happen on a single writer thread shared by all
+recorders, a batch at a time (FLUSH_BYTES, or on close()).
+
+paced() replays events at 1x, Nx or maximum speed (speed=None).
+"""
+import os
+import json
+import time
+import threading
+
+from terminal_core.capture import incremental_decoder
+from terminal_core.workers import get_worker
+
+# Pending output handed to the writer thread once a batch reaches this size
+FLUSH_BYTES = 64 * 1024
+
+# Markers written by the GUI around PTY (full-screen) applications, so replay
+# can route their output to a screen model instead of the scrollback
+SCREEN_MARKER = "0term:screen"
+TEXT_MARKER = "0term:text"
+# env.TERM_PROGRAM of recordings made here (they use the markers above)
+PROGRAM = "0Term"
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class AsciicastRecorder:
+    """
+    Streams terminal output to an asciicast v2 file.
+
+    output(data) accepts raw PTY bytes (decoded as UTF-8 on the writer thread,
+    split multibyte sequences included) or str; with translate_newlines, "\\n"
+    becomes "\\r\\n" as a terminal would show it (for output that was already
+    converted to plain newlines).
+    """
+
+    def __init__(self, path: str, columns: int = 80, lines: int = 24, command: str = None,
+                 title: str = None, env: dict = None, compress: bool = None):
+        self.path = path
+        self.compress = path.endswith(".gz") if compress is None else compress
+        self.events = 0
+        self.chars = 0
+        self._start = time.monotonic()
+        self._batch = []
+        self._batch_bytes = 0
+        self._lock = threading.Lock()
+        self._decoder = incremental_decoder()
+        self._closed = False
+
+        if self.compress:
+            import gzip
+            self._file = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+        else:
+            self._file = open(path, "w", encoding="utf-8", buffering=1024 * 1024)
+        header = {"version": 2, "width": columns, "height": lines, "timestamp": int(time.time())}
+        if command:
+            header["command"] = command
+        if title:
+            header["title"] = title
+        header["env"] = env if env is not None else {
+            "TERM": os.environ.get("TERM", "xterm-256color"), "SHELL": os.environ.get("SHELL", "/bin/bash"),
+            "TERM_PROGRAM": PROGRAM,
+        }
+        self._file.write(json.dumps(header) + "\n")
+
+    # ---------------------------
+    # Recording (any thread)
+    # ---------------------------
+    def output(self, data, translate_newlines: bool = False):
+        if data:
+            self._add((time.monotonic(), "o", data, translate_newlines), len(data))
+
+    def resize(self, columns: int, lines: int):
+        self._add((time.monotonic(), "r", f"{columns}x{lines}", False), 0)
+
+    def marker(self, label: str):
+        self._add((time.monotonic(), "m", label, False), 0)
+
+    def _add(self, event, size: int):
+        with self._lock:
+            if self._closed:
+                return
+            self._batch.append(event)
+            self._batch_bytes += size
+            if self._batch_bytes < FLUSH_BYTES:
+                return
+            batch = self._take_batch()
+        get_worker("record").submit(self._write, batch)
+
+    def _take_batch(self):
+        """Swap out the pending batch (caller holds _lock)."""
+        batch, self._batch = self._batch, []
+        self._batch_bytes = 0
+        return batch
+
+    def flush(self):
+        """Write everything recorded so far; blocks until it is on disk (or in the gzip stream)."""
+        with self._lock:
+            batch = self._take_batch()
+        get_worker("record").submit(self._write, batch).result()
+
+    def close(self):
+        """Finish the recording. Returns (events, chars) written."""
+        with self._lock:
+            if self._closed:
+                return self.events, self.chars
+            self._closed = True
+            batch = self._take_batch()
+        get_worker("record").submit(self._write, batch, True).result()
+        return self.events, self.chars
+
+    # ---------------------------
+    # Writer thread
+    # ---------------------------
+    def _write(self, batch, final: bool = False):
+        lines = []
+        for timestamp, code, data, translate in batch:
+            if isinstance(data, bytes):
+                data = self._decoder.decode(data)
+            if translate:
+                data = data.replace("\n", "\r\n")
+            if not data and code == "o":
+                continue
+            lines.append(json.dumps([round(timestamp - self._start, 6), code, data], ensure_ascii=False))
+            self.events += 1
+            self.chars += len(data)
+        if final:
+            tail = self._decoder.decode(b"", final=True)
+            if tail:
+                lines.append(json.dumps([round(time.monotonic() - self._start, 6), "o", tail],
+                                        ensure_ascii=False))
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+        if final:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+# ---------------------------
+# Replay
+# ---------------------------
+def read_asciicast(path: str):
+    """
+    Open an asciicast v2 recording (plain or gzip). Returns (header dict,
+    iterator of (time, code, data)). Raises OSError / ValueError.
+    """
+    with open(path, "rb") as f:
+        compressed = f.read(2) == _GZIP_MAGIC
+    if compressed:
+        import gzip
+        f = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        f = open(path, "r", encoding="utf-8")
+    try:
+        header = json.loads(f.readline() or "null")
+    except ValueError:
+        f.close()
+        raise ValueError(f"{path}: not an asciicast file")
+    if not isinstance(header, dict) or header.get("version") != 2:
+        f.close()
+        raise ValueError(f"{path}: not an asciicast v2 recording")
+
+    def events():
+        with f:
+            for line in f:
+                if line.strip():
+                    timestamp, code, data = json.loads(line)
+                    yield float(timestamp), code, data
+
+    return header, events()
+
+
+def recorded_here(header: dict) -> bool:
+    """True for recordings written by AsciicastRecorder (with screen/text markers)."""
+    return (header.get("env") or {}).get("TERM_PROGRAM") == PROGRAM
+
+
+def paced(events, speed: float = 1.0, idle_time_limit: float = None, stop=None):
+    """
+    Yield (code, data) from events at their recorded times divided by speed;
+    speed=None replays at maximum speed. Pauses longer than idle_time_limit
+    (recorded seconds) are shortened to it. stop: threading.Event that ends
+    the replay early.
+    """
+    started = time.monotonic()
+    position = 0.0  # recorded time reached, after idle limiting
+    previous = 0.0
+    for timestamp, code, data in events:
+        if stop is not None and stop.is_set():
+            return
+        gap = max(0.0, timestamp - previous)
+        previous = timestamp
+        if idle_time_limit is not None:
+            gap = min(gap, idle_time_limit)
+        position += gap
+        if speed is not None:
+            delay = started + position / speed - time.monotonic()
+            if delay > 0:
+                if stop is not None:
+                    if stop.wait(delay):
+                        return
+                else:
+                    time.sleep(delay)
+        yield code, data
@@ -0,0 +1,94 @@
+# terminal_core/screen.py
+"""
+VT100/xterm screen model for PTY-backed applications.
+
+Raw PTY bytes are fed into a pyte.Screen through a pyte.ByteStream, so escape
+sequences are interpreted instead of being printed. The GUI asks for the rows
+that changed since its last frame (take_dirty, or take_dirty_cells with the
+colors and attributes for the cell grid renderer) and redraws only those.
+"""
+import threading
+
+import pyte
+
+
+class ScreenModel:
+    """
+    Thread-safe wrapper around pyte.Screen + pyte.ByteStream.
+    feed() is called from the PTY reader thread, take_dirty() from the GUI thread.
+    """
+
+    def __init__(self, columns: int = 80, lines: int = 24):
+        self._lock = threading.Lock()
+        self.screen = pyte.Screen(columns, lines)
+        self.stream = pyte.ByteStream(self.screen)
+
+    @property
+    def columns(self) -> int:
+        return self.screen.columns
+
+    @property
+    def lines(self) -> int:
+        return self.screen.lines
+
+    def feed(self, data: bytes):
+        """Interpret a chunk of PTY output."""
+        with self._lock:
+            self.stream.feed(data)
+
+    def resize(self, lines: int, columns: int):
+        """Resize the screen; every row becomes dirty."""
+        with self._lock:
+            self.screen.resize(lines, columns)
+            self.screen.dirty.update(range(self.screen.lines))
+
+    def invalidate(self):
+        """Mark every row dirty (the renderer's colors or font changed)."""
+        with self._lock:
+            self.screen.dirty.update(range(self.screen.lines))
+
+    def take_dirty(self) -> dict:
+        """
+        Return {row: text} for every row changed since the previous call and
+        reset the dirty set. Trailing blanks are stripped.
+        """
+        with self._lock:
+            if not self.screen.dirty:
+                return {}
+            rows = {}
+            buffer = self.screen.buffer
+            columns = self.screen.columns
+            for y in self.screen.dirty:
+                if 0 <= y < self.screen.lines:
+                    line = buffer[y]
+                    rows[y] = "".join(line[x].data for x in range(columns)).rstrip()
+            self.screen.dirty.clear()
+            return rows
+
+    def take_dirty_cells(self) -> dict:
+        """
+        Like take_dirty(), but {row: [pyte Char per column]} with the styles.
+        The cell after a wide character holds data "".
+        """
+        with self._lock:
+            if not self.screen.dirty:
+                return {}
+            rows = {}
+            buffer = self.screen.buffer
+            columns = self.screen.columns
+            for y in self.screen.dirty:
+                if 0 <= y < self.screen.lines:
+                    line = buffer[y]
+                    rows[y] = [line[x] for x in range(columns)]
+            self.screen.dirty.clear()
+            return rows
+
+    def cursor(self):
+        """(row, column) of the terminal cursor."""
+        with self._lock:
+            return self.screen.cursor.y, self.screen.cursor.x
+
+    def display(self) -> list:
+        """Full screen contents, one string per row."""
+        with self._lock:
+            return [row.rstrip() for row in self.screen.display]
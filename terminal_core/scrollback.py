@@ -0,0 +1,167 @@
+# terminal_core/scrollback.py
+"""
+Compact scrollback line store.
+
+Completed lines are packed into sealed blocks of BLOCK_LINES lines, each kept
+as one joined string plus an offset array, instead of one Python str per line.
+Lines are addressed by absolute index (the index a line had when it was
+appended), so callers can keep references across trimming; trimming drops
+whole blocks from the front and only advances `first`.
+"""
+import re
+from array import array
+from collections import deque
+from itertools import islice
+
+BLOCK_LINES = 1024
+
+_OVERWRITE = re.compile("([\r\b])")
+
+
+def resolve_overwrites(line: str) -> str:
+    """
+    The text a terminal shows for `line`: after a carriage return the rest
+    overwrites the line from its start, after a backspace from one column back
+    (progress bars, spinners).
+    """
+    if "\r" not in line and "\b" not in line:
+        return line
+    cells = []
+    column = 0
+    for piece in _OVERWRITE.split(line):
+        if piece == "\r":
+            column = 0
+        elif piece == "\b":
+            column = max(0, column - 1)
+        elif piece:
+            cells[column:column + len(piece)] = piece
+            column += len(piece)
+    return "".join(cells)
+
+
+class _Block:
+    __slots__ = ("text", "offsets")
+
+    def __init__(self, lines):
+        self.text = "\n".join(lines)
+        offsets = array("L", [0])
+        pos = 0
+        for line in lines:
+            pos += len(line) + 1
+            offsets.append(pos)
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def line(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1] - 1]
+
+
+class LineStore:
+    """
+    Append-only store of text lines with an optional line limit.
+
+    - append(text): add output; text may contain any number of newlines.
+    - first / end: absolute index range of stored complete lines.
+    - line(i), lines(start, stop): read by absolute index.
+    - tail: the current unterminated line (not counted in len()).
+
+    Carriage returns and backspaces are applied as a terminal would
+    (resolve_overwrites), so stored lines hold what was shown.
+    """
+
+    def __init__(self, max_lines: int = None):
+        self.max_lines = max_lines
+        self.first = 0
+        self._blocks = deque()
+        self._open = []  # completed lines not yet sealed into a block
+        self._partial = []  # pieces of the unterminated last line
+        self._sealed_lines = 0
+
+    def __len__(self):
+        return self._sealed_lines + len(self._open)
+
+    @property
+    def end(self) -> int:
+        return self.first + len(self)
+
+    @property
+    def tail(self) -> str:
+        return resolve_overwrites("".join(self._partial))
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def append(self, text: str):
+        if not text:
+            return
+        parts = text.split("\n")
+        if len(parts) == 1:
+            self._partial.append(text)
+            return
+        self._partial.append(parts[0])
+        self._open.append(resolve_overwrites("".join(self._partial)))
+        if "\r" in text or "\b" in text:
+            self._open.extend(map(resolve_overwrites, parts[1:-1]))
+        else:
+            self._open.extend(parts[1:-1])
+        self._partial = [parts[-1]] if parts[-1] else []
+
+        while len(self._open) >= BLOCK_LINES:
+            block = _Block(self._open[:BLOCK_LINES])
+            del self._open[:BLOCK_LINES]
+            self._blocks.append(block)
+            self._sealed_lines += len(block)
+        self._trim()
+
+    def _trim(self):
+        # Drop whole blocks only, so the store may exceed max_lines by < BLOCK_LINES
+        if self.max_lines is None:
+            return
+        while self._blocks and len(self) - len(self._blocks[0]) >= self.max_lines:
+            block = self._blocks.popleft()
+            self._sealed_lines -= len(block)
+            self.first += len(block)
+
+    def clear(self):
+        self.first = self.end
+        self._blocks.clear()
+        self._open = []
+        self._partial = []
+        self._sealed_lines = 0
+
+    # ---------------------------
+    # Reading
+    # ---------------------------
+    def line(self, index: int) -> str:
+        rel = index - self.first
+        if rel < 0 or rel >= len(self):
+            raise IndexError(index)
+        if rel >= self._sealed_lines:
+            return self._open[rel - self._sealed_lines]
+        return self._blocks[rel // BLOCK_LINES].line(rel % BLOCK_LINES)
+
+    def lines(self, start: int, stop: int) -> list:
+        """Lines with absolute indices in [start, stop), clamped to what is stored."""
+        start = max(start, self.first)
+        stop = min(stop, self.end)
+        return [self.line(i) for i in range(start, stop)]
+
+    def segments(self, start: int = None) -> list:
+        """
+        Snapshot of the lines from absolute index `start` on, for readers on other
+        threads: [(absolute index of the first line, joined text, offsets)], one per
+        block (the first may begin before `start`). Sealed blocks are immutable;
+        lines not yet sealed are copied into a block of their own.
+        """
+        start = self.first if start is None else max(start, self.first)
+        out = []
+        index = self.first + (start - self.first) // BLOCK_LINES * BLOCK_LINES
+        for block in islice(self._blocks, (start - self.first) // BLOCK_LINES, None):
+            out.append((index, block.text, block.offsets))
+            index += len(block)
+        if self._open and start < self.end:
+            block = _Block(self._open)
+            out.append((self.first + self._sealed_lines, block.text, block.offsets))
+        return out
@@ -0,0 +1,184 @@
+# terminal_core/search.py
+"""
+Scrollback search over a LineStore.
+
+The LineStore already is the index: as output arrives, completed lines are
+sealed into blocks of BLOCK_LINES lines, each one joined string plus an offset
+array. A search runs one regex pass over each block's text (C speed) and maps
+match positions to lines by bisecting the offsets; literal queries first
+skip blocks that do not contain the query at all. Sealed blocks never change,
+so the scan runs on a worker thread against a snapshot taken on the main
+thread, and output that arrives later is searched incrementally from where
+the previous pass stopped (start() again).
+
+Matches are kept sorted in compact arrays: next/previous from any position is
+a bisect, and the UI asks only for the matches of the lines it shows.
+"""
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from terminal_core.workers import get_worker
+
+# Matches collected per search at most (the count is then shown as "N+")
+MAX_MATCHES = 1000000
+
+
+def compile_query(query: str, regex: bool = False, case_sensitive: bool = None):
+    """
+    Pattern for query. case_sensitive=None is smart case: sensitive only when
+    the query contains uppercase. Raises re.error for a bad regex.
+    """
+    if case_sensitive is None:
+        case_sensitive = query != query.lower()
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+    return re.compile(query if regex else re.escape(query), flags)
+
+
+class Matches:
+    """Sorted match positions: absolute line, start column and end column."""
+
+    __slots__ = ("lines", "starts", "ends")
+
+    def __init__(self):
+        self.lines = array("q")
+        self.starts = array("L")
+        self.ends = array("L")
+
+    def __len__(self):
+        return len(self.lines)
+
+    def get(self, i: int):
+        """(line, start, end) of match i."""
+        return self.lines[i], self.starts[i], self.ends[i]
+
+    def extend(self, other: "Matches"):
+        self.lines.extend(other.lines)
+        self.starts.extend(other.starts)
+        self.ends.extend(other.ends)
+
+    def drop_before(self, line: int) -> int:
+        """Forget matches on lines before `line` (trimmed from the store). Returns how many."""
+        count = bisect_left(self.lines, line)
+        if count:
+            del self.lines[:count]
+            del self.starts[:count]
+            del self.ends[:count]
+        return count
+
+    def between(self, first: int, last: int):
+        """Index range [lo, hi) of the matches on lines first..last."""
+        return bisect_left(self.lines, first), bisect_right(self.lines, last)
+
+    def step(self, line: int, column: int, forward: bool = True):
+        """
+        Index of the first match after (line, column), or of the last one before
+        it when not forward, wrapping around. None when there are no matches.
+        """
+        if not self.lines:
+            return None
+        lo, hi = self.between(line, line)
+        if forward:
+            for i in range(lo, hi):
+                if self.starts[i] > column:
+                    return i
+            return hi % len(self.lines)
+        for i in range(hi - 1, lo - 1, -1):
+            if self.starts[i] < column:
+                return i
+        return (lo - 1) % len(self.lines)
+
+
+class ScrollbackSearch:
+    """
+    One query over a LineStore.
+
+    start() (main thread) snapshots the lines not searched yet and scans them
+    on the search thread; poll() (main thread) moves what was found so far
+    into `matches`. cancel() stops the scan at the next block.
+    """
+
+    def __init__(self, store, query: str, regex: bool = False, case_sensitive: bool = None):
+        self.store = store
+        self.pattern = compile_query(query, regex, case_sensitive)  # raises re.error
+        # Blocks without the query are skipped by a substring test first (on
+        # lowercased text when ignoring case)
+        self._literal = None
+        self._fold = bool(self.pattern.flags & re.IGNORECASE)
+        if not regex:
+            self._literal = query.lower() if self._fold else query
+        self.matches = Matches()
+        self.searched_end = store.first  # lines before this index have been searched
+        self.truncated = False  # stopped at MAX_MATCHES
+        self._found = Matches()  # filled by the search thread, handed over by poll()
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+
+    @property
+    def running(self) -> bool:
+        return not self._idle.is_set()
+
+    def start(self) -> bool:
+        """Search the lines added since the previous pass. Returns False if there were none."""
+        if self.running or self.truncated or self._cancel.is_set():
+            return False
+        start = max(self.searched_end, self.store.first)
+        if start >= self.store.end:
+            return False
+        segments = self.store.segments(start)
+        self.searched_end = self.store.end
+        self._idle.clear()
+        get_worker("search").submit(self._scan, segments, start)
+        return True
+
+    def poll(self) -> bool:
+        """Take the matches found so far. Returns True while the scan is still running."""
+        running = self.running
+        with self._lock:
+            found, self._found = self._found, Matches()
+        if found:
+            self.matches.extend(found)
+        return running
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until the current pass finishes (then poll()). Returns False on timeout."""
+        return self._idle.wait(timeout)
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _scan(self, segments, start: int):
+        pattern = self.pattern
+        literal = self._literal
+        fold = self._fold
+        total = len(self.matches)
+        try:
+            for first, text, offsets in segments:
+                if self._cancel.is_set():
+                    break
+                if literal is not None and literal not in (text.lower() if fold else text):
+                    continue
+                found = Matches()
+                for match in pattern.finditer(text):
+                    begin, end = match.span()
+                    if begin == end:
+                        continue  # empty matches (e.g. "^") have nothing to show
+                    row = bisect_right(offsets, begin) - 1
+                    line = first + row
+                    if line < start:
+                        continue  # searched by an earlier pass
+                    found.lines.append(line)
+                    found.starts.append(begin - offsets[row])
+                    found.ends.append(min(end, offsets[row + 1] - 1) - offsets[row])
+                if found:
+                    total += len(found)
+                    with self._lock:
+                        self._found.extend(found)
+                    if total >= MAX_MATCHES:
+                        self.truncated = True
+                        break
+        finally:
+            self._idle.set()
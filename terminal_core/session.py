@@ -0,0 +1,257 @@
+# terminal_core/session.py
+"""
+Headless session API.
+
+A Session is one terminal session without a display: the Tk panes each drive
+one, and scripts, tests and load generators can use it directly.
+
+    with Session() as session:
+        result = session.run("make test", timeout=600)
+        print(result.returncode, result.stdout)
+        for kind, payload in session.stream("tail -n 100 build.log"):
+            ...
+
+Commands run in a persistent bash (terminal_core.shell), so cd, variables and
+functions carry over from one command to the next. With persistent=False, or
+when the shell cannot be started, every command runs as a process of its own
+through terminal_core.executor.stream_command (separate stderr, own process
+group, in the session's cwd; `cd` changes only that).
+
+stream() yields the executor event protocol: ("stdout" | "stderr" | "error",
+text) chunks, then ("exit", returncode). run() collects the same events into
+a CommandResult. A command that exceeds its timeout is interrupted (Ctrl-C in
+the shell, SIGTERM to a standalone process group) and killed KILL_GRACE
+seconds later if it is still running (the shell is then restarted by the next
+command).
+"""
+import os
+import time
+import signal
+import threading
+
+from terminal_core.shell import PersistentShell, ShellError
+
+# Seconds between interrupting a command that timed out and killing it
+KILL_GRACE = 2.0
+
+
+class CommandResult:
+    """Outcome of Session.run(). to_dict() gives a JSON-ready dict."""
+
+    __slots__ = ("command", "returncode", "stdout", "stderr", "error", "duration", "timed_out", "truncated", "cwd")
+
+    def __init__(self, command: str):
+        self.command = command
+        self.returncode = None
+        self.stdout = ""
+        self.stderr = ""
+        self.error = None  # why the command could not run, if it could not
+        self.duration = 0.0  # seconds
+        self.timed_out = False
+        self.truncated = False  # output beyond max_output was dropped
+        self.cwd = None  # working directory after the command
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and self.error is None and not self.timed_out
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"CommandResult({self.command!r}, returncode={self.returncode}, duration={self.duration:.3f})"
+
+
+class Session:
+    """
+    One command at a time, like a terminal. stream() and run() may be called
+    from any thread; interrupt(), send_input(), resize() and close() from any
+    other while a command runs.
+    """
+
+    def __init__(self, persistent: bool = True, cwd: str = None, columns: int = 200, lines: int = 50,
+                 reactor=None, shell: str = "bash", env: dict = None):
+        self.persistent = persistent
+        self.cwd = cwd or os.getcwd()
+        self.env = env  # environment commands start with; None = this process's
+        self.columns = columns
+        self.lines = lines
+        self.reactor = reactor  # terminal_core.reactor.Reactor for the shell's output, if shared
+        self.shell_name = shell
+        self.shell = None  # PersistentShell, created on first use
+        self.timed_out = False  # whether the last command hit its timeout
+        self._proc = None  # Popen of the running standalone command
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+    def start(self):
+        """Start the persistent shell now instead of on the first command. Raises ShellError."""
+        if self.persistent:
+            self._get_shell().ensure_started()
+
+    def _get_shell(self) -> PersistentShell:
+        with self._lock:
+            if self.shell is None:
+                self.shell = PersistentShell(self.shell_name, columns=self.columns, lines=self.lines,
+                                             cwd=self.cwd, reactor=self.reactor, env=self.env)
+            return self.shell
+
+    def close(self):
+        """Kill the running command, if any, and hang up the shell."""
+        self._signal_standalone(signal.SIGKILL)
+        if self.shell is not None:
+            self.shell.close()
+
+    # ---------------------------
+    # Running commands
+    # ---------------------------
+    def stream(self, command: str, timeout: float = None):
+        """Run command; yields executor events as the output arrives (see the module docstring)."""
+        self._idle.clear()
+        self.timed_out = False
+        deadline = None
+        if timeout is not None:
+            deadline = threading.Timer(timeout, self._on_timeout)
+            deadline.daemon = True
+            deadline.start()
+        try:
+            if not self.persistent:
+                yield from self._standalone(command)
+                return
+            shell = self._get_shell()
+            try:
+                events = shell.stream(command)
+                first = next(events)  # starts the shell if needed (may raise ShellError)
+            except ShellError as e:
+                yield ("stderr", f"Persistent shell unavailable ({e}); running standalone.\n")
+                yield from self._standalone(command)
+                return
+            yield first
+            yield from events
+            self.cwd = shell.cwd
+        finally:
+            if deadline is not None:
+                deadline.cancel()
+            self._idle.set()
+
+    def run(self, command: str, timeout: float = None, max_output: int = None) -> CommandResult:
+        """Run command to completion. max_output caps the characters kept per stream."""
+        result = CommandResult(command)
+        parts = {"stdout": [], "stderr": []}
+        sizes = {"stdout": 0, "stderr": 0}
+        started = time.perf_counter()
+        for kind, payload in self.stream(command, timeout):
+            if kind == "exit":
+                result.returncode = payload
+            elif kind == "error":
+                result.error = payload
+            elif kind in parts:
+                if max_output is not None:
+                    room = max_output - sizes[kind]
+                    if len(payload) > room:
+                        result.truncated = True
+                        payload = payload[:max(room, 0)]
+                parts[kind].append(payload)
+                sizes[kind] += len(payload)
+        result.duration = time.perf_counter() - started
+        result.stdout = "".join(parts["stdout"])
+        result.stderr = "".join(parts["stderr"])
+        result.timed_out = self.timed_out
+        result.cwd = self.cwd
+        return result
+
+    def _standalone(self, command: str):
+        from terminal_core.executor import stream_command
+        parts = command.split()
+        if parts and parts[0] == "cd" and len(parts) <= 2:
+            # The executor's cd builtin, for this session only (no os.chdir)
+            target = os.path.join(self.cwd, os.path.expanduser(parts[1] if len(parts) > 1 else "~"))
+            if os.path.isdir(target):
+                self.cwd = os.path.normpath(target)
+                yield ("stdout", f"Directory changed to: {self.cwd}")
+                yield ("exit", 0)
+            else:
+                yield ("error", f"Error: Directory not found: {parts[1]}")
+                yield ("exit", 1)
+            return
+        try:
+            yield from stream_command(command, on_spawn=self._set_proc, new_session=True, cwd=self.cwd,
+                                      env=self.env)
+        finally:
+            self._proc = None
+
+    def _set_proc(self, proc):
+        self._proc = proc
+
+    # ---------------------------
+    # Interacting with the running command
+    # ---------------------------
+    def send_input(self, data):
+        """Type str/bytes into the running command (persistent shell only: standalone stdin is closed)."""
+        if not self.persistent or self.shell is None or not self.shell.alive:
+            raise ShellError("input needs a running persistent shell")
+        self.shell.send_input(data)
+
+    def environment(self) -> dict:
+        """
+        The environment commands run with: the variables the shell exports
+        (see PersistentShell.environment), or the session's starting
+        environment when no persistent shell is running. Waits for a running
+        command to end.
+        """
+        shell = self.shell
+        if not self.persistent or shell is None or not shell.alive:
+            return dict(os.environ if self.env is None else self.env)
+        return shell.environment()
+
+    def interrupt(self):
+        """Ctrl-C for the running command."""
+        if self._proc is not None:
+            self._signal_standalone(signal.SIGINT)
+        elif self.shell is not None:
+            self.shell.interrupt()
+
+    def resize(self, lines: int, columns: int):
+        self.lines, self.columns = lines, columns
+        if self.shell is not None:
+            self.shell.resize(lines, columns)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait until no command is running. Returns False on timeout."""
+        return self._idle.wait(timeout)
+
+    @property
+    def busy(self) -> bool:
+        return not self._idle.is_set()
+
+    def _signal_standalone(self, sig: int):
+        proc = self._proc
+        if proc is not None:
+            try:
+                os.killpg(proc.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def _on_timeout(self):
+        # Timer thread: interrupt now, kill if that does not end the command
+        self.timed_out = True
+        if self._proc is not None:
+            self._signal_standalone(signal.SIGTERM)
+        elif self.shell is not None:
+            self.shell.interrupt()
+        if not self._idle.wait(KILL_GRACE):
+            if self._proc is not None:
+                self._signal_standalone(signal.SIGKILL)
+            elif self.shell is not None:
+                self.shell.close()  # ends the command with "[shell exited]"
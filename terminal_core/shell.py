@@ -0,0 +1,346 @@
+# terminal_core/shell.py
+"""
+Persistent shell backend.
+
+One bash process is started inside a PTY and kept alive for the whole session,
+so `cd`, environment variables, aliases and functions persist between commands
+and no fork+exec+bash startup is paid per line. Commands are written to the
+shell's stdin; the end of each command is detected by an OSC marker emitted
+from PROMPT_COMMAND, which also carries the exit status and working directory.
+Input typed while a command runs goes to it with send_input(); the terminal
+echoes it from the first keystroke until the command ends (commands are
+written with echo off). Output is not shown through a pager (PAGER=cat).
+
+Output is read by a reader thread per shell, or, given a shared
+terminal_core.reactor.Reactor, by the reactor thread (no thread per shell).
+Reading pauses while more than QUEUE_HIGH_WATER characters wait for the
+consumer of stream(), so a flooding command is held back by the kernel
+instead of filling memory.
+
+Output that arrives while no command runs (a job started with `&` inside a
+command line, bash's "Done" notices) is kept and yielded first by the next
+stream().
+"""
+import os
+import re
+import time
+import queue
+import secrets
+import threading
+
+from terminal_core.pty_session import PtySession
+from terminal_core.capture import incremental_decoder
+from terminal_core.metrics import STATS
+
+# Private OSC number used for completion markers: ESC ] 6973 ; token ; status ; cwd BEL
+MARKER_OSC = b"\x1b]6973;"
+MARKER_END = b"\x07"
+
+# Output characters queued for stream()'s consumer: above QUEUE_HIGH_WATER the
+# PTY is no longer read, at QUEUE_LOW_WATER reading resumes
+QUEUE_HIGH_WATER = 1024 * 1024
+QUEUE_LOW_WATER = 256 * 1024
+
+# Set by bash as it runs, so not part of environment()
+_SHELL_MAINTAINED = frozenset(("PWD", "OLDPWD", "SHLVL", "_"))
+# Settings the shell is started with for its own use. stdout is a terminal, so
+# git, man-less tools etc. would otherwise start a pager that waits for keys
+_SHELL_SETTINGS = {"PS1": "", "PS2": "", "HISTFILE": "/dev/null", "PAGER": "cat", "GIT_PAGER": "cat"}
+
+# \r before \n changes nothing on screen (printf '\r\n' arrives as \r\r\n)
+_CR_LF = re.compile("\r+\n")
+
+
+class ShellError(Exception):
+    """The persistent shell could not be started or died unexpectedly."""
+
+
+class PersistentShell:
+    """
+    Long-lived bash session. stream(command) has the same event protocol as
+    terminal_core.executor.stream_command: ("stdout", text) chunks followed by
+    ("exit", returncode). stdout and stderr share the PTY, so no "stderr"
+    events are produced.
+
+    Commands are serialized: a second stream() waits until the first finishes.
+    """
+
+    def __init__(self, shell: str = "bash", columns: int = 200, lines: int = 50, cwd: str = None,
+                 reactor=None, env: dict = None):
+        self.shell = shell
+        self.columns = columns
+        self.lines = lines
+        self.cwd = cwd or os.getcwd()
+        self.env = env  # environment the shell starts with; None = this process's
+        self.last_status = 0
+        self.reactor = reactor  # Reactor to read through; None = a reader thread of its own
+
+        self._session = None
+        self._reader = None
+        self._running = False  # the current session is being read
+        self._token = secrets.token_hex(8).encode()
+        self._marker = MARKER_OSC + self._token + b";"
+        self._run_lock = threading.Lock()
+        self._events = None  # queue.Queue of the running command, if any
+        self._ready = threading.Event()
+        self._pending = b""
+        self._decoder = incremental_decoder()
+        self._queued = 0  # characters put in _events and not yet taken by stream()
+        self._flow_lock = threading.Lock()
+        self._echo = False  # local echo turned on for the running command's input
+        self._idle_output = []  # text that arrived between commands, for the next stream()
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+    def start(self, timeout: float = 5.0):
+        """Spawn the shell and wait until it reports its first marker."""
+        env = dict(os.environ if self.env is None else self.env)
+        env.update(_SHELL_SETTINGS)
+        session = PtySession(
+            [self.shell, "--noprofile", "--norc", "--noediting"], columns=self.columns, lines=self.lines, env=env,
+            cwd=self.cwd,
+        )
+        self._session = session
+        try:
+            session.start()
+        except OSError as e:
+            raise ShellError(f"Failed to start {self.shell}: {e}")
+
+        self._ready.clear()
+        self._running = True
+        if self.reactor is not None:
+            session.attach(self.reactor, self._on_data, lambda status: self._session_ended(session, status))
+        else:
+            self._reader = threading.Thread(target=self._read_thread, daemon=True)
+            self._reader.start()
+
+        token = self._token.decode()
+        self._session.write(
+            "stty -echo; PS1=''; PS2=''; "
+            f"PROMPT_COMMAND='printf \"\\033]6973;{token};%s;%s\\007\" \"$?\" \"$PWD\"'\n"
+        )
+        if not self._ready.wait(timeout):
+            self.close()
+            raise ShellError("Shell did not become ready.")
+
+    def ensure_started(self):
+        """Start the shell unless it is already running (e.g. to pre-warm it at launch)."""
+        with self._run_lock:
+            if not self.alive:
+                self.start()
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    @property
+    def alive(self) -> bool:
+        return self._session is not None and self._running
+
+    def resize(self, lines: int, columns: int):
+        self.lines, self.columns = lines, columns
+        if self._session is not None:
+            self._session.resize(lines, columns)
+
+    def interrupt(self):
+        """Send Ctrl-C to the foreground command via the terminal line discipline."""
+        if self._session is not None:
+            self._session.write(b"\x03")
+
+    def write(self, data):
+        """Send input (str or bytes) to the running command through the PTY."""
+        if self._session is None:
+            raise ShellError("The shell is not running.")
+        self._session.write(data)
+
+    def send_input(self, data):
+        """Type input (str or bytes) into the running command, echoed like in a terminal."""
+        session = self._session
+        if session is None:
+            raise ShellError("The shell is not running.")
+        if not self._echo and self._events is not None:
+            # The command line itself was long processed with echo off
+            self._echo = True
+            session.set_echo(True)
+        session.write(data)
+
+    # ---------------------------
+    # Running commands
+    # ---------------------------
+    def stream(self, command: str):
+        """
+        Run command in the persistent shell and yield its output as it arrives.
+        Yields ("stdout", text) chunks and finally ("exit", returncode).
+        """
+        return self._run(command, take_idle=True)
+
+    def environment(self) -> dict:
+        """
+        The variables the shell exports (after any export so far), for
+        commands started outside it. Variables bash maintains itself (PWD,
+        OLDPWD, SHLVL, _) are left out, and the settings the shell was started
+        with for its own use (PS1, PAGER=cat ...) are back to their starting
+        values unless a command changed them. Waits for a running command to end.
+        """
+        output = "".join(payload for kind, payload in self._run("env -0", take_idle=False) if kind == "stdout")
+        start = os.environ if self.env is None else self.env
+        env = {}
+        for entry in output.split("\0"):
+            name, sep, value = entry.partition("=")
+            if not sep or not name or name in _SHELL_MAINTAINED:
+                continue
+            if _SHELL_SETTINGS.get(name) == value:
+                if name not in start:
+                    continue
+                value = start[name]
+            env[name] = value
+        return env
+
+    def _run(self, command: str, take_idle: bool):
+        with self._run_lock:
+            if not self.alive:
+                self.start()
+            events = queue.Queue()
+            with self._flow_lock:
+                idle = []
+                if take_idle:
+                    idle, self._idle_output = self._idle_output, []
+                self._events = events
+            # Output of the shell's background jobs since the last command comes first
+            self._count_queued(None)
+            if idle:
+                text = "".join(idle)
+                events.put(("stdout", text))
+                self._count_queued(len(text))
+            started = time.perf_counter()
+            # Dedicated line so a trailing comment or backslash cannot swallow it
+            self._session.write(command.rstrip("\n") + "\n")
+            carriage_return = ""  # a chunk's trailing \r, held until we know whether \n follows
+            while True:
+                kind, payload = events.get()
+                if kind == "stdout":
+                    self._count_queued(-len(payload))
+                    text = carriage_return + payload
+                    carriage_return = "\r" if text.endswith("\r") else ""
+                    text = text[:len(text) - len(carriage_return)].replace("\r\n", "\n")
+                    if "\r\n" in text:
+                        text = _CR_LF.sub("\n", text)
+                    if text:
+                        yield ("stdout", text)
+                    continue
+                if carriage_return:
+                    yield ("stdout", carriage_return)
+                    carriage_return = ""
+                yield (kind, payload)
+                if kind == "exit":
+                    if STATS.enabled:
+                        STATS.histogram("shell.command").observe(time.perf_counter() - started)
+                    break
+
+    # ---------------------------
+    # Reading (reader thread or reactor thread)
+    # ---------------------------
+    def _read_thread(self):
+        session = self._session
+        try:
+            session.read_loop(self._on_data)
+        finally:
+            self._session_ended(session, session.wait())
+
+    def _session_ended(self, session, status):
+        if self._session is not None and self._session is not session:
+            return  # an older session, already replaced by a restart
+        self._running = False
+        events = self._events
+        self._events = None
+        if events is not None:
+            events.put(("stdout", "\n[shell exited]\n"))
+            events.put(("exit", status if status is not None else -1))
+
+    def _on_data(self, data: bytes):
+        data = self._pending + data
+        self._pending = b""
+        while data:
+            start = data.find(self._marker)
+            if start < 0:
+                keep = _partial_prefix_len(data, self._marker)
+                if keep:
+                    self._pending = data[-keep:]
+                    data = data[:-keep]
+                self._emit(data)
+                return
+            end = data.find(MARKER_END, start)
+            if end < 0:
+                self._emit(data[:start])
+                self._pending = data[start:]
+                return
+            self._emit(data[:start])
+            self._on_marker(data[start + len(self._marker):end])
+            data = data[end + 1:]
+
+    def _emit(self, data: bytes):
+        if not data:
+            return
+        if STATS.enabled:
+            start = time.perf_counter()
+            text = self._decoder.decode(data)
+            STATS.histogram("decode").observe(time.perf_counter() - start)
+        else:
+            text = self._decoder.decode(data)
+        if not text or not self._ready.is_set():
+            return  # nothing, or the echo of the start-up line
+        with self._flow_lock:
+            events = self._events
+            if events is None:
+                self._idle_output.append(text)
+        if events is not None:
+            events.put(("stdout", text))
+        self._count_queued(len(text))
+
+    def _count_queued(self, delta):
+        """Track queued output (delta None: start over) and pause/resume reading at the watermarks."""
+        with self._flow_lock:
+            self._queued = 0 if delta is None else max(0, self._queued + delta)
+            session = self._session
+            if session is None:
+                return
+            if session.paused:
+                if self._queued <= QUEUE_LOW_WATER:
+                    session.resume_reading()
+            elif self._queued > QUEUE_HIGH_WATER:
+                session.pause_reading()
+
+    def _on_marker(self, payload: bytes):
+        status, _, cwd = payload.partition(b";")
+        try:
+            self.last_status = int(status)
+        except ValueError:
+            self.last_status = -1
+        self.cwd = os.fsdecode(cwd) or self.cwd
+
+        if not self._ready.is_set():
+            # First marker: the init line and its echo are discarded
+            self._ready.set()
+            return
+
+        if self._echo:
+            self._echo = False
+            if self._session is not None:
+                self._session.set_echo(False)
+        tail = self._decoder.decode(b"", final=True)
+        events = self._events
+        self._events = None
+        if events is not None:
+            if tail:
+                events.put(("stdout", tail))
+            events.put(("exit", self.last_status))
+
+
+def _partial_prefix_len(data: bytes, marker: bytes) -> int:
+    """Length of the longest suffix of data that is a proper prefix of marker."""
+    for size in range(min(len(marker) - 1, len(data)), 0, -1):
+        if marker.startswith(data[-size:]):
+            return size
+    return 0
@@ -0,0 +1,23 @@
+# terminal_core/workers.py
+"""
+Process-wide background workers, one thread per name.
+
+get_worker("complete") returns the executor whose thread is named
+"0term-complete", created on first use (concurrent.futures is slow to import
+at startup). A single thread per name keeps that module's jobs in submission
+order.
+"""
+import threading
+
+_workers = {}  # name -> ThreadPoolExecutor
+_lock = threading.Lock()
+
+
+def get_worker(name: str):
+    """The single-thread executor for `name` (any thread)."""
+    with _lock:
+        worker = _workers.get(name)
+        if worker is None:
+            from concurrent.futures import ThreadPoolExecutor
+            worker = _workers[name] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"0term-{name}")
+        return worker
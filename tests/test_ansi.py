@@ -0,0 +1,37 @@
+# tests/test_ansi.py
+import unittest
+
+from terminal_core.ansi import SgrParser, DEFAULT_STYLE
+
+
+def _styles(text: str) -> list:
+    return [style for _, style in SgrParser().feed(text)]
+
+
+class ExtendedColorTest(unittest.TestCase):
+    def test_indexed_color_both_syntaxes(self):
+        for sequence in ("\x1b[38;5;100mx", "\x1b[38:5:100mx"):
+            with self.subTest(sequence=sequence):
+                self.assertEqual(_styles(sequence)[-1].fg, 100)
+        for sequence in ("\x1b[48;5;100mx", "\x1b[48:5:100mx"):
+            with self.subTest(sequence=sequence):
+                self.assertEqual(_styles(sequence)[-1].bg, 100)
+
+    def test_rgb_color_both_syntaxes(self):
+        # 38:2::r:g:b has an (empty) color space id, 38:2:r:g:b is the common short form
+        for sequence in ("\x1b[38;2;1;2;3mx", "\x1b[38:2::1:2:3mx", "\x1b[38:2:1:2:3mx"):
+            with self.subTest(sequence=sequence):
+                self.assertEqual(_styles(sequence)[-1].fg, "#010203")
+
+    def test_colon_color_combined_with_other_codes(self):
+        style = _styles("\x1b[1;38:5:100;4mx")[-1]
+        self.assertEqual((style.bold, style.fg, style.underline), (True, 100, True))
+        self.assertEqual(_styles("\x1b[38:5:100;0mx")[-1], DEFAULT_STYLE)
+
+    def test_colon_underline(self):
+        self.assertTrue(_styles("\x1b[4:3mx")[-1].underline)
+        self.assertFalse(_styles("\x1b[4m\x1b[4:0mx")[-1].underline)
+
+
+if __name__ == "__main__":
+    unittest.main()
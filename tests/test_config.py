@@ -0,0 +1,70 @@
+# tests/test_config.py
+import unittest
+
+from utils.config import Settings, settings_from
+
+
+class SettingsFromTest(unittest.TestCase):
+    def test_empty_table_gives_defaults(self):
+        settings = settings_from({})
+        self.assertEqual(settings.errors, [])
+        self.assertEqual(settings.frame_rate, Settings().frame_rate)
+        self.assertIsInstance(settings.tui_apps, frozenset)
+
+    def test_valid_values(self):
+        settings = settings_from({
+            "theme": "Custom",
+            "themes": {"Custom": {"bg": "#000000", "text": "#ffffff", "error": "#ff0000", "cursor": "#00ff00"}},
+            "font": {"size": 14},
+            "terminal": {"tui_apps": ["vim", "btop"], "renderer": "grid"},
+            "cache": {"commands": ["git status*", {"pattern": "ls*", "ttl": 5, "inputs": [".", ".git"]}]},
+            "performance": {"frame_rate": 30},
+        })
+        self.assertEqual(settings.errors, [])
+        self.assertEqual(settings.colors["bg"], "#000000")
+        self.assertEqual((settings.font_size, settings.frame_rate, settings.screen_renderer), (14, 30, "grid"))
+        self.assertEqual(settings.tui_apps, frozenset(("vim", "btop")))
+        self.assertEqual(len(settings.cache_commands), 2)
+
+    def test_invalid_values_fall_back_to_defaults(self):
+        defaults = Settings()
+        for section, key, attr, value in (
+                ("font", "size", "font_size", 200),
+                ("font", "size", "font_size", "12"),
+                ("window", "geometry", "geometry", "big"),
+                ("terminal", "detect_links", "detect_links", 1),
+                ("terminal", "tui_apps", "tui_apps", ["vim", ""]),
+                ("performance", "frame_rate", "frame_rate", 0),
+                ("performance", "frame_rate", "frame_rate", True),
+                ("cache", "commands", "cache_commands", [{"pattern": "ls*", "ttl": "5"}]),
+                ("cache", "commands", "cache_commands", [{"ttl": 5}])):
+            with self.subTest(key=f"{section}.{key}", value=value):
+                settings = settings_from({section: {key: value}})
+                self.assertEqual(getattr(settings, attr), getattr(defaults, attr))
+                self.assertEqual(len(settings.errors), 1)
+                self.assertTrue(settings.errors[0].startswith(f"{section}.{key}: invalid value"))
+
+    def test_unknown_keys_and_bad_sections(self):
+        settings = settings_from({"colour": "red", "font": {"sise": 12}, "window": "900x600"})
+        self.assertEqual(sorted(settings.errors),
+                         ["[window] must be a table", "unknown key: colour", "unknown key: font.sise"])
+
+    def test_bad_themes(self):
+        settings = settings_from({
+            "theme": "Missing",
+            "themes": {"Partial": {"bg": "#000000"},
+                       "Named": {"bg": "black", "text": "#ffffff", "error": "#ff0000", "cursor": "#00ff00"}},
+        })
+        self.assertNotIn("Partial", settings.themes)
+        self.assertNotIn("Named", settings.themes)
+        self.assertEqual(len(settings.errors), 3)
+        self.assertEqual(settings.colors, settings.themes["Dark"])  # what an unknown theme shows
+
+    def test_read_sizes_are_consistent(self):
+        settings = settings_from({"performance": {"min_read_size": 65536, "max_read_size": 4096}})
+        self.assertEqual(settings.min_read_size, 4096)
+        self.assertEqual(len(settings.errors), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# tests/test_output_buffer.py
+import threading
+import unittest
+
+from terminal_core.output_buffer import OutputBuffer, skipped_marker
+
+
+def _text(items) -> str:
+    return "".join(text for kind, runs in items if kind == "text" for text, _ in runs)
+
+
+class DrainTest(unittest.TestCase):
+    def test_runs_are_merged_and_callbacks_ordered(self):
+        buffer = OutputBuffer()
+        self.assertTrue(buffer.write("a"))
+        self.assertFalse(buffer.write("b"))  # a frame is already scheduled
+        buffer.write("c", "error")
+        buffer.call_soon(lambda: None)
+        buffer.write("d")
+        items = buffer.drain()
+        self.assertEqual(items[0], ("text", [("ab", "default"), ("c", "error")]))
+        self.assertEqual(items[1][0], "call")
+        self.assertEqual(items[2], ("text", [("d", "default")]))
+        self.assertFalse(buffer.finish_frame())
+
+    def test_frame_budget(self):
+        buffer = OutputBuffer(max_chars_per_frame=4)
+        buffer.write("abcdef")
+        self.assertEqual(_text(buffer.drain()), "abcd")
+        self.assertTrue(buffer.finish_frame())
+        self.assertEqual(_text(buffer.drain()), "ef")
+        self.assertEqual(buffer.pending(), 0)
+
+
+class WatermarkTest(unittest.TestCase):
+    def _producer(self, buffer):
+        done = threading.Event()
+
+        def produce():
+            buffer.throttle(timeout=5)
+            done.set()
+
+        threading.Thread(target=produce, daemon=True).start()
+        return done
+
+    def test_producer_blocks_until_low_water(self):
+        buffer = OutputBuffer(max_chars_per_frame=10, high_water=30, low_water=10)
+        buffer.write("x" * 40)
+        done = self._producer(buffer)
+        self.assertFalse(done.wait(0.1))
+        buffer.drain()  # 30 left: still above low water
+        self.assertFalse(done.wait(0.1))
+        buffer.drain()
+        buffer.drain()  # 10 left
+        self.assertTrue(done.wait(2))
+        self.assertEqual(buffer.throttled, 1)
+
+    def test_below_high_water_does_not_block(self):
+        buffer = OutputBuffer(max_chars_per_frame=10, high_water=30, low_water=10)
+        buffer.write("x" * 30)
+        self.assertTrue(self._producer(buffer).wait(2))
+        self.assertEqual(buffer.throttled, 0)
+
+    def test_consumer_thread_is_never_throttled(self):
+        buffer = OutputBuffer(max_chars_per_frame=10, high_water=30, low_water=10)
+        buffer.write("x" * 100)
+        self.assertTrue(buffer.throttle(timeout=0))
+
+    def test_fast_forward_and_release_let_producers_go(self):
+        for let_go in ("fast_forward", "release"):
+            with self.subTest(let_go=let_go):
+                buffer = OutputBuffer(max_chars_per_frame=10, high_water=30, low_water=10)
+                buffer.write("x" * 40)
+                done = self._producer(buffer)
+                self.assertFalse(done.wait(0.1))
+                if let_go == "fast_forward":
+                    buffer.set_fast_forward(20)
+                else:
+                    buffer.release()
+                self.assertTrue(done.wait(2))
+
+
+class FastForwardTest(unittest.TestCase):
+    def test_trim_keeps_newest_text_and_marks_skip(self):
+        buffer = OutputBuffer(max_chars_per_frame=1000)
+        buffer.set_fast_forward(10)
+        buffer.write("a" * 15)
+        self.assertEqual(buffer.pending(), 15)  # trimmed only past twice the kept size
+        buffer.write("b" * 10)
+        self.assertEqual(buffer.pending(), 10)
+        self.assertEqual(buffer.skipped_chars, 15)
+        items = buffer.drain()
+        self.assertEqual(items, [("text", [(skipped_marker(15), "info"), ("b" * 10, "default")])])
+
+    def test_trim_keeps_callbacks(self):
+        buffer = OutputBuffer(max_chars_per_frame=1000)
+        buffer.set_fast_forward(5)
+        buffer.write("a" * 5)
+        buffer.call_soon(lambda: None)
+        buffer.write("b" * 10)
+        kinds = [kind for kind, _ in buffer.drain()]
+        self.assertIn("call", kinds)
+        self.assertEqual(buffer.pending(), 0)
+
+
+class CapacityTest(unittest.TestCase):
+    def test_oldest_text_is_dropped(self):
+        buffer = OutputBuffer(capacity=10, max_chars_per_frame=1000)
+        buffer.write("a" * 8)
+        buffer.write("b" * 8)
+        self.assertEqual(buffer.dropped_chars, 6)
+        self.assertEqual(_text(buffer.drain()), "aa" + "b" * 8)
+
+    def test_callbacks_are_kept(self):
+        buffer = OutputBuffer(capacity=5, max_chars_per_frame=1000)
+        buffer.write("a" * 5)
+        buffer.call_soon(lambda: None)
+        buffer.write("b" * 5)
+        self.assertEqual([kind for kind, _ in buffer.drain()], ["call", "text"])
+        self.assertEqual(buffer.pending(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# tests/test_output_cache.py
+import os
+import tempfile
+import unittest
+
+from terminal_core.output_cache import OutputCache, CacheRule
+
+
+class KeyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = OutputCache()
+        self.rule = CacheRule("ls*", env=("LANG",), inputs=(".", "missing"))
+
+    def test_same_inputs_same_key(self):
+        key = self.cache.key("ls -la ", self.tmp.name, self.rule, {"LANG": "C"})
+        self.assertEqual(key, self.cache.key(" ls -la", self.tmp.name, self.rule, {"LANG": "C"}))
+        self.assertEqual(key[0], "ls -la")
+        self.assertIsNone(key[3][1])  # an input that does not exist
+
+    def test_env_and_cwd_change_key(self):
+        key = self.cache.key("ls", self.tmp.name, self.rule, {"LANG": "C"})
+        self.assertNotEqual(key, self.cache.key("ls", self.tmp.name, self.rule, {"LANG": "de_DE"}))
+        self.assertNotEqual(key, self.cache.key("ls", self.tmp.name, self.rule, {}))
+        self.assertNotEqual(key, self.cache.key("ls", os.path.dirname(self.tmp.name), self.rule, {"LANG": "C"}))
+
+    def test_changed_input_changes_key(self):
+        key = self.cache.key("ls", self.tmp.name, self.rule, {})
+        with open(os.path.join(self.tmp.name, "new"), "w") as f:
+            f.write("x")
+        os.utime(self.tmp.name, ns=(0, 0))
+        self.assertNotEqual(key, self.cache.key("ls", self.tmp.name, self.rule, {}))
+
+
+class StoreTest(unittest.TestCase):
+    def test_hit_and_miss(self):
+        cache = OutputCache(max_bytes=1000)
+        self.assertIsNone(cache.get("k", 60))
+        self.assertTrue(cache.put("k", [("stdout", "a"), ("stdout", "b"), ("stderr", "c")], 0))
+        entry = cache.get("k", 60)
+        self.assertEqual(entry.events, [("stdout", "ab"), ("stderr", "c")])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_ttl_expiry(self):
+        cache = OutputCache(max_bytes=1000)
+        cache.put("k", [("stdout", "a")], 0)
+        cache.get("k", 60).created -= 10
+        self.assertIsNone(cache.get("k", 5))
+        self.assertEqual(cache.expired, 1)
+        # an expired entry is dropped, not kept for a longer ttl
+        self.assertIsNone(cache.get("k", 60))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_lru_eviction_by_bytes(self):
+        cache = OutputCache(max_bytes=100)  # entries of up to 25 bytes
+        for key in "abcd":
+            cache.put(key, [("stdout", "x" * 25)], 0)
+        cache.get("a", 60)  # now most recently used
+        cache.put("e", [("stdout", "x" * 25)], 0)
+        self.assertIsNone(cache.get("b", 60))
+        for key in "acde":
+            with self.subTest(key=key):
+                self.assertIsNotNone(cache.get(key, 60))
+        self.assertEqual((cache.evictions, cache.stats()["bytes"]), (1, 100))
+
+    def test_sizes_count_utf8_bytes(self):
+        cache = OutputCache(max_bytes=100)
+        self.assertFalse(cache.put("k", [("stdout", "é" * 13)], 0))  # 26 bytes
+        self.assertTrue(cache.put("k", [("stdout", "é" * 12)], 0))
+
+    def test_put_refuses_failed_and_oversized_runs(self):
+        cache = OutputCache(max_bytes=100)
+        self.assertFalse(cache.put("failed", [("stdout", "x")], 1))
+        self.assertFalse(cache.put("big", [("stdout", "x" * 26)], 0))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_configure_evicts_over_new_limit(self):
+        cache = OutputCache(max_bytes=100)
+        for key in "ab":
+            cache.put(key, [("stdout", "x" * 20)], 0)
+        cache.configure([], 30)
+        self.assertIsNone(cache.get("a", 60))
+        self.assertIsNotNone(cache.get("b", 60))
+
+
+if __name__ == "__main__":
+    unittest.main()
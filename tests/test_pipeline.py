@@ -0,0 +1,64 @@
+# tests/test_pipeline.py
+import unittest
+
+from terminal_core.pipeline import tokenize, parse_pipeline
+
+
+class TokenizeTest(unittest.TestCase):
+    def test_quoting(self):
+        self.assertEqual(tokenize("""grep 'a b' "c \\"d\\"" e\\ f"""),
+                         [("word", "grep"), ("word", "a b"), ("word", 'c "d"'), ("word", "e f")])
+        self.assertEqual(tokenize("echo ''"), [("word", "echo"), ("word", "")])
+
+    def test_unterminated_quote_needs_shell(self):
+        self.assertIsNone(tokenize("echo 'abc"))
+        self.assertIsNone(tokenize('echo "abc'))
+
+    def test_expansion_needs_shell(self):
+        self.assertIsNone(tokenize("echo $HOME"))
+        self.assertIsNone(tokenize('echo "$HOME"'))
+        self.assertIsNone(tokenize("ls *.py"))
+        self.assertIsNone(tokenize("true && false"))
+        self.assertEqual(tokenize("echo '$HOME *'"), [("word", "echo"), ("word", "$HOME *")])
+
+    def test_redirections(self):
+        self.assertEqual(tokenize("make 2>&1 | tee log"),
+                         [("word", "make"), ("redir", (2, ">&")), ("word", "1"), ("pipe", "|"),
+                          ("word", "tee"), ("word", "log")])
+        self.assertEqual(tokenize("make &> log"), [("word", "make"), ("redir", (-1, ">")), ("word", "log")])
+        self.assertEqual(tokenize("make &>> log"), [("word", "make"), ("redir", (-1, ">>")), ("word", "log")])
+        self.assertEqual(tokenize("sort <in >>out"),
+                         [("word", "sort"), ("redir", (0, "<")), ("word", "in"), ("redir", (1, ">>")),
+                          ("word", "out")])
+        # a quoted number is a word, not an fd
+        self.assertEqual(tokenize("echo '2'>x"), [("word", "echo"), ("word", "2"), ("redir", (1, ">")),
+                                                 ("word", "x")])
+
+
+class ParsePipelineTest(unittest.TestCase):
+    def test_stages_and_redirects(self):
+        pipeline = parse_pipeline("cat 'my file' | sort 2>&1 > out.txt")
+        self.assertEqual([stage.argv for stage in pipeline.stages], [["cat", "my file"], ["sort"]])
+        redirects = [(r.fd, r.op, r.target) for r in pipeline.stages[1].redirects]
+        self.assertEqual(redirects, [(2, ">&", "1"), (1, ">", "out.txt")])
+        self.assertEqual(pipeline.stdout_file, (">", "out.txt"))
+
+    def test_both_streams(self):
+        pipeline = parse_pipeline("ls &> out.txt")
+        redirects = [(r.fd, r.op, r.target) for r in pipeline.stages[0].redirects]
+        self.assertEqual(redirects, [(1, ">", "out.txt"), (2, ">&", "1")])
+
+    def test_falls_back_to_shell(self):
+        for command in ("cd /tmp", "echo hi | cat", "read x", "if true", "export A=1", "A=1 ls",
+                        "ls | no-such-command-here", "ls >", "ls | ", "ls 2>&3", "cat <<EOF"):
+            with self.subTest(command=command):
+                self.assertIsNone(parse_pipeline(command))
+
+    def test_command_lookup_uses_path(self):
+        self.assertIsNotNone(parse_pipeline("ls"))
+        self.assertIsNone(parse_pipeline("ls", path=""))
+        self.assertIsNotNone(parse_pipeline("/bin/ls", path=""))
+
+
+if __name__ == "__main__":
+    unittest.main()
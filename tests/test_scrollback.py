@@ -0,0 +1,71 @@
+# tests/test_scrollback.py
+import unittest
+
+from terminal_core.scrollback import LineStore, BLOCK_LINES, resolve_overwrites
+
+
+def _fill(store, count, start=0):
+    store.append("".join(f"line {i}\n" for i in range(start, start + count)))
+
+
+class ResolveOverwritesTest(unittest.TestCase):
+    def test_carriage_return_and_backspace(self):
+        self.assertEqual(resolve_overwrites("10%\r20%\r100%"), "100%")
+        self.assertEqual(resolve_overwrites("hello\rHE"), "HEllo")
+        self.assertEqual(resolve_overwrites("abc\b\bX"), "aXc")
+        self.assertEqual(resolve_overwrites("\b\ba"), "a")
+
+
+class LineStoreTest(unittest.TestCase):
+    def test_lines_and_tail(self):
+        store = LineStore()
+        store.append("a\nb")
+        store.append("c\nd\n")
+        store.append("e")
+        self.assertEqual(store.lines(0, store.end), ["a", "bc", "d"])
+        self.assertEqual(store.tail, "e")
+        self.assertEqual(len(store), 3)
+
+    def test_overwrites_are_resolved(self):
+        store = LineStore()
+        store.append("10%\r")
+        store.append("20%\r100%\nab\b")
+        store.append("c\n")
+        self.assertEqual(store.lines(0, store.end), ["100%", "ac"])
+
+    def test_trim_drops_whole_blocks(self):
+        store = LineStore(max_lines=BLOCK_LINES)
+        _fill(store, 3 * BLOCK_LINES)
+        # never fewer than max_lines, at most one block more
+        self.assertGreaterEqual(len(store), BLOCK_LINES)
+        self.assertLess(len(store), 2 * BLOCK_LINES)
+        self.assertEqual(store.first % BLOCK_LINES, 0)
+        self.assertEqual(store.end, 3 * BLOCK_LINES)
+        self.assertEqual(store.line(store.first), f"line {store.first}")
+        self.assertEqual(store.line(store.end - 1), f"line {store.end - 1}")
+
+    def test_trimmed_lines_are_gone(self):
+        store = LineStore(max_lines=BLOCK_LINES)
+        _fill(store, 3 * BLOCK_LINES)
+        with self.assertRaises(IndexError):
+            store.line(store.first - 1)
+        self.assertEqual(store.lines(0, store.first + 2), [f"line {store.first}", f"line {store.first + 1}"])
+
+    def test_segments_from_trimmed_index(self):
+        store = LineStore(max_lines=BLOCK_LINES)
+        _fill(store, 2 * BLOCK_LINES + 5)
+        segments = store.segments(0)
+        self.assertEqual(segments[0][0], store.first)
+        self.assertEqual(sum(len(offsets) - 1 for _, _, offsets in segments), len(store))
+
+    def test_clear_keeps_indices_absolute(self):
+        store = LineStore()
+        _fill(store, 10)
+        store.clear()
+        self.assertEqual((store.first, store.end), (10, 10))
+        _fill(store, 1, start=10)
+        self.assertEqual(store.line(10), "line 10")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,253 @@
+# utils/completion.py
+"""
+Cached, indexed tab-completion.
+
+- Directory listings are cached per directory as a sorted name list and
+  looked up with bisect; a cached index is reused until the directory's
+  mtime changes, so a Tab press normally costs one stat() instead of a
+  full listdir() + linear scan.
+- Executables on $PATH are indexed once and refreshed when $PATH or the
+  mtime of one of its directories changes.
+- complete_async() runs on a single worker thread with a time budget: if a
+  huge (or slow, network-mounted) directory cannot be listed in time, the
+  callback gets the partial matches and the scan finishes in the background
+  for the next Tab.
+"""
+import os
+import time
+import bisect
+import threading
+
+from terminal_core.workers import get_worker
+
+# Seconds a completion may take before partial results are returned
+COMPLETION_BUDGET = 0.15
+
+# Highest code point, used as the upper bound of a prefix range
+_MAX_CHAR = chr(0x10FFFF)
+
+
+def _prefix_range(names, prefix: str):
+    """names[lo:hi] are exactly the entries starting with prefix (names is sorted)."""
+    lo = bisect.bisect_left(names, prefix)
+    hi = bisect.bisect_left(names, prefix + _MAX_CHAR, lo)
+    return lo, hi
+
+
+def _is_dir(entry) -> bool:
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def common_prefix(words) -> str:
+    """Longest common prefix of words (bash-style completion extension)."""
+    return os.path.commonprefix(list(words)) if words else ""
+
+
+class CompletionResult:
+    __slots__ = ("word", "matches", "common", "partial")
+
+    def __init__(self, word: str, matches: list, partial: bool = False):
+        self.word = word  # the text that was completed
+        self.matches = matches  # full replacement candidates, sorted
+        self.common = common_prefix(matches)  # what the word can be extended to
+        self.partial = partial  # True if a listing was cut short by the time budget
+
+
+class _DirIndex:
+    __slots__ = ("mtime", "names", "dirs")
+
+    def __init__(self, mtime, names, dirs):
+        self.mtime = mtime
+        self.names = names  # sorted entry names
+        self.dirs = dirs  # set of names that are directories
+
+
+class CompletionService:
+    """Thread-safe completion engine with per-directory and $PATH indexes."""
+
+    def __init__(self, extra_commands=(), max_dirs: int = 256):
+        self.extra_commands = sorted(set(extra_commands))
+        self.max_dirs = max_dirs
+        self._dirs = {}  # absolute path -> _DirIndex (insertion order = LRU order)
+        self._path_key = None
+        self._path_commands = []
+        self._lock = threading.Lock()
+        self._scanning = set()
+        self._closed = False  # shutdown() was called: complete_async() does nothing
+
+    # ---------------------------
+    # Directory index
+    # ---------------------------
+    def _dir_index(self, path: str, deadline: float = None):
+        """
+        Return (index, partial). Uses the cache if the directory mtime is unchanged.
+        With a deadline, a slow scan returns a partial index and keeps running.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None, False
+        with self._lock:
+            index = self._dirs.get(path)
+            if index is not None and index.mtime == mtime:
+                # refresh LRU position
+                self._dirs[path] = self._dirs.pop(path)
+                return index, False
+
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return None, False
+        names, dirs = [], set()
+        for entry in entries:
+            names.append(entry.name)
+            if _is_dir(entry):
+                dirs.add(entry.name)
+            if deadline is not None and len(names) % 256 == 0 and time.monotonic() > deadline:
+                # Out of budget: hand back what we have, finish the same scan in background
+                partial_index = _DirIndex(mtime, sorted(names), set(dirs))
+                self._continue_scan(path, mtime, entries, names, dirs)
+                return partial_index, True
+        entries.close()
+
+        index = _DirIndex(mtime, sorted(names), dirs)
+        self._store(path, index)
+        return index, False
+
+    def _continue_scan(self, path, mtime, entries, names, dirs):
+        with self._lock:
+            if path in self._scanning:
+                entries.close()
+                return
+            self._scanning.add(path)
+
+        def scan():
+            try:
+                for entry in entries:
+                    names.append(entry.name)
+                    if _is_dir(entry):
+                        dirs.add(entry.name)
+                self._store(path, _DirIndex(mtime, sorted(names), dirs))
+            except OSError:
+                pass
+            finally:
+                entries.close()
+                with self._lock:
+                    self._scanning.discard(path)
+
+        threading.Thread(target=scan, daemon=True).start()
+
+    def _store(self, path: str, index: _DirIndex):
+        with self._lock:
+            self._dirs.pop(path, None)
+            self._dirs[path] = index
+            while len(self._dirs) > self.max_dirs:
+                self._dirs.pop(next(iter(self._dirs)))
+
+    def invalidate(self, path: str = None):
+        with self._lock:
+            if path is None:
+                self._dirs.clear()
+                self._path_key = None
+            else:
+                self._dirs.pop(os.path.abspath(path), None)
+
+    # ---------------------------
+    # $PATH index
+    # ---------------------------
+    def _command_names(self) -> list:
+        path_dirs = [d for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+        stamps = []
+        for d in path_dirs:
+            try:
+                stamps.append(os.stat(d).st_mtime_ns)
+            except OSError:
+                stamps.append(None)
+        key = (tuple(path_dirs), tuple(stamps))
+        with self._lock:
+            if key == self._path_key:
+                return self._path_commands
+
+        names = set(self.extra_commands)
+        for d in path_dirs:
+            try:
+                with os.scandir(d) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_file() and os.access(entry.path, os.X_OK):
+                                names.add(entry.name)
+                        except OSError:
+                            pass
+            except OSError:
+                continue
+        commands = sorted(names)
+        with self._lock:
+            self._path_key = key
+            self._path_commands = commands
+        return commands
+
+    # ---------------------------
+    # Completion
+    # ---------------------------
+    def complete(self, word: str, command_position: bool = False, budget: float = None,
+                 cwd: str = None) -> CompletionResult:
+        """
+        Complete `word`. In command position (first word, no '/'), candidates are
+        executables from $PATH plus extra_commands; otherwise files and directories,
+        relative to cwd (default: the process's directory). Directory candidates
+        end with os.sep.
+        """
+        deadline = time.monotonic() + budget if budget is not None else None
+
+        if command_position and os.sep not in word and not word.startswith("~"):
+            names = self._command_names()
+            lo, hi = _prefix_range(names, word)
+            return CompletionResult(word, names[lo:hi])
+
+        directory, prefix = os.path.split(word)
+        listing_dir = os.path.abspath(os.path.join(cwd or os.getcwd(), os.path.expanduser(directory or ".")))
+        index, partial = self._dir_index(listing_dir, deadline)
+        if index is None:
+            return CompletionResult(word, [])
+
+        lo, hi = _prefix_range(index.names, prefix)
+        matches = []
+        for name in index.names[lo:hi]:
+            if name.startswith(".") and not prefix.startswith("."):
+                continue  # hidden entries only when asked for, like bash
+            candidate = os.path.join(directory, name) if directory else name
+            if name in index.dirs:
+                candidate += os.sep
+            matches.append(candidate)
+        return CompletionResult(word, matches, partial)
+
+    def complete_async(self, word: str, callback, command_position: bool = False,
+                       budget: float = COMPLETION_BUDGET, cwd: str = None):
+        """Run complete() on the worker thread and call callback(result) there."""
+        def job():
+            try:
+                result = self.complete(word, command_position, budget, cwd)
+            except Exception:
+                result = CompletionResult(word, [])
+            callback(result)
+
+        if self._closed:
+            return None
+        return get_worker("complete").submit(job)
+
+    def shutdown(self):
+        """Stop taking requests (the worker thread is shared, see terminal_core.workers)."""
+        self._closed = True
+
+
+_default_service = None
+
+
+def default_service() -> CompletionService:
+    global _default_service
+    if _default_service is None:
+        _default_service = CompletionService()
+    return _default_service
@@ -0,0 +1,279 @@
+# utils/config.py
+"""
+User configuration with hot reload.
+
+Read from config.toml (or config.json) in the platformdirs user config dir,
+e.g. ~/.config/0Term/config.toml, and validated into a Settings object.
+Unknown keys and invalid values are reported and replaced by their defaults,
+so a typo never keeps the terminal from starting. ConfigWatcher.check() costs
+one stat() and reloads only when the file's mtime or size changed.
+
+    theme = "Dracula"                 # one of the built-in themes or [themes.*]
+
+    [themes.Solarized]                # custom themes: all four colors, "#rrggbb"
+    bg = "#002b36"
+    text = "#839496"
+    error = "#dc322f"
+    cursor = "#93a1a1"
+
+    [font]
+    family = "Monospace"
+    size = 11
+
+    [window]
+    geometry = "900x600"              # startup size only
+
+    [terminal]
+    scrollback_lines = 10000          # lines kept in the widget (not virtualized)
+    history_lines = 1000000           # lines kept in the virtualized scrollback
+    tui_apps = ["nano", "vi", "vim", "micro", "top", "htop", "less", "man"]
+    detect_links = true               # underline URLs and existing file paths (Ctrl-click opens)
+    renderer = "text"                 # full-screen apps: "text" (the widget) or "grid" (fixed-cell
+                                      # canvas, faster redraws, wide characters aligned)
+
+    [performance]
+    frame_rate = 60                   # widget updates per second
+    max_chars_per_frame = 262144      # text inserted per update
+    min_read_size = 4096              # adaptive fd read size bounds (bytes)
+    max_read_size = 1048576
+    fast_forward_screens = 0          # 0: floods render at full detail, slowed to the
+                                      # render rate; N: keep only their newest N screenfuls
+
+    [cache]                           # output cache for read-only commands (off while empty)
+    commands = ["ls*", { pattern = "git status*", inputs = [".", ".git/index", ".git/HEAD"] }]
+    ttl = 30                          # seconds an entry is served (and refreshed in the background)
+    env = ["KUBECONFIG"]              # variables that are part of the key
+    inputs = ["."]                    # paths (relative to the cwd) whose mtime/size are part of the key
+    max_bytes = 33554432              # total size, least recently used evicted first
+"""
+import os
+import re
+import json
+import sys
+import threading
+
+from utils.helpers import THEMES
+
+CONFIG_FILE_NAMES = ("config.toml", "config.json")
+
+# Programs that need a PTY (full-screen apps); [terminal] tui_apps replaces the list
+DEFAULT_TUI_APPS = ("nano", "vi", "vim", "micro", "top", "htop", "less", "man")
+
+THEME_KEYS = ("bg", "text", "error", "cursor")
+_COLOR = re.compile(r"#[0-9a-fA-F]{6}")
+_GEOMETRY = re.compile(r"\d+x\d+([+-]\d+[+-]\d+)?")
+
+
+def _int_range(low, high):
+    return lambda value: type(value) is int and low <= value <= high
+
+
+def _str_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) and item for item in value)
+
+
+_CACHE_RULE_KEYS = {"pattern": lambda v: isinstance(v, str) and v, "ttl": _int_range(1, 7 * 86400),
+                    "env": _str_list, "inputs": _str_list}
+
+
+def _cache_rules(value) -> bool:
+    # "pattern" or {pattern = "...", ttl = N, env = [...], inputs = [...]}
+    if not isinstance(value, list):
+        return False
+    for item in value:
+        if isinstance(item, dict):
+            if "pattern" not in item or not all(key in _CACHE_RULE_KEYS and _CACHE_RULE_KEYS[key](v)
+                                                for key, v in item.items()):
+                return False
+        elif not (isinstance(item, str) and item):
+            return False
+    return True
+
+
+# (section, key, attribute, default, check); section None = top level
+_FIELDS = (
+    (None, "theme", "theme", "Dracula", lambda v: isinstance(v, str)),
+    ("font", "family", "font_family", "Consolas" if sys.platform.startswith("win") else "Monospace",
+     lambda v: isinstance(v, str) and v),
+    ("font", "size", "font_size", 11, _int_range(6, 72)),
+    ("window", "geometry", "geometry", "900x600", lambda v: isinstance(v, str) and _GEOMETRY.fullmatch(v)),
+    ("terminal", "scrollback_lines", "scrollback_lines", 10000, _int_range(100, 10000000)),
+    ("terminal", "history_lines", "history_lines", 1000000, _int_range(1000, 100000000)),
+    ("terminal", "tui_apps", "tui_apps", DEFAULT_TUI_APPS, _str_list),
+    ("terminal", "detect_links", "detect_links", True, lambda v: isinstance(v, bool)),
+    ("terminal", "renderer", "screen_renderer", "text", lambda v: v in ("text", "grid")),
+    ("performance", "frame_rate", "frame_rate", 60, _int_range(1, 240)),
+    ("performance", "max_chars_per_frame", "max_chars_per_frame", 256 * 1024, _int_range(1024, 64 * 1024 * 1024)),
+    ("performance", "min_read_size", "min_read_size", 4 * 1024, _int_range(512, 16 * 1024 * 1024)),
+    ("performance", "max_read_size", "max_read_size", 1024 * 1024, _int_range(512, 16 * 1024 * 1024)),
+    ("performance", "fast_forward_screens", "fast_forward_screens", 0, _int_range(0, 1000)),
+    ("cache", "commands", "cache_commands", [], _cache_rules),
+    ("cache", "ttl", "cache_ttl", 30, _int_range(1, 7 * 86400)),
+    ("cache", "env", "cache_env", [], _str_list),
+    ("cache", "inputs", "cache_inputs", ["."], _str_list),
+    ("cache", "max_bytes", "cache_max_bytes", 32 * 1024 * 1024, _int_range(0, 1024 * 1024 * 1024)),
+)
+_SECTIONS = {section for section, *_ in _FIELDS if section is not None} | {"themes"}
+
+
+class Settings:
+    """Validated configuration; every attribute always holds a usable value."""
+
+    __slots__ = tuple(attr for _, _, attr, _, _ in _FIELDS) + ("themes", "path", "errors")
+
+    def __init__(self):
+        for _, _, attr, default, _ in _FIELDS:
+            setattr(self, attr, default)
+        self.tui_apps = frozenset(self.tui_apps)
+        self.themes = dict(THEMES)
+        self.path = None  # config file they were loaded from (which may not exist)
+        self.errors = []  # problems found while loading (shown to the user)
+
+    @property
+    def colors(self) -> dict:
+        """bg / text / error / cursor of the selected theme."""
+        return self.themes.get(self.theme) or self.themes["Dark"]
+
+    def theme_colors(self, name: str = None) -> dict:
+        return self.themes.get(name or self.theme) or self.colors
+
+
+def config_dir() -> str:
+    import platformdirs
+    return platformdirs.user_config_dir("0Term", appauthor=False)
+
+
+def find_config(directory: str = None) -> str:
+    """Path of the config file to use (the first that exists, else config.toml)."""
+    directory = directory or config_dir()
+    for name in CONFIG_FILE_NAMES:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+    return os.path.join(directory, CONFIG_FILE_NAMES[0])
+
+
+def _parse(path: str) -> dict:
+    """Raw table from a TOML or JSON file. Raises OSError / ValueError."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".json"):
+        table = json.loads(data.decode("utf-8"))
+    else:
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError("TOML config needs Python 3.11+ or the tomli package (or use config.json)")
+        table = tomllib.loads(data.decode("utf-8"))
+    if not isinstance(table, dict):
+        raise ValueError("top level must be a table")
+    return table
+
+
+def settings_from(table: dict) -> Settings:
+    """Validate a raw table into Settings; problems go to settings.errors."""
+    settings = Settings()
+    errors = settings.errors
+    for key, value in table.items():
+        if key not in _SECTIONS and key != "theme":
+            errors.append(f"unknown key: {key}")
+        elif key in _SECTIONS and not isinstance(value, dict):
+            errors.append(f"[{key}] must be a table")
+
+    themes = table.get("themes")
+    if isinstance(themes, dict):
+        for name, colors in themes.items():
+            if not isinstance(colors, dict) or sorted(colors) != sorted(THEME_KEYS):
+                errors.append(f"themes.{name}: needs exactly {', '.join(THEME_KEYS)}")
+            elif not all(isinstance(c, str) and _COLOR.fullmatch(c) for c in colors.values()):
+                errors.append(f"themes.{name}: colors must be #rrggbb")
+            else:
+                settings.themes[name] = dict(colors)
+
+    known = {}
+    for section, key, attr, default, check in _FIELDS:
+        known.setdefault(section, set()).add(key)
+        scope = table if section is None else table.get(section)
+        if not isinstance(scope, dict) or key not in scope:
+            continue
+        value = scope[key]
+        if check(value):
+            setattr(settings, attr, value)
+        else:
+            name = key if section is None else f"{section}.{key}"
+            errors.append(f"{name}: invalid value {value!r}, using {default!r}")
+    for section in known:
+        scope = table.get(section) if section is not None else None
+        if isinstance(scope, dict):
+            errors.extend(f"unknown key: {section}.{key}" for key in scope if key not in known[section])
+
+    settings.tui_apps = frozenset(settings.tui_apps)
+    if settings.theme not in settings.themes:
+        errors.append(f"theme: unknown theme {settings.theme!r}")
+    if settings.min_read_size > settings.max_read_size:
+        errors.append("performance: min_read_size is larger than max_read_size")
+        settings.min_read_size = settings.max_read_size
+    return settings
+
+
+def load_settings(path: str = None) -> Settings:
+    """Settings from path (default: find_config()); defaults if the file does not exist."""
+    path = path or find_config()
+    try:
+        table = _parse(path)
+    except FileNotFoundError:
+        settings = Settings()
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        settings = Settings()
+        settings.errors.append(f"{os.path.basename(path)}: {e}")
+    else:
+        settings = settings_from(table)
+    settings.path = path
+    return settings
+
+
+class ConfigWatcher:
+    """
+    Detects changes to the config file by polling its (mtime, size).
+    check() returns the reloaded Settings after a change, else None.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or find_config()
+        self._stamp = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def check(self):
+        stamp = self._stat()
+        if stamp == self._stamp:
+            return None
+        self._stamp = stamp
+        return load_settings(self.path)
+
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def current() -> Settings:
+    """The settings in effect (loaded on first use; replaced by set_current on reload)."""
+    global _current
+    with _current_lock:
+        if _current is None:
+            _current = load_settings()
+        return _current
+
+
+def set_current(settings: Settings):
+    global _current
+    with _current_lock:
+        _current = settings
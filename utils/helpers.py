@@ -1,6 +1,4 @@
 # helpers.py
-import os
-import getpass
 
 # --- Theme Definitions ---
 THEMES = {
@@ -32,45 +30,21 @@ THEMES = {
 
 # --- Prompt Oluşturucu ---
 def get_dynamic_prompt():
-    """Creates a prompt containing the username and current directory."""
+    """
+    Creates a prompt containing the username and current directory.
+    Rendered by the cached segment engine in utils.prompt; never blocks (git
+    state is filled in on a worker thread and shows up on later prompts).
+    """
     try:
-        user = getpass.getuser()
-        cwd_path = os.getcwd()
-        cwd_display = os.path.basename(cwd_path)
-        
-        if cwd_path == os.path.expanduser('~'):
-            cwd_display = "~"
-        elif cwd_path == '/':
-            cwd_display = "/"
-
-        return f"{user} @ {cwd_display} : $ "
-        
+        from utils.prompt import default_engine
+        return default_engine().render()
     except Exception:
         return "$ "
 
 def get_completions(partial_path):
     """
     The completion list that matches the given partial path (file/folder) ends.
+    Served from the cached index in utils.completion; directories end with os.sep.
     """
-    if not partial_path:
-        return os.listdir('.')
-
-    directory, prefix = os.path.split(partial_path)
-    if not directory:
-        directory = '.'
-    
-    if not os.path.isdir(directory) and directory != '.':
-        return []
-
-    try:
-        all_entries = os.listdir(directory)
-        
-        matches = [
-            os.path.join(directory, entry)
-            for entry in all_entries
-            if entry.startswith(prefix)
-        ]
-        
-        return matches
-    except Exception:
-        return []
+    from utils.completion import default_service
+    return default_service().complete(partial_path).matches
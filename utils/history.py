@@ -0,0 +1,295 @@
+# utils/history.py
+"""
+Persistent, searchable command history.
+
+- Stored in the platformdirs user data dir as an append-only text file, one
+  command per line (backslashes and newlines escaped).
+- Writes are batched: new commands are buffered and appended in one write
+  every FLUSH_EVERY commands or FLUSH_INTERVAL seconds, and on close().
+- Startup only reads the tail of the file (via mmap) so Up/Down works at
+  once; the full history is loaded and indexed on a background thread.
+- The index keeps every distinct command once, most recent first, packed
+  into one string with an offset array: substring search is a str.find()
+  from the current position (C speed over the whole history).
+- When the file grows well past its deduplicated size it is compacted
+  (rewritten atomically with one line per distinct command).
+"""
+import os
+import mmap
+import bisect
+import threading
+from array import array
+
+import platformdirs
+
+HISTORY_FILE_NAME = "history"
+FLUSH_EVERY = 32
+FLUSH_INTERVAL = 2.0
+TAIL_ENTRIES = 1000
+MAX_ENTRIES = 1000000
+# Compact when the file is this many times larger than its deduplicated content
+COMPACT_RATIO = 2.0
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+def default_history_path() -> str:
+    return os.path.join(platformdirs.user_data_dir("0Term", appauthor=False), HISTORY_FILE_NAME)
+
+
+def _escape(command: str) -> str:
+    return command.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _unescape(line: str) -> str:
+    if "\\" not in line:
+        return line
+    out = []
+    i = 0
+    while i < len(line):
+        c = line[i]
+        if c == "\\" and i + 1 < len(line):
+            nxt = line[i + 1]
+            out.append("\n" if nxt == "n" else nxt)
+            i += 2
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+def _distinct(commands) -> list:
+    seen = set()
+    out = []
+    for command in commands:
+        if command not in seen:
+            seen.add(command)
+            out.append(command)
+    return out
+
+
+class _SearchIndex:
+    """Distinct commands, most recent first, packed for fast substring search."""
+
+    def __init__(self, commands_oldest_first):
+        unique = _distinct(reversed(commands_oldest_first))
+        self.commands = unique
+        self.blob = "\n".join(c.replace("\n", " ") for c in unique)
+        offsets = array("L")
+        pos = 0
+        for c in unique:
+            offsets.append(pos)
+            pos += len(c) + 1
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.commands)
+
+    def find(self, query: str, start: int = 0):
+        """Index (>= start) of the most recent command containing query, or None."""
+        if start >= len(self.commands):
+            return None
+        pos = self.blob.find(query, self.offsets[start])
+        while pos >= 0:
+            idx = bisect.bisect_right(self.offsets, pos) - 1
+            # the match must not run across the separator into the next command
+            if pos + len(query) <= self.offsets[idx] + len(self.commands[idx]):
+                return idx
+            pos = self.blob.find(query, self.offsets[idx + 1]) if idx + 1 < len(self.offsets) else -1
+        return None
+
+
+class HistoryStore:
+    """
+    Command history backed by an append-only file.
+
+    entries: list of commands, oldest first (tail only until load finishes).
+    search(query, start): reverse-i-search over distinct commands.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = MAX_ENTRIES, on_loaded=None):
+        self.path = path or default_history_path()
+        self.max_entries = max_entries
+        self.on_loaded = on_loaded
+        self.entries = []
+        self.loaded = False
+        self._session = []  # commands added since the full load started
+        self._index = None
+        self._indexed_count = 0  # entries[:_indexed_count] are covered by _index
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+        # Everything past this size was written by us after startup (session entries)
+        try:
+            self._file_size = os.path.getsize(self.path)
+        except OSError:
+            self._file_size = 0
+        self.entries = self._read_tail(TAIL_ENTRIES)
+        threading.Thread(target=self._load_all, daemon=True).start()
+
+    # ---------------------------
+    # Loading
+    # ---------------------------
+    def _map(self):
+        """mmap of the history file, or None if it is missing or empty."""
+        try:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+    def _read_tail(self, count: int) -> list:
+        """Last `count` commands, read backwards from the end of the file."""
+        mm = self._map()
+        if mm is None:
+            return []
+        try:
+            end = min(len(mm), self._file_size)
+            if end == 0:
+                return []
+            if mm[end - 1:end] == b"\n":
+                end -= 1
+            pos = end
+            for _ in range(count):
+                pos = mm.rfind(b"\n", 0, pos)
+                if pos < 0:
+                    break
+            start = pos + 1
+            chunk = mm[start:end].decode("utf-8", errors="replace")
+        finally:
+            mm.close()
+        return [_unescape(line) for line in chunk.split("\n") if line]
+
+    def _load_all(self):
+        mm = self._map()
+        commands = []
+        size = 0
+        if mm is not None:
+            try:
+                size = min(len(mm), self._file_size)
+                data = mm[:size].decode("utf-8", errors="replace")
+            finally:
+                mm.close()
+            commands = [_unescape(line) for line in data.split("\n") if line]
+        if len(commands) > self.max_entries:
+            commands = commands[-self.max_entries:]
+        index = _SearchIndex(commands)
+
+        with self._lock:
+            self._indexed_count = len(commands)
+            commands.extend(self._session)
+            self._session = []
+            self.entries = commands
+            self._index = index
+            self.loaded = True
+
+        live_bytes = len(index.blob.encode("utf-8", errors="replace")) + 1
+        if size > COMPACT_MIN_BYTES and size > live_bytes * COMPACT_RATIO:
+            self.compact()
+        if self.on_loaded is not None:
+            self.on_loaded()
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+    def add(self, command: str):
+        """Record a command (consecutive duplicates are skipped)."""
+        if not command:
+            return
+        with self._lock:
+            if self.entries and self.entries[-1] == command:
+                return
+            self.entries.append(command)
+            if not self.loaded:
+                self._session.append(command)
+            self._pending.append(command)
+            flush_now = len(self._pending) >= FLUSH_EVERY
+            if not flush_now and self._timer is None:
+                self._timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        """Append buffered commands to the file in one write."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return
+        data = "".join(_escape(c) + "\n" for c in pending).encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+    def compact(self):
+        """Rewrite the file with each distinct command once (oldest first)."""
+        self.flush()
+        with self._lock:
+            if not self.loaded:
+                return
+            commands = _distinct(reversed(self.entries))[:self.max_entries]
+        commands.reverse()
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(_escape(c) + "\n" for c in commands)
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def close(self):
+        self.flush()
+
+    # ---------------------------
+    # Searching
+    # ---------------------------
+    def search(self, query: str, start: int = 0):
+        """
+        Reverse-i-search: (rank, command) of the most recent distinct command
+        containing query whose rank is >= start. Rank 0 is the newest; pass
+        rank + 1 to continue with the next older match. Returns None if none.
+        """
+        with self._lock:
+            index = self._index
+            if index is not None:
+                newer_source = self.entries[self._indexed_count:]
+                older = None
+            else:
+                # Still loading: session commands, then the tail read at startup
+                newer_source = list(self._session)
+                older = self.entries[:len(self.entries) - len(self._session)]
+
+        newer = _distinct(reversed(newer_source))
+        for rank in range(start, len(newer)):
+            if query in newer[rank]:
+                return rank, newer[rank]
+        seen = set(newer)
+
+        if older is not None:
+            candidates = [c for c in _distinct(reversed(older)) if c not in seen]
+            for rank in range(max(0, start - len(newer)), len(candidates)):
+                if query in candidates[rank]:
+                    return len(newer) + rank, candidates[rank]
+            return None
+
+        idx = index.find(query, max(0, start - len(newer)))
+        while idx is not None and index.commands[idx] in seen:
+            idx = index.find(query, idx + 1)
+        if idx is None:
+            return None
+        return len(newer) + idx, index.commands[idx]
@@ -0,0 +1,266 @@
+# utils/prompt.py
+"""
+Prompt engine with pluggable segments.
+
+A prompt is a list of Segments rendered left to right. Each segment declares
+how its value may be cached:
+- "static":   computed once (user name, literals);
+- "cwd":      cached per working directory, for `ttl` seconds (None = forever);
+- "volatile": computed for every prompt (exit status, duration) and must be cheap.
+
+Slow segments (git branch / dirty state) are never computed on the caller's
+thread: render() returns immediately with their cached value (possibly stale,
+or empty the first time in a directory) and recomputes them on a worker
+thread, then calls on_ready(text) with the refreshed prompt so the UI can
+patch the prompt line in place. invalidate() marks every cached cwd value
+stale (e.g. after a command ran); stale values are still shown until the
+refresh lands.
+"""
+import os
+import time
+import getpass
+import threading
+
+from terminal_core.workers import get_worker
+
+# Seconds a cwd-scoped value stays fresh
+PROMPT_TTL = 5.0
+# Longest a `git status` may run before the dirty state is shown as unknown
+GIT_STATUS_TIMEOUT = 2.0
+
+
+class PromptContext:
+    __slots__ = ("cwd", "last_status", "duration")
+
+    def __init__(self, cwd: str = None, last_status: int = 0, duration: float = None):
+        self.cwd = cwd or os.getcwd()
+        self.last_status = last_status  # exit code of the last command
+        self.duration = duration  # seconds the last command took, if any
+
+
+class Segment:
+    scope = "volatile"  # "static", "cwd" or "volatile"
+    slow = False  # True: only ever computed on the engine's worker thread
+    ttl = PROMPT_TTL
+
+    def render(self, ctx: PromptContext) -> str:
+        return ""
+
+
+class Text(Segment):
+    scope = "static"
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def render(self, ctx):
+        return self.text
+
+
+class UserSegment(Segment):
+    scope = "static"
+
+    def render(self, ctx):
+        return getpass.getuser()
+
+
+class CwdSegment(Segment):
+    """Base name of the working directory, "~" for home and "/" for the root."""
+
+    scope = "cwd"
+    ttl = None
+
+    def render(self, ctx):
+        if ctx.cwd == os.path.expanduser("~"):
+            return "~"
+        if ctx.cwd == "/":
+            return "/"
+        return os.path.basename(ctx.cwd)
+
+
+def find_git_dir(path: str):
+    """The .git directory governing path (following `gitdir:` files), or None."""
+    while True:
+        candidate = os.path.join(path, ".git")
+        if os.path.isdir(candidate):
+            return candidate
+        if os.path.isfile(candidate):
+            # worktrees and submodules: ".git" is a file pointing at the real directory
+            try:
+                with open(candidate, encoding="utf-8") as f:
+                    line = f.readline().strip()
+            except OSError:
+                return None
+            if line.startswith("gitdir:"):
+                return os.path.normpath(os.path.join(path, line[7:].strip()))
+            return None
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+class GitSegment(Segment):
+    """` (branch*)`: current branch (or short commit) and a `*` when tracked files changed."""
+
+    scope = "cwd"
+    slow = True
+
+    def __init__(self, timeout: float = GIT_STATUS_TIMEOUT):
+        self.timeout = timeout
+
+    def render(self, ctx):
+        git_dir = find_git_dir(ctx.cwd)
+        if git_dir is None:
+            return ""
+        try:
+            with open(os.path.join(git_dir, "HEAD"), encoding="utf-8") as f:
+                head = f.read().strip()
+        except OSError:
+            return ""
+        branch = head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else head[:7]
+        return f" ({branch}{self._dirty_mark(ctx.cwd)})"
+
+    def _dirty_mark(self, cwd: str) -> str:
+        import subprocess
+        env = dict(os.environ, GIT_OPTIONAL_LOCKS="0")  # never take index.lock for a prompt
+        try:
+            result = subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"],
+                cwd=cwd, env=env, capture_output=True, timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return "?"
+        except OSError:
+            return ""
+        return "*" if result.returncode == 0 and result.stdout.strip() else ""
+
+
+class StatusSegment(Segment):
+    """` [code]` after a failed command."""
+
+    def render(self, ctx):
+        return f" [{ctx.last_status}]" if ctx.last_status else ""
+
+
+class DurationSegment(Segment):
+    """` 12.3s` after a command that took at least `threshold` seconds."""
+
+    def __init__(self, threshold: float = 2.0):
+        self.threshold = threshold
+
+    def render(self, ctx):
+        if ctx.duration is None or ctx.duration < self.threshold:
+            return ""
+        if ctx.duration < 60:
+            return f" {ctx.duration:.1f}s"
+        minutes, seconds = divmod(int(ctx.duration), 60)
+        return f" {minutes}m{seconds:02d}s"
+
+
+def default_segments() -> list:
+    """`user @ dir (branch*) [status] duration : $ `"""
+    return [UserSegment(), Text(" @ "), CwdSegment(), GitSegment(), StatusSegment(), DurationSegment(),
+            Text(" : $ ")]
+
+
+class PromptEngine:
+    """Thread-safe prompt renderer; see the module docstring for the caching rules."""
+
+    def __init__(self, segments=None):
+        self.segments = list(segments) if segments is not None else default_segments()
+        self._cache = {}  # (segment index, cwd or None) -> (text, time, generation)
+        self._generation = 0
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._closed = False  # shutdown() was called: no more background refreshes
+
+    def invalidate(self):
+        """Mark cached cwd-scoped values stale; they are refreshed on the next render."""
+        with self._lock:
+            self._generation += 1
+
+    def render(self, ctx: PromptContext = None, on_ready=None) -> str:
+        """
+        Prompt text for ctx, without blocking. If slow segments were missing or
+        stale, they are recomputed in the background and on_ready(text) is called
+        (on the worker thread) with the refreshed prompt.
+        """
+        ctx = ctx or PromptContext()
+        parts = []
+        stale = []
+        now = time.monotonic()
+        for index, segment in enumerate(self.segments):
+            if segment.scope == "volatile" and not segment.slow:
+                parts.append(self._safe_render(segment, ctx))
+                continue
+            key = (index, ctx.cwd if segment.scope != "static" else None)
+            with self._lock:
+                entry = self._cache.get(key)
+                fresh = entry is not None and self._is_fresh(segment, entry, now)
+            if fresh or not segment.slow:
+                if not fresh:
+                    entry = self._store(key, self._safe_render(segment, ctx))
+                parts.append(entry[0])
+            else:
+                parts.append(entry[0] if entry is not None else "")
+                stale.append((key, segment))
+        if stale:
+            self._refresh(ctx, stale, on_ready)
+        return "".join(parts)
+
+    def _is_fresh(self, segment, entry, now) -> bool:
+        if segment.scope == "static":
+            return True
+        if segment.slow and entry[2] != self._generation:
+            return False
+        return segment.ttl is None or now - entry[1] < segment.ttl
+
+    def _store(self, key, text):
+        entry = (text, time.monotonic(), self._generation)
+        with self._lock:
+            self._cache[key] = entry
+        return entry
+
+    @staticmethod
+    def _safe_render(segment, ctx) -> str:
+        try:
+            return segment.render(ctx) or ""
+        except Exception:
+            return ""
+
+    def _refresh(self, ctx, stale, on_ready):
+        with self._lock:
+            stale = [(key, segment) for key, segment in stale if key not in self._in_flight]
+            if not stale or self._closed:
+                return
+            self._in_flight.update(key for key, _ in stale)
+
+        def job():
+            changed = False
+            for key, segment in stale:
+                with self._lock:
+                    old = self._cache.get(key)
+                text = self._safe_render(segment, ctx)
+                self._store(key, text)
+                with self._lock:
+                    self._in_flight.discard(key)
+                changed |= old is None or old[0] != text
+            if changed and on_ready is not None:
+                on_ready(self.render(ctx))
+
+        get_worker("prompt").submit(job)
+
+    def shutdown(self):
+        """Stop background refreshes (the worker thread is shared, see terminal_core.workers)."""
+        self._closed = True
+
+
+_default_engine = None
+
+
+def default_engine() -> PromptEngine:
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = PromptEngine()
+    return _default_engine